@@ -1,15 +1,16 @@
 import os
+import time
 
-from flask import Flask, abort, current_app, redirect, render_template, session, url_for, request, jsonify
+from flask import Flask, abort, current_app, g, redirect, render_template, url_for, request
 
-from .auth import require_auth, require_quant
+from .auth import require_auth, require_quant, resolve_identity, session_expired_response
 from .config import DevelopmentConfig, ProductionConfig
-from .db import get_db, get_market_status, get_transaction_history, get_user_balance
+from .db import get_db, get_market_status, get_ranked_users, get_transaction_history
 from .scheduler import init_scheduler
-from datetime import datetime, timedelta
 
 
 def create_app(test_config=None):
+    started_at = time.perf_counter()
     app = Flask(
         __name__,
         instance_relative_config=True,
@@ -33,57 +34,26 @@ def create_app(test_config=None):
         return {"site_name": app.config["SITE_NAME"], "tagline": app.config["TAGLINE"]}
 
     @app.before_request
-    def check_session_timeout():
-        # Skip session check for static files and auth endpoints
+    def load_identity():
+        # Skip identity resolution for static files, auth endpoints and the
+        # zero-DB heartbeat
         if request.endpoint and (
             request.endpoint.startswith('static') or 
-            request.endpoint in ['auth.register', 'auth.login']
+            request.endpoint in ['auth.register', 'auth.login', 'api.pulse']
         ):
             return
-        
-        # Check if user has a session
-        if 'username' in session:
-            # Check if user is CHANCELLOR - they never expire
-            current_username = session.get('username', '').upper()
-            quant_username = app.config.get("QUANT_USERNAME", "CHANCELLOR").upper()
-            if current_username == quant_username:
-                return  # Skip all timeout checks for CHANCELLOR
-            
-            # Check if session has a timestamp
-            if 'session_created' not in session:
-                session.clear()
-                if request.is_json:
-                    return jsonify({"error": "Session expired", "status": "session_expired"}), 401
-                return redirect(url_for('auth.register', expired=1))
-            
-            try:
-                # Check if session is older than 60 seconds
-                session_created = datetime.fromisoformat(session['session_created'])
-                session_age = datetime.now() - session_created
-                
-                if session_age > timedelta(seconds=60):
-                    # Session expired
-                    session.clear()
-                    if request.is_json:
-                        return jsonify({"error": "Session expired", "status": "session_expired"}), 401
-                    return redirect(url_for('auth.register', expired=1))
-            except (ValueError, TypeError, KeyError):
-                # Invalid session data, clear it
-                session.clear()
-                if request.is_json:
-                    return jsonify({"error": "Session expired", "status": "session_expired"}), 401
-                return redirect(url_for('auth.register', expired=1))
+
+        # Resolve the session user once; decorators and handlers reuse g.identity
+        resolve_identity()
+        if g.session_expired:
+            return session_expired_response()
 
     @app.route("/")
     @require_auth
     def home_page():
         db = get_db()
-        current_username = session.get("username")
-        
-        # Extra safety check - if username is None after auth, redirect to register
-        if not current_username:
-            session.clear()
-            return redirect(url_for('auth.register', expired=1))
+        identity = g.identity
+        current_username = identity["username"]
 
         # Redirect The CHANCELLOR to their terminal
         quant_username = app.config.get("QUANT_USERNAME", "CHANCELLOR")
@@ -97,16 +67,12 @@ def create_app(test_config=None):
             ).fetchone()
             user_count = db.execute("SELECT COUNT(*) as count FROM users").fetchone()
             transaction_volume = db.execute(
-                "SELECT COUNT(*) as count, SUM(amount) as volume FROM transactions"
+                "SELECT COUNT(*) as count, SUM(amount) as volume FROM transactions WHERE transaction_type NOT IN ('mint', 'burn')"
             ).fetchone()
-            top_performers = db.execute(
-                "SELECT username, coin_balance FROM users ORDER BY coin_balance DESC LIMIT 3"
-            ).fetchall()
+            top_performers = get_ranked_users(3)
 
             # Get current user's data
-            current_user_balance = (
-                get_user_balance(current_username) if current_username else 0
-            )
+            current_user_balance = identity["coin_balance"] or 0
             recent_transactions = (
                 get_transaction_history(current_username, 5) if current_username else []
             )
@@ -126,9 +92,6 @@ def create_app(test_config=None):
             audience_count = db.execute(
                 "SELECT COUNT(*) as count FROM users WHERE is_performer = 0"
             ).fetchone()
-            current_user_is_performer = db.execute(
-                "SELECT is_performer FROM users WHERE username = ?", (current_username,)
-            ).fetchone()
 
             market_cap = total_coins["total"] or 0
             stakeholder_count = user_count["count"] or 0
@@ -148,7 +111,6 @@ def create_app(test_config=None):
             available_recipients = []
             performer_count = {"count": 0}
             audience_count = {"count": 0}
-            current_user_is_performer = {"is_performer": 0}
 
         return render_template(
             "home.jinja2",
@@ -165,9 +127,7 @@ def create_app(test_config=None):
             available_recipients=available_recipients,
             performer_count=performer_count["count"],
             audience_count=audience_count["count"],
-            current_user_is_performer=bool(current_user_is_performer["is_performer"])
-            if current_user_is_performer
-            else False,
+            current_user_is_performer=identity["is_performer"],
             redistribution_enabled=app.config.get(
                 "ENABLE_PERFORMER_REDISTRIBUTION", False
             ),
@@ -175,10 +135,9 @@ def create_app(test_config=None):
 
     @app.route("/leaderboard")
     def leaderboard_page():
-        current_username = session.get("username")
-        current_user_balance = (
-            get_user_balance(current_username) if current_username else 0
-        )
+        identity = g.identity
+        current_username = identity["username"] if identity else None
+        current_user_balance = identity["coin_balance"] if identity else 0
 
         # Get current market status
         market_status = get_market_status()
@@ -195,7 +154,8 @@ def create_app(test_config=None):
     @app.route("/quant")
     @require_auth
     def quant_terminal():
-        current_username = session.get("username")
+        identity = g.identity
+        current_username = identity["username"]
         quant_username = app.config.get("QUANT_USERNAME", "CHANCELLOR")
         quant_enabled = app.config.get("QUANT_ENABLED", False)
 
@@ -212,14 +172,12 @@ def create_app(test_config=None):
             ).fetchone()
             user_count = db.execute("SELECT COUNT(*) as count FROM users").fetchone()
             transaction_volume = db.execute(
-                "SELECT COUNT(*) as count, SUM(amount) as volume FROM transactions"
+                "SELECT COUNT(*) as count, SUM(amount) as volume FROM transactions WHERE transaction_type NOT IN ('mint', 'burn')"
             ).fetchone()
-            top_performers = db.execute(
-                "SELECT username, coin_balance FROM users ORDER BY coin_balance DESC LIMIT 5"
-            ).fetchall()
+            top_performers = get_ranked_users(5)
 
             # Get current user's data
-            current_user_balance = get_user_balance(current_username)
+            current_user_balance = identity["coin_balance"] or 0
             recent_transactions = get_transaction_history(current_username, 10)
 
             # Get all users for manipulation targets
@@ -283,7 +241,7 @@ def create_app(test_config=None):
     @require_quant
     def chancellor_graph():
         """Chancellor-only stock graph showing top 5 performers over last 10 minutes."""
-        current_username = session.get("username")
+        current_username = g.identity["username"]
         
         return render_template(
             "chancellor_graph.jinja2",
@@ -343,11 +301,23 @@ def create_app(test_config=None):
         )
 
     # Register blueprints
-    from . import api, auth, db
+    from . import api, archive, assets, auth, bench, compression, db, export, ratelimit, replay, replica, tracing, warmup
 
     app.register_blueprint(api.bp)
     app.register_blueprint(auth.bp)
     db.init_app(app)
+    ratelimit.init_app(app)
+    bench.init_app(app)
+    replay.init_app(app)
+    archive.init_app(app)
+    export.init_app(app)
+    replica.init_app(app)
+    tracing.init_app(app)
+    compression.init_app(app)
+    assets.init_app(app)  # wraps the static view installed by compression
+
+    # Template bytecode cache, plus the opt-in warmup before serving
+    warmup.init_app(app, started_at)
 
     # Initialize performer redistribution scheduler
     init_scheduler(app)
@@ -1,23 +1,40 @@
 from datetime import datetime
 
-from flask import Blueprint, current_app, jsonify, request
+from flask import Blueprint, current_app, g, jsonify, request
 
-from .auth import require_auth, require_quant
+from .auth import check_session, require_auth, require_quant
+from .coalescer import submit_transfer
 from .db import (
     approve_or_deny_offer,
+    commit_ledger,
     create_user,
+    debit_balance,
     get_all_users,
+    get_approved_offers_by_ids,
     get_audience_members,
+    get_market_stats,
     get_pending_offers,
     get_performers,
+    get_ranked_users,
     get_recent_approved_offers,
+    get_redistribution_amount,
     get_transaction_history,
     get_user_balance,
     get_user_performer_status,
+    get_user_rank,
+    get_user_stats,
+    get_users_by_ids,
+    is_market_open,
     performer_redistribution,
+    process_offers_bulk,
+    set_redistribution_amount,
     set_user_performer_status,
-    transfer_coins,
 )
+from .ledger import journal
+from .metrics import metrics
+from .idempotency import idempotent
+from .offers import offer_index
+from .ratelimit import rate_limited
 
 bp = Blueprint("api", __name__, url_prefix="/api")
 
@@ -66,7 +83,11 @@ def register_user():
 @bp.route("/users/<username>/balance", methods=["GET"])
 @require_auth
 def get_balance(username):
-    balance = get_user_balance(username)
+    identity = g.identity
+    if identity["username"] == username.upper():
+        balance = identity["coin_balance"]
+    else:
+        balance = get_user_balance(username)
 
     if balance is None:
         return jsonify({"error": "User not found", "status": "user_not_found"}), 404
@@ -74,8 +95,33 @@ def get_balance(username):
     return jsonify({"username": username, "balance": balance, "status": "success"})
 
 
+@bp.route("/users/<username>/stats", methods=["GET"])
+@require_auth
+def get_stats(username):
+    stats = get_user_stats(username)
+
+    if stats is None:
+        return jsonify({"error": "User not found", "status": "user_not_found"}), 404
+
+    return jsonify({**stats, "status": "success"})
+
+
+@bp.route("/users/<username>/rank", methods=["GET"])
+@require_auth
+def get_rank(username):
+    neighbours = min(max(request.args.get("around", 0, type=int), 0), 25)
+    rank = get_user_rank(username, neighbours)
+
+    if rank is None:
+        return jsonify({"error": "User not found", "status": "user_not_found"}), 404
+
+    return jsonify({**rank, "status": "success"})
+
+
 @bp.route("/transfer", methods=["POST"])
 @require_auth
+@idempotent
+@rate_limited("transfer")
 def execute_transfer():
     data = request.get_json()
 
@@ -115,7 +161,7 @@ def execute_transfer():
         )
 
         # Execute the insider trading penalty transfer
-        penalty_result = transfer_coins(sender, quant_username, amount)
+        penalty_result = submit_transfer(sender, quant_username, amount)
 
         # Log the penalty result for debugging
         current_app.logger.info(
@@ -169,7 +215,7 @@ def execute_transfer():
             }
         ), 200
 
-    result = transfer_coins(sender, recipient, amount, transaction_type, request_text)
+    result = submit_transfer(sender, recipient, amount, transaction_type, request_text)
 
     status_codes = {
         "success": 200,
@@ -212,6 +258,52 @@ def get_leaderboard():
     return jsonify({"offers": offers, "status": "success"})
 
 
+@bp.route("/leaderboard/sync", methods=["GET"])
+@require_auth
+def sync_leaderboard():
+    """Delta sync for the leaderboard page.
+
+    Clients pass the ``version`` and ``epoch`` from their previous sync as
+    ``since`` and ``epoch``. Steady-state responses contain only the users whose
+    balances changed, newly approved offers and refreshed aggregates; clients
+    that are too far behind (or whose epoch is stale) get a full reset.
+    """
+    since = request.args.get("since", type=int)
+    epoch = request.args.get("epoch")
+
+    # Capture the version before reading so concurrent writes are re-sent next time
+    version = journal.version
+    changes = None
+    if since is not None and epoch == journal.epoch:
+        changes = journal.changes_since(since)
+
+    if changes is None:
+        return jsonify(
+            {
+                "reset": True,
+                "version": version,
+                "epoch": journal.epoch,
+                "users": get_all_users(),
+                "offers": get_recent_approved_offers(5),
+                "stats": get_market_stats(),
+                "status": "success",
+            }
+        )
+
+    user_ids, offer_ids = changes
+    return jsonify(
+        {
+            "reset": False,
+            "version": version,
+            "epoch": journal.epoch,
+            "users": get_users_by_ids(user_ids),
+            "offers": get_approved_offers_by_ids(offer_ids),
+            "stats": get_market_stats() if user_ids or offer_ids else None,
+            "status": "success",
+        }
+    )
+
+
 @bp.route("/users", methods=["GET"])
 @require_auth
 def get_users():
@@ -239,18 +331,99 @@ def get_transactions():
     )
 
 
+@bp.route("/quant/export/<kind>", methods=["GET"])
+@require_quant
+def quant_export(kind):
+    """Stream the ledger or balance snapshots as NDJSON or CSV.
+
+    Optional ``start``/``end`` ISO date-times (UTC) limit the time range.
+    """
+    from flask import Response, stream_with_context
+
+    from .export import EXPORT_FORMATS, EXPORTS, parse_time_bound, stream_export
+
+    if kind not in EXPORTS:
+        return jsonify(
+            {"error": f"Unknown export '{kind}'", "status": "not_found"}
+        ), 404
+
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify(
+            {"error": "format must be ndjson or csv", "status": "validation_error"}
+        ), 400
+
+    try:
+        start = parse_time_bound(request.args.get("start"))
+        end = parse_time_bound(request.args.get("end"))
+    except ValueError:
+        return jsonify(
+            {"error": "start and end must be ISO date/times", "status": "validation_error"}
+        ), 400
+
+    response = Response(
+        stream_with_context(stream_export(kind, fmt, start, end)),
+        mimetype="text/csv" if fmt == "csv" else "application/x-ndjson",
+    )
+    response.headers["Content-Disposition"] = f'attachment; filename="strawcoin-{kind}.{fmt}"'
+    return response
+
+
 @bp.route("/quant/pending-offers", methods=["GET"])
 @require_quant
 def quant_get_pending_offers():
-    """Get all pending offers for The Chancellor to review."""
+    """Get pending offers for The Chancellor to review.
+
+    With ``since`` and ``epoch`` from a previous response, returns only the
+    offers added and removed since then; otherwise (or when too far behind)
+    returns the full queue with ``reset`` set.
+    """
     performer_username = request.args.get("performer")
-    offers = get_pending_offers(performer_username)
+    recipient = performer_username.upper() if performer_username else None
+    since = request.args.get("since", type=int)
+    epoch = request.args.get("epoch")
+
+    from .db import get_db
+
+    # Read the version before the offers: a concurrent change may then be sent
+    # twice, which clients tolerate, but never missed
+    offer_index.ensure_loaded(get_db())
+    version = offer_index.version
+
+    changes = None
+    if since is not None and epoch == offer_index.epoch:
+        changes = offer_index.changes_since(since, recipient)
+
+    if changes is not None:
+        added, removed = changes
+        return jsonify(
+            {
+                "reset": False,
+                "added": added,
+                "removed": removed,
+                "version": version,
+                "epoch": offer_index.epoch,
+                "status": "success",
+            }
+        )
 
-    return jsonify({"offers": offers, "count": len(offers), "status": "success"})
+    offers = get_pending_offers(performer_username)
+    return jsonify(
+        {
+            "reset": True,
+            "offers": offers,
+            "count": len(offers),
+            "version": version,
+            "epoch": offer_index.epoch,
+            "status": "success",
+        }
+    )
 
 
 @bp.route("/quant/approve-offer", methods=["POST"])
 @require_quant
+@idempotent
+@rate_limited("offers")
 def quant_approve_offer():
     """Approve a pending offer."""
     data = request.get_json()
@@ -291,6 +464,8 @@ def quant_approve_offer():
 
 @bp.route("/quant/deny-offer", methods=["POST"])
 @require_quant
+@idempotent
+@rate_limited("offers")
 def quant_deny_offer():
     """Deny a pending offer."""
     data = request.get_json()
@@ -319,146 +494,171 @@ def quant_deny_offer():
         ), 500
 
 
-@bp.route("/market-stats", methods=["GET"])
-@require_auth
-def get_market_stats():
-    from .db import get_db
+@bp.route("/quant/metrics", methods=["GET"])
+@require_quant
+def quant_metrics():
+    """Operational counters and gauges for The Chancellor."""
+    return jsonify({**metrics.snapshot(), "status": "success"})
 
-    db = get_db()
 
-    total_coins = db.execute("SELECT SUM(coin_balance) as total FROM users").fetchone()
-    user_count = db.execute("SELECT COUNT(*) as count FROM users").fetchone()
-    transaction_volume = db.execute(
-        "SELECT COUNT(*) as count, SUM(amount) as volume FROM transactions"
-    ).fetchone()
-    top_performer = db.execute(
-        "SELECT username, coin_balance FROM users ORDER BY coin_balance DESC LIMIT 1"
-    ).fetchone()
+# Largest batch accepted by the bulk offer endpoint
+MAX_BULK_OFFERS = 500
+
+
+@bp.route("/quant/offers/bulk", methods=["POST"])
+@require_quant
+@idempotent
+@rate_limited("offers")
+def quant_bulk_offers():
+    """Approve or deny many pending offers in one transaction.
+
+    Expects ``{"offers": [{"offer_id": 12, "decision": "approve"}, ...]}``
+    with decisions ``approve`` or ``deny``.
+    """
+    data = request.get_json()
+
+    if not data or not isinstance(data.get("offers"), list) or not data["offers"]:
+        return jsonify(
+            {"error": "offers list required", "status": "validation_error"}
+        ), 400
+
+    if len(data["offers"]) > MAX_BULK_OFFERS:
+        return jsonify(
+            {
+                "error": f"At most {MAX_BULK_OFFERS} offers per request",
+                "status": "validation_error",
+            }
+        ), 400
+
+    decisions = {}
+    for item in data["offers"]:
+        try:
+            offer_id = int(item["offer_id"])
+            decision = item["decision"]
+        except (KeyError, TypeError, ValueError):
+            return jsonify(
+                {
+                    "error": "Each offer needs an integer offer_id and a decision",
+                    "status": "validation_error",
+                }
+            ), 400
+        if decision not in ("approve", "deny"):
+            return jsonify(
+                {
+                    "error": f"Invalid decision '{decision}' for offer {offer_id}",
+                    "status": "validation_error",
+                }
+            ), 400
+        decisions[offer_id] = decision == "approve"
+
+    results = process_offers_bulk(decisions)
+
+    if results is None:
+        return jsonify(
+            {"error": "Failed to process offers", "status": "bulk_failed"}
+        ), 500
+
+    summary = {}
+    for item in results:
+        summary[item["result"]] = summary.get(item["result"], 0) + 1
 
     return jsonify(
         {
-            "market_cap": total_coins["total"] or 0,
-            "total_users": user_count["count"],
-            "transaction_count": transaction_volume["count"] or 0,
-            "total_volume": transaction_volume["volume"] or 0,
-            "top_performer": {
-                "username": top_performer["username"],
-                "balance": top_performer["coin_balance"],
-            }
-            if top_performer
-            else None,
+            "results": results,
+            "summary": summary,
+            "message": f"Processed {len(results)} offers",
             "status": "success",
         }
-    )
+    ), 200
+
+
+@bp.route("/market-stats", methods=["GET"])
+@require_auth
+def get_market_stats_api():
+    return jsonify({**get_market_stats(), "status": "success"})
 
 
 @bp.route("/leaderboard-history", methods=["GET"])
 @require_auth
 def get_leaderboard_history():
-    import hashlib
-    import random
+    from collections import defaultdict
     from datetime import datetime, timedelta
 
-    from .db import get_balance_history, get_current_leaderboard_with_snapshots
+    from .charts import (
+        GRID_SECONDS,
+        ceil_to_grid,
+        downsample_points,
+        floor_to_grid,
+        market_series,
+        parse_max_points,
+    )
+    from .db import (
+        get_balance_history,
+        get_current_leaderboard_with_snapshots,
+        get_history_user_ids,
+        get_read_db_as_of,
+        get_snapshot_balances_at,
+    )
 
     # Get hours parameter, default to 0.5 hours (30 minutes)
     hours = float(request.args.get("hours", 0.5))
     hours = min(hours, 6.0)  # Limit to 6 hours max
 
-    # Get historical data
-    history = get_balance_history(hours)
-
-    # Get current leaderboard to ensure we have recent snapshots
-    current_leaders = get_current_leaderboard_with_snapshots()
+    # Points per user series after downsampling
+    max_points = parse_max_points(request.args.get("max_points"))
 
-    # Process data for chart format with market-like fluctuations
-    chart_data = {}
-    time_points = set()
+    # Optional filters pick the charted users before any snapshots are read
+    top = request.args.get("top", type=int)
+    usernames = [name.strip() for name in request.args.get("users", "").split(",") if name.strip()]
+    performers_only = request.args.get("performers_only", "").lower() in ("1", "true", "yes")
 
-    # Process historical snapshots and add trading-style data points
-    for snapshot in history:
-        username = snapshot["username"]
-        timestamp = snapshot["timestamp"]
-        balance = snapshot["balance"]
+    user_ids = None
+    if top or usernames or performers_only:
+        user_ids = get_history_user_ids(top, usernames, performers_only)
 
-        # Convert datetime to ISO string for Chart.js
-        timestamp_str = (
-            timestamp.isoformat() if hasattr(timestamp, "isoformat") else str(timestamp)
+    # Get current leaderboard to ensure we have recent snapshots
+    current_leaders = get_current_leaderboard_with_snapshots(user_ids)
+
+    # Points sit on a fixed 30-second grid. The newest point trails the clock
+    # (or the read replica's copy) by a second so snapshots still being
+    # written can't change it later.
+    now = datetime.utcnow()
+    window_start = ceil_to_grid(now - timedelta(hours=hours))
+    end = floor_to_grid(min(now, get_read_db_as_of()) - timedelta(seconds=1))
+
+    # With ``since`` (the ``latest`` of an earlier response) only newer points are sent
+    start = window_start
+    since = request.args.get("since")
+    if since:
+        try:
+            since_time = datetime.fromisoformat(since.replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            return jsonify({"error": "Invalid since timestamp", "status": "error"}), 400
+        start = max(window_start, floor_to_grid(since_time) + timedelta(seconds=GRID_SECONDS))
+        # A lagging replica must not move ``latest`` back behind ``since``
+        end = max(end, start - timedelta(seconds=GRID_SECONDS))
+    incremental = start > window_start
+
+    # Balance at the first point, then every snapshot after it
+    base_balances = get_snapshot_balances_at(start, user_ids)
+    snapshots_by_user = defaultdict(list)
+    for snapshot in get_balance_history(user_ids=user_ids, since=start):
+        snapshots_by_user[snapshot["username"]].append(
+            (snapshot["timestamp"], snapshot["balance"])
         )
 
-        if username not in chart_data:
-            chart_data[username] = {}
-
-        chart_data[username][timestamp_str] = balance
-        time_points.add(timestamp_str)
-
-    # Generate additional market-like data points for trading simulation
-    time_points = sorted(list(time_points))
-    if time_points:
-        start_time = datetime.fromisoformat(
-            time_points[0].replace("Z", "+00:00")
-            if "Z" in time_points[0]
-            else time_points[0]
-        )
-        end_time = datetime.fromisoformat(
-            time_points[-1].replace("Z", "+00:00")
-            if "Z" in time_points[-1]
-            else time_points[-1]
+    # Market-like fluctuations are seeded per user and grid point, so a point
+    # has the same value whichever request first returned it
+    chart_data = {}
+    for username in set(base_balances) | set(snapshots_by_user):
+        chart_data[username] = market_series(
+            username,
+            base_balances.get(username),
+            snapshots_by_user.get(username, []),
+            start,
+            end,
         )
-
-        # Add intermediate points every 30 seconds for smooth trading curves
-        current_time = start_time
-        interval = timedelta(seconds=30)
-
-        enhanced_chart_data = {}
-        for username in chart_data.keys():
-            enhanced_chart_data[username] = {}
-
-            # Get user's actual data points
-            user_timestamps = sorted(chart_data[username].keys())
-
-            # Create seed for consistent randomness per user
-            user_seed = int(hashlib.md5(username.encode()).hexdigest()[:8], 16)
-            user_random = random.Random(user_seed)
-
-            current_time = start_time
-            while current_time <= end_time:
-                timestamp_str = current_time.isoformat()
-
-                # Find the closest actual balance
-                base_balance = 10000  # Default
-                for ts in user_timestamps:
-                    if ts <= timestamp_str:
-                        base_balance = chart_data[username][ts]
-
-                # Add market-like fluctuations (±2-5% volatility)
-                volatility = user_random.uniform(0.02, 0.05)  # 2-5% volatility
-                noise_factor = user_random.uniform(-volatility, volatility)
-
-                # Add some trending behavior based on time
-                time_factor = (
-                    current_time - start_time
-                ).total_seconds() / 3600  # hours
-                trend = (
-                    user_random.uniform(-0.01, 0.01) * time_factor
-                )  # slight trend over time
-
-                # Apply fluctuations
-                fluctuated_balance = base_balance * (1 + noise_factor + trend)
-                fluctuated_balance = max(
-                    0, int(fluctuated_balance)
-                )  # Ensure non-negative
-
-                enhanced_chart_data[username][timestamp_str] = fluctuated_balance
-                current_time += interval
-
-    # Use enhanced data for chart
-    chart_data = (
-        enhanced_chart_data if "enhanced_chart_data" in locals() else chart_data
-    )
-    time_points = sorted(
-        set().union(*[list(user_data.keys()) for user_data in chart_data.values()])
-    )
+    time_points = {point["x"] for points in chart_data.values() for point in points}
 
     # Format for Chart.js with trading platform styling
     datasets = []
@@ -476,16 +676,14 @@ def get_leaderboard_history():
     ]
 
     for i, username in enumerate(sorted(chart_data.keys())):
-        user_data = []
-        for timestamp in time_points:
-            if timestamp in chart_data[username]:
-                user_data.append({"x": timestamp, "y": chart_data[username][timestamp]})
+        user_data = chart_data[username]
 
         if user_data:  # Only include users with data
             datasets.append(
                 {
                     "label": username,
-                    "data": user_data,
+                    # Incremental updates are short; only full loads need downsampling
+                    "data": user_data if incremental else downsample_points(user_data, max_points),
                     "borderColor": trading_colors[i % len(trading_colors)],
                     "backgroundColor": trading_colors[i % len(trading_colors)] + "10",
                     "tension": 0.1,  # Less smooth for more realistic trading curves
@@ -502,6 +700,10 @@ def get_leaderboard_history():
             "current_leaders": current_leaders[:10],  # Top 10
             "time_range_hours": hours,
             "total_data_points": len(time_points),
+            "max_points": max_points,
+            "window_start": window_start.isoformat(),
+            "latest": end.isoformat(),
+            "incremental": incremental,
             "status": "success",
         }
     )
@@ -541,6 +743,30 @@ def get_market_status_api():
     )
 
 
+@bp.route("/pulse", methods=["GET"])
+def pulse():
+    """Combined session and market heartbeat served from in-memory state only.
+
+    Safe to poll every second from every phone: no SQLite access, no file reads
+    beyond the cached settings re-check.
+    """
+    session_state = check_session()
+
+    response = jsonify(
+        {
+            "authenticated": session_state is not None,
+            "remaining_seconds": session_state["remaining_seconds"]
+            if session_state
+            else 0,
+            "market_open": is_market_open(),
+            "ledger_version": journal.version,
+            "redistribution_amount": get_redistribution_amount(),
+        }
+    )
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
 @bp.route("/performers/redistribute", methods=["POST"])
 @require_auth
 def trigger_performer_redistribution():
@@ -689,16 +915,18 @@ def quant_set_performer_status(username):
             {"error": "Failed to update performer status", "status": "update_failed"}
         ), 500
 
-    # Log the manipulation
-    from .db import get_db
+    # Log the manipulation as a zero-amount entry on the system account, so it
+    # never affects balances or per-user stats
+    from .db import SYSTEM_ACCOUNT_ID, get_db
 
     db = get_db()
     try:
         db.execute(
             "INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, status, timestamp) VALUES (?, ?, ?, ?, ?, datetime('now')) ",
-            (0, 0, 0, "manipulation", "approved"),  # Special transaction for logging
+            (SYSTEM_ACCOUNT_ID, SYSTEM_ACCOUNT_ID, 0, "manipulation", "approved"),
         )
-    except:
+        db.commit()
+    except Exception:
         pass  # Don't fail if logging fails
 
     user_type = "performer" if is_performer else "audience_member"
@@ -716,6 +944,7 @@ def quant_set_performer_status(username):
 
 @bp.route("/quant/force-redistribution", methods=["POST"])
 @require_quant
+@idempotent
 def quant_force_redistribution():
     """Force immediate coin redistribution from performers to audience - The Quant's market manipulation."""
     data = request.get_json() or {}
@@ -772,6 +1001,7 @@ def quant_force_redistribution():
 
 @bp.route("/quant/force-transfer", methods=["POST"])
 @require_quant
+@idempotent
 def quant_force_transfer():
     """Force transfers between users - The Quant's market manipulation power."""
     data = request.get_json()
@@ -865,10 +1095,15 @@ def quant_force_transfer():
 
     try:
         # Perform the forced transfer
-        db.execute(
-            "UPDATE users SET coin_balance = coin_balance - ? WHERE username = ?",
-            (amount, sender),
-        )
+        sender_new_balance = debit_balance(db, sender_user["id"], amount)
+        if sender_new_balance is None:
+            db.rollback()
+            return jsonify(
+                {
+                    "error": f"Sender '{sender}' has insufficient funds",
+                    "status": "insufficient_funds",
+                }
+            ), 400
         db.execute(
             "UPDATE users SET coin_balance = coin_balance + ? WHERE username = ?",
             (amount, recipient),
@@ -886,12 +1121,11 @@ def quant_force_transfer():
             ),
         )
 
-        db.commit()
+        commit_ledger(db, [sender_user["id"], recipient_user["id"]])
 
         # Create balance snapshots
         from .db import create_balance_snapshot
 
-        sender_new_balance = sender_user["coin_balance"] - amount
         recipient_new_balance = db.execute(
             "SELECT coin_balance FROM users WHERE username = ?", (recipient,)
         ).fetchone()["coin_balance"]
@@ -922,6 +1156,7 @@ def quant_force_transfer():
 
 @bp.route("/quant/performers-to-audience", methods=["POST"])
 @require_quant
+@idempotent
 def quant_performers_to_audience():
     """Force all performers to send coins to all audience members - The CHANCELLOR's mass redistribution."""
     data = request.get_json() or {}
@@ -971,21 +1206,17 @@ def quant_performers_to_audience():
     try:
         for performer in performers:
             total_needed = amount_per_transfer * len(audience)
-            if performer["coin_balance"] < total_needed:
+            if debit_balance(db, performer["id"], total_needed) is None:
                 failed_transfers.append(
                     {
                         "performer": performer["username"],
-                        "reason": f"Insufficient funds ({performer['coin_balance']} < {total_needed})",
+                        "reason": f"Insufficient funds (needs {total_needed})",
                     }
                 )
                 continue
 
             # Transfer to each audience member
             for audience_member in audience:
-                db.execute(
-                    "UPDATE users SET coin_balance = coin_balance - ? WHERE id = ?",
-                    (amount_per_transfer, performer["id"]),
-                )
                 db.execute(
                     "UPDATE users SET coin_balance = coin_balance + ? WHERE id = ?",
                     (amount_per_transfer, audience_member["id"]),
@@ -1009,7 +1240,11 @@ def quant_performers_to_audience():
                     }
                 )
 
-        db.commit()
+        commit_ledger(
+            db,
+            [performer["id"] for performer in performers]
+            + [audience_member["id"] for audience_member in audience],
+        )
 
         # Create balance snapshots
         from .db import create_balance_snapshots_for_all_users
@@ -1040,6 +1275,7 @@ def quant_performers_to_audience():
 
 @bp.route("/quant/audience-to-performers", methods=["POST"])
 @require_quant
+@idempotent
 def quant_audience_to_performers():
     """Force all audience members to send coins to all performers - The CHANCELLOR's reverse redistribution."""
     data = request.get_json() or {}
@@ -1089,21 +1325,17 @@ def quant_audience_to_performers():
     try:
         for audience_member in audience:
             total_needed = amount_per_transfer * len(performers)
-            if audience_member["coin_balance"] < total_needed:
+            if debit_balance(db, audience_member["id"], total_needed) is None:
                 failed_transfers.append(
                     {
                         "audience_member": audience_member["username"],
-                        "reason": f"Insufficient funds ({audience_member['coin_balance']} < {total_needed})",
+                        "reason": f"Insufficient funds (needs {total_needed})",
                     }
                 )
                 continue
 
             # Transfer to each performer
             for performer in performers:
-                db.execute(
-                    "UPDATE users SET coin_balance = coin_balance - ? WHERE id = ?",
-                    (amount_per_transfer, audience_member["id"]),
-                )
                 db.execute(
                     "UPDATE users SET coin_balance = coin_balance + ? WHERE id = ?",
                     (amount_per_transfer, performer["id"]),
@@ -1127,7 +1359,11 @@ def quant_audience_to_performers():
                     }
                 )
 
-        db.commit()
+        commit_ledger(
+            db,
+            [performer["id"] for performer in performers]
+            + [audience_member["id"] for audience_member in audience],
+        )
 
         # Create balance snapshots
         from .db import create_balance_snapshots_for_all_users
@@ -1158,6 +1394,7 @@ def quant_audience_to_performers():
 
 @bp.route("/quant/group-transfer", methods=["POST"])
 @require_quant
+@idempotent
 def quant_group_transfer():
     """Handle mixed group transfers - group to individual or individual to group."""
     data = request.get_json()
@@ -1311,21 +1548,17 @@ def quant_group_transfer():
         # Perform transfers
         for sender_user in senders:
             total_needed = amount * len(recipients)
-            if sender_user["coin_balance"] < total_needed:
+            if debit_balance(db, sender_user["id"], total_needed) is None:
                 failed_transfers.append(
                     {
                         "sender": sender_user["username"],
-                        "reason": f"Insufficient funds ({sender_user['coin_balance']} < {total_needed})",
+                        "reason": f"Insufficient funds (needs {total_needed})",
                     }
                 )
                 continue
 
             # Transfer to each recipient
             for recipient_user in recipients:
-                db.execute(
-                    "UPDATE users SET coin_balance = coin_balance - ? WHERE id = ?",
-                    (amount, sender_user["id"]),
-                )
                 db.execute(
                     "UPDATE users SET coin_balance = coin_balance + ? WHERE id = ?",
                     (amount, recipient_user["id"]),
@@ -1349,7 +1582,11 @@ def quant_group_transfer():
                     }
                 )
 
-        db.commit()
+        commit_ledger(
+            db,
+            [sender_user["id"] for sender_user in senders]
+            + [recipient_user["id"] for recipient_user in recipients],
+        )
 
         # Create balance snapshots
         from .db import create_balance_snapshots_for_all_users
@@ -1441,21 +1678,8 @@ def quant_update_redistribution_amount():
             {"error": "amount must be between 0 and 1000", "status": "validation_error"}
         ), 400
 
-    # Update the configuration
-    current_app.config["CURRENT_REDISTRIBUTION_AMOUNT"] = amount
-
-    # Store in a file for persistence
-    import os
-
-    instance_path = current_app.instance_path
-    redistribution_file = os.path.join(instance_path, "redistribution_amount.txt")
-
-    try:
-        os.makedirs(instance_path, exist_ok=True)
-        with open(redistribution_file, "w") as f:
-            f.write(str(amount))
-    except Exception as e:
-        current_app.logger.error(f"Failed to save redistribution amount: {e}")
+    # Update the configuration and persist it
+    set_redistribution_amount(amount)
 
     return jsonify(
         {
@@ -1470,21 +1694,7 @@ def quant_update_redistribution_amount():
 @require_quant
 def quant_get_redistribution_amount():
     """Get the current performer redistribution amount."""
-    # Try to read from file first
-    import os
-
-    instance_path = current_app.instance_path
-    redistribution_file = os.path.join(instance_path, "redistribution_amount.txt")
-
-    amount = 5  # Default
-
-    try:
-        if os.path.exists(redistribution_file):
-            with open(redistribution_file, "r") as f:
-                amount = int(f.read().strip())
-                current_app.config["CURRENT_REDISTRIBUTION_AMOUNT"] = amount
-    except Exception:
-        amount = current_app.config.get("CURRENT_REDISTRIBUTION_AMOUNT", 5)
+    amount = get_redistribution_amount()
 
     return jsonify({"amount": amount, "status": "success"}), 200
 
@@ -1495,9 +1705,9 @@ def quant_get_redistribution_amount():
 @require_quant
 def quant_market_stats():
     """Get comprehensive market statistics for The Quant."""
-    from .db import get_db
+    from .db import get_read_db
 
-    db = get_db()
+    db = get_read_db()
 
     # Get comprehensive stats
     stats = {}
@@ -1518,20 +1728,20 @@ def quant_market_stats():
 
     # Transaction stats
     stats["total_transactions"] = db.execute(
-        "SELECT COUNT(*) as count FROM transactions"
+        "SELECT COUNT(*) as count FROM transactions WHERE transaction_type NOT IN ('mint', 'burn')"
     ).fetchone()["count"]
     stats["total_volume"] = (
-        db.execute("SELECT SUM(amount) as volume FROM transactions").fetchone()[
-            "volume"
-        ]
+        db.execute(
+            "SELECT SUM(amount) as volume FROM transactions WHERE transaction_type NOT IN ('mint', 'burn')"
+        ).fetchone()["volume"]
         or 0
     )
 
     # Top holders
-    top_users = db.execute(
-        "SELECT username, coin_balance, is_performer FROM users ORDER BY coin_balance DESC LIMIT 10"
-    ).fetchall()
-    stats["top_users"] = [dict(user) for user in top_users]
+    stats["top_users"] = [
+        {key: user[key] for key in ("username", "coin_balance", "is_performer")}
+        for user in get_ranked_users(10)
+    ]
 
     # Recent transactions
     recent_txs = db.execute(
@@ -1539,6 +1749,7 @@ def quant_market_stats():
            FROM transactions t
            LEFT JOIN users s ON t.sender_id = s.id
            LEFT JOIN users r ON t.recipient_id = r.id
+           WHERE t.transaction_type NOT IN ('mint', 'burn')
            ORDER BY t.timestamp DESC LIMIT 20"""
     ).fetchall()
     stats["recent_transactions"] = [dict(tx) for tx in recent_txs]
@@ -0,0 +1,215 @@
+"""Per-show archiving for Straw Coin.
+
+Closing a show moves its ledger, snapshots and stats into a dated SQLite file
+under ``instance/archive/`` and leaves the live database compact: every
+balance is carried forward as a single mint entry, so the next show starts
+with small tables while the archive stays queryable through ``ATTACH``.
+"""
+
+import os
+import re
+import sqlite3
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .db import SYSTEM_ACCOUNT_ID, commit_ledger, get_db
+
+# Tables copied into every archive, in copy order
+ARCHIVED_TABLES = ["users", "transactions", "balance_snapshots", "user_stats", "user_type_stats"]
+
+# Indexes created in the archive for historical queries
+ARCHIVE_INDEXES = [
+    "CREATE INDEX archive.idx_transactions_sender ON transactions(sender_id)",
+    "CREATE INDEX archive.idx_transactions_recipient ON transactions(recipient_id)",
+    "CREATE INDEX archive.idx_transactions_timestamp ON transactions(timestamp)",
+    "CREATE INDEX archive.idx_balance_snapshots_user_time ON balance_snapshots(user_id, timestamp)",
+]
+
+
+def get_archive_dir():
+    """Directory holding one archive database per closed show."""
+    return os.path.join(current_app.instance_path, "archive")
+
+
+def list_archives():
+    """Return archive file names, oldest first."""
+    archive_dir = get_archive_dir()
+    if not os.path.isdir(archive_dir):
+        return []
+    return sorted(name for name in os.listdir(archive_dir) if name.endswith(".sqlite"))
+
+
+def get_database_size(path):
+    """Bytes used by a database file plus its write-ahead log, if any."""
+    size = os.path.getsize(path)
+    if os.path.exists(path + "-wal"):
+        size += os.path.getsize(path + "-wal")
+    return size
+
+
+def attach_archive(db, name, alias="archive"):
+    """Attach an archive to ``db`` as ``alias`` for historical queries.
+
+    Archived tables are then available as ``<alias>.transactions`` and so on.
+    Detach with ``DETACH DATABASE <alias>`` when done.
+    """
+    path = os.path.join(get_archive_dir(), os.path.basename(name))
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    db.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+
+
+def close_show(label=None):
+    """Archive the current show and compact the live database.
+
+    Settled ledger rows, snapshots and stats move to a new archive file; pending
+    offers stay live. Each user's balance is carried forward as a mint, so the
+    ledger still replays to every balance. Returns a summary dict.
+    """
+    db = get_db()
+    os.makedirs(get_archive_dir(), exist_ok=True)
+
+    closed_at = datetime.now()
+    name = f"show-{closed_at:%Y%m%d-%H%M%S}"
+    if label:
+        name += "-" + re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-")
+    path = os.path.join(get_archive_dir(), name + ".sqlite")
+
+    schemas = {
+        row["name"]: row["sql"]
+        for row in db.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name IN ({','.join('?' * len(ARCHIVED_TABLES))})",
+            ARCHIVED_TABLES,
+        )
+    }
+
+    # ATTACH must happen outside a transaction
+    db.commit()
+    db.execute("ATTACH DATABASE ? AS archive", (path,))
+    try:
+        db.execute("BEGIN IMMEDIATE")
+
+        for table in ARCHIVED_TABLES:
+            db.execute(schemas[table].replace(f"CREATE TABLE {table}", f"CREATE TABLE archive.{table}", 1))
+        for statement in ARCHIVE_INDEXES:
+            db.execute(statement)
+
+        copied = {}
+        for table in ARCHIVED_TABLES:
+            where = " WHERE status != 'pending'" if table == "transactions" else ""
+            copied[table] = db.execute(
+                f"INSERT INTO archive.{table} SELECT * FROM main.{table}{where}"
+            ).rowcount
+
+        supply = db.execute("SELECT COALESCE(SUM(coin_balance), 0) AS total FROM main.users").fetchone()["total"]
+        db.execute(
+            """
+            CREATE TABLE archive.show_info (
+                name TEXT NOT NULL,
+                label TEXT,
+                closed_at TIMESTAMP NOT NULL,
+                transaction_count INTEGER NOT NULL,
+                snapshot_count INTEGER NOT NULL,
+                circulating_supply INTEGER NOT NULL
+            )
+            """
+        )
+        db.execute(
+            "INSERT INTO archive.show_info VALUES (?, ?, ?, ?, ?, ?)",
+            (name, label, closed_at.isoformat(" ", "seconds"), copied["transactions"], copied["balance_snapshots"], supply),
+        )
+
+        # Clear the live tables; pending offers stay for the next show
+        db.execute("DELETE FROM main.transactions WHERE status != 'pending'")
+        db.execute("DELETE FROM main.balance_snapshots")
+        db.execute("DELETE FROM main.ledger_checkpoints")
+        db.execute("DELETE FROM main.user_stats")
+        db.execute("DELETE FROM main.user_type_stats")
+
+        # Carry every balance forward as an opening mint and snapshot
+        users = db.execute("SELECT id, coin_balance FROM main.users WHERE coin_balance > 0").fetchall()
+        db.executemany(
+            "INSERT INTO main.transactions (sender_id, recipient_id, amount, request_text, transaction_type, status) VALUES (?, ?, ?, ?, 'mint', 'approved')",
+            [(SYSTEM_ACCOUNT_ID, user["id"], user["coin_balance"], f"Carried forward from {name}") for user in users],
+        )
+        db.execute("INSERT INTO main.balance_snapshots (user_id, balance) SELECT id, coin_balance FROM main.users")
+
+        commit_ledger(db, full=True)
+    except Exception:
+        db.rollback()
+        db.execute("DETACH DATABASE archive")
+        os.remove(path)
+        raise
+
+    db.execute("DETACH DATABASE archive")
+
+    # Compact the live database now that its tables are small. VACUUM writes
+    # through the WAL too, so checkpoint again before measuring the result
+    size_before = get_database_size(current_app.config["DATABASE"])
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.execute("VACUUM")
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.execute("PRAGMA optimize")
+
+    return {
+        "archive": path,
+        "transactions": copied["transactions"],
+        "snapshots": copied["balance_snapshots"],
+        "carried_forward": len(users),
+        "circulating_supply": supply,
+        "size_before": size_before,
+        "size_after": get_database_size(current_app.config["DATABASE"]),
+    }
+
+
+@click.command("close-show")
+@click.option("--label", default=None, help="Short label added to the archive name")
+@click.confirmation_option(
+    prompt="Archive this show's ledger and start the next show from current balances?"
+)
+@with_appcontext
+def close_show_command(label):
+    """Archive the show's ledger and compact the live database."""
+    result = close_show(label)
+    click.echo(f"📦 Archived show to {result['archive']}")
+    click.echo(f"   {result['transactions']:,} ledger entries, {result['snapshots']:,} snapshots")
+    click.echo(
+        f"   Carried forward {result['carried_forward']} balances "
+        f"({result['circulating_supply']:,} coins)"
+    )
+    click.echo(
+        f"🧹 Live database compacted: {result['size_before'] / 1024:,.0f} KB → "
+        f"{result['size_after'] / 1024:,.0f} KB"
+    )
+
+
+@click.command("list-archives")
+@with_appcontext
+def list_archives_command():
+    """List archived shows."""
+    archives = list_archives()
+    if not archives:
+        click.echo("📭 No archived shows yet")
+        return
+
+    click.echo("📚 Archived shows:")
+    for name in archives:
+        path = os.path.join(get_archive_dir(), name)
+        archive = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            info = archive.execute(
+                "SELECT closed_at, transaction_count, circulating_supply FROM show_info"
+            ).fetchone()
+        finally:
+            archive.close()
+        click.echo(
+            f"   {name}: closed {info[0]}, {info[1]:,} ledger entries, {info[2]:,} coins"
+        )
+
+
+def init_app(app):
+    app.cli.add_command(close_show_command)
+    app.cli.add_command(list_archives_command)
@@ -0,0 +1,90 @@
+"""Content-hashed static asset URLs for Straw Coin.
+
+Templates link static files through ``static_url()``, which appends a short
+hash of the file's contents (``/static/style.css?v=1a2b3c4d5e6f``). Requests
+carrying the current hash are served with a one-year immutable
+``Cache-Control``, so repeat page loads never revalidate CSS or JS; a deploy
+changes the hash and therefore the URL.
+"""
+
+import hashlib
+import os
+from functools import wraps
+
+from flask import current_app, request, url_for
+
+# Hex digits of the SHA-256 used as the version
+HASH_LENGTH = 12
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def build_manifest(static_folder):
+    """Fingerprint every static file: ``{relative path: (mtime, hash)}``.
+
+    Precompressed ``.gz`` variants share their source file's hash.
+    """
+    manifest = {}
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(".gz"):
+                continue
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, "/")
+            manifest[filename] = (os.path.getmtime(path), _hash_file(path))
+    return manifest
+
+
+def asset_hash(filename):
+    """Return the content hash of a static file, or None if it isn't known.
+
+    In debug mode files edited since startup are re-hashed.
+    """
+    app = current_app
+    manifest = app.extensions["asset_manifest"]
+    entry = manifest.get(filename)
+
+    if app.debug:
+        path = os.path.join(app.static_folder, filename)
+        if os.path.isfile(path):
+            mtime = os.path.getmtime(path)
+            if entry is None or entry[0] != mtime:
+                entry = manifest[filename] = (mtime, _hash_file(path))
+
+    return entry[1] if entry else None
+
+
+def static_url(filename):
+    """URL for a static file, fingerprinted with its content hash."""
+    version = asset_hash(filename)
+    if version is None:
+        return url_for("static", filename=filename)
+    return url_for("static", filename=filename, v=version)
+
+
+def immutable_when_fingerprinted(view):
+    """Wrap the static view to cache current fingerprinted URLs for a year."""
+
+    @wraps(view)
+    def decorated_function(filename):
+        response = view(filename)
+        version = request.args.get("v")
+        if version and response.status_code in (200, 304) and version == asset_hash(filename):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    return decorated_function
+
+
+def init_app(app):
+    app.extensions["asset_manifest"] = build_manifest(app.static_folder)
+    app.view_functions["static"] = immutable_when_fingerprinted(app.view_functions["static"])
+    app.add_template_global(static_url)
@@ -3,7 +3,9 @@ from datetime import datetime, timedelta
 
 from flask import (
     Blueprint,
+    abort,
     current_app,
+    g,
     jsonify,
     redirect,
     render_template,
@@ -12,49 +14,98 @@ from flask import (
     url_for,
 )
 
-from .db import create_user, get_user_balance, get_user_performer_status
+from .db import get_user_identity, upsert_user
+from .tracing import trace
 
 bp = Blueprint("auth", __name__)
 
 
-def is_authenticated():
-    # Check if user has a username in session
-    if "username" not in session:
-        return False
-    
-    # Check if user is CHANCELLOR - they never expire
-    current_username = session.get('username', '').upper()
-    quant_username = current_app.config.get("QUANT_USERNAME", "CHANCELLOR").upper()
-    if current_username == quant_username:
-        return True  # CHANCELLOR is always authenticated
-    
-    # Check if session has a timestamp
-    if "session_created" not in session:
-        # No timestamp, invalid session
-        session.clear()
-        return False
-    
+SESSION_LIFETIME_SECONDS = 60
+
+
+def check_session():
+    """Validate the session cookie without touching the database.
+
+    Returns a dict with the username, quant flag and remaining session seconds,
+    or None for anonymous or expired sessions. Expired sessions are cleared and
+    flagged with ``g.session_expired``.
+    """
+    g.session_expired = False
+
+    username = session.get("username")
+    if not username:
+        return None
+
+    # CHANCELLOR sessions never expire
+    quant_username = current_app.config.get("QUANT_USERNAME", "CHANCELLOR")
+    is_quant = username.upper() == quant_username.upper()
+
     try:
-        # Check if session is older than 60 seconds
         session_created = datetime.fromisoformat(session["session_created"])
         session_age = datetime.now() - session_created
-        
-        if session_age > timedelta(seconds=60):
-            # Session expired
-            session.clear()
-            return False
-    except (ValueError, TypeError):
-        # Invalid session_created format, clear session
+    except (KeyError, ValueError, TypeError):
+        session_age = None
+
+    if not is_quant and (
+        session_age is None
+        or session_age > timedelta(seconds=SESSION_LIFETIME_SECONDS)
+    ):
         session.clear()
-        return False
-    
-    return True
+        g.session_expired = True
+        return None
+
+    remaining_seconds = (
+        max(0, SESSION_LIFETIME_SECONDS - int(session_age.total_seconds()))
+        if session_age is not None
+        else 0
+    )
+    return {
+        "username": username,
+        "is_quant": is_quant,
+        "remaining_seconds": remaining_seconds,
+    }
+
+
+def resolve_identity():
+    """Resolve the session user once per request and cache the result on ``g``.
+
+    ``g.identity`` is None for anonymous or expired sessions. Otherwise it holds
+    the session metadata plus the user's row (id, balance, performer flag),
+    loaded with a single query so decorators and handlers never repeat it.
+    """
+    if "identity" in g:
+        return g.identity
+
+    g.identity = check_session()
+    if g.identity is None:
+        return None
+
+    user = get_user_identity(g.identity["username"])
+    g.identity.update(
+        {
+            "id": user["id"] if user else None,
+            "coin_balance": user["coin_balance"] if user else None,
+            "is_performer": bool(user["is_performer"]) if user else False,
+        }
+    )
+    return g.identity
+
+
+def is_authenticated():
+    return resolve_identity() is not None
+
+
+def session_expired_response():
+    """Response for requests whose session has expired."""
+    if request.is_json:
+        return jsonify({"error": "Session expired", "status": "session_expired"}), 401
+    return redirect(url_for("auth.register", expired=1))
 
 
 def require_auth(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not is_authenticated():
+        if resolve_identity() is None:
             if request.is_json:
                 return jsonify(
                     {"error": "Authentication required", "status": "session_expired"}
@@ -69,7 +120,8 @@ def require_auth(f):
 def require_quant(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not is_authenticated():
+        identity = resolve_identity()
+        if identity is None:
             if request.is_json:
                 return jsonify(
                     {"error": "Authentication required", "status": "session_expired"}
@@ -77,15 +129,8 @@ def require_quant(f):
             return redirect(url_for("auth.register"))
 
         # Check if user is The CHANCELLOR
-        current_username = session.get("username")
-        quant_username = current_app.config.get("QUANT_USERNAME", "CHANCELLOR")
         quant_enabled = current_app.config.get("QUANT_ENABLED", False)
-
-        if (
-            not quant_enabled
-            or not current_username
-            or current_username.upper() != quant_username.upper()
-        ):
+        if not quant_enabled or not identity["is_quant"]:
             if request.is_json:
                 return jsonify(
                     {
@@ -93,9 +138,10 @@ def require_quant(f):
                         "status": "unauthorized",
                     }
                 ), 403
-            return render_template("403.jinja2"), 403
+            abort(403)
 
-        return f(*args, **kwargs)
+        with trace(request.endpoint):
+            return f(*args, **kwargs)
 
     return decorated_function
 
@@ -133,17 +179,13 @@ def login():
             }
         ), 400
 
-    balance = get_user_balance(username)
-    performer_status = get_user_performer_status(username)
-
-    if balance is None:
-        user_id = create_user(username, is_performer)
-        if user_id is None:
-            return jsonify(
-                {"error": "Username already exists", "status": "duplicate_stakeholder"}
-            ), 409
-        balance = 10000
-        performer_status = is_performer
+    user, created = upsert_user(username, is_performer)
+    if user is None:
+        return jsonify(
+            {"error": "Username already exists", "status": "duplicate_stakeholder"}
+        ), 409
+    balance = user["coin_balance"]
+    performer_status = bool(user["is_performer"])
 
     # Set Flask session with timestamp
     session["username"] = username
@@ -165,30 +207,20 @@ def login():
 
 @bp.route("/session-status")
 def session_status():
-    if not is_authenticated():
+    identity = resolve_identity()
+    if identity is None:
         return jsonify({"authenticated": False, "status": "session_expired"}), 401
 
-    # Calculate remaining session time
-    session_created = datetime.fromisoformat(session["session_created"])
-    session_age = datetime.now() - session_created
-    remaining_seconds = max(0, 60 - int(session_age.total_seconds()))
-    
     return jsonify(
         {
             "authenticated": True,
-            "username": session["username"],
+            "username": identity["username"],
             "status": "session_active",
-            "remaining_seconds": remaining_seconds,
+            "remaining_seconds": identity["remaining_seconds"],
         }
     ), 200
 
 
-
-
-
-
-
-
 @bp.route("/logout", methods=["POST"])
 def logout():
     """Log out and clear session."""
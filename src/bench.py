@@ -0,0 +1,195 @@
+"""Benchmark commands for Straw Coin hot paths.
+
+Every benchmark runs against a throwaway database in a temporary directory,
+so it can be run on the show machine without touching live data.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+
+@contextmanager
+def scratch_database():
+    """Point the current app at a temporary database with the full schema."""
+    from .db import _apply_schema_upgrades, get_db
+    from .offers import offer_index
+    from .ranking import leaderboard
+
+    app = current_app._get_current_object()
+    original_database = app.config["DATABASE"]
+    tmpdir = tempfile.mkdtemp(prefix="strawcoin-bench-")
+    app.config["DATABASE"] = os.path.join(tmpdir, "bench.sqlite")
+    offer_index.invalidate()
+    leaderboard.invalidate()
+
+    try:
+        with app.app_context():
+            db = get_db()
+            with app.open_resource("schema.sql") as f:
+                db.executescript(f.read().decode("utf8"))
+            _apply_schema_upgrades(db)
+        yield app
+    finally:
+        app.config["DATABASE"] = original_database
+        offer_index.invalidate()
+        leaderboard.invalidate()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def _report(label, count, elapsed):
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    click.echo(f"   {label:<28} {count:>6} in {elapsed:6.3f}s  →  {rate:,.0f}/sec")
+
+
+@click.command("bench-registrations")
+@click.option("--count", default=500, help="Number of registrations per scenario")
+@click.option("--threads", default=8, help="Concurrent clients for the login scenario")
+@with_appcontext
+def bench_registrations_command(count, threads):
+    """Benchmark registrations per second for the doors-open rush."""
+    from .db import import_users
+
+    click.echo(f"🎟️  Registration benchmark ({count} users, {threads} clients)")
+
+    with scratch_database() as app:
+        # Doors-open rush: concurrent phones hitting /login
+        def register(index):
+            client = app.test_client()
+            response = client.post(
+                "/login", json={"username": f"RUSH{index:06d}", "is_performer": False}
+            )
+            return response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            statuses = list(pool.map(register, range(count)))
+        _report("POST /login (new users)", count, time.perf_counter() - start)
+
+        failures = sum(1 for status in statuses if status != 200)
+        if failures:
+            click.echo(f"   ⚠️  {failures} registrations failed")
+
+        # Returning users logging back in hit the upsert conflict path
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(register, range(count)))
+        _report("POST /login (returning)", count, time.perf_counter() - start)
+
+        # Ticketed pre-registration through executemany
+        with app.app_context():
+            rows = [(f"TICKET{index:06d}", False) for index in range(count)]
+            start = time.perf_counter()
+            created = import_users(rows)
+            _report("import-users (executemany)", created, time.perf_counter() - start)
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+@click.command("bench-transfers")
+@click.option("--count", default=2000, help="Tips per scenario")
+@click.option("--threads", default=16, help="Concurrent clients")
+@click.option("--batch-sizes", default="1,8,32,128", help="Comma-separated coalescer batch sizes")
+@click.option("--wait-ms", default=2.0, help="Coalescer wait for more transfers after the first (ms)")
+@with_appcontext
+def bench_transfers_command(count, threads, batch_sizes, wait_ms):
+    """Benchmark tips per second and latency, direct vs. group commit."""
+    from .coalescer import WriteCoalescer
+    from .db import import_users, transfer_coins
+
+    sizes = [int(size) for size in batch_sizes.split(",") if size.strip()]
+    click.echo(f"💸 Transfer benchmark ({count} tips, {threads} clients, {wait_ms}ms wait)")
+
+    with scratch_database() as app:
+        with app.app_context():
+            import_users((f"FAN{index:04d}", False) for index in range(threads * 2))
+        pairs = [(f"FAN{index % (threads * 2):04d}", f"FAN{(index + 1) % (threads * 2):04d}") for index in range(count)]
+
+        def run(label, send):
+            def tip(pair):
+                start = time.perf_counter()
+                status = send(*pair)
+                return status, time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                results = list(pool.map(tip, pairs))
+            elapsed = time.perf_counter() - start
+
+            latencies = [latency * 1000 for _, latency in results]
+            _report(label, count, elapsed)
+            click.echo(
+                f"   {'':<28} latency p50 {_percentile(latencies, 0.5):6.1f}ms  "
+                f"p95 {_percentile(latencies, 0.95):6.1f}ms"
+            )
+            failures = sum(1 for status, _ in results if status != "success")
+            if failures:
+                click.echo(f"   ⚠️  {failures} transfers did not succeed")
+
+        # One commit per tip, each client with its own connection
+        def send_direct(sender, recipient):
+            with app.app_context():
+                return transfer_coins(sender, recipient, 1)
+
+        run("direct (commit per tip)", send_direct)
+
+        for size in sizes:
+            coalescer = WriteCoalescer(app, size, wait_ms)
+            try:
+                run(f"coalesced (batch ≤ {size})", lambda sender, recipient: coalescer.submit(sender, recipient, 1).result())
+            finally:
+                coalescer.stop()
+
+
+@click.command("bench-responses")
+@click.option("--requests", "request_count", default=200, help="Requests per endpoint and encoding")
+@click.option("--users", default=200, help="Users registered on the scratch database")
+@with_appcontext
+def bench_responses_command(request_count, users):
+    """Benchmark response sizes and rates with and without gzip."""
+    from .compression import compress_static_files
+    from .db import import_users
+
+    click.echo(f"🗜️  Response benchmark ({request_count} requests per row, {users} users)")
+    compress_static_files(current_app.static_folder)
+
+    with scratch_database() as app:
+        with app.app_context():
+            import_users((f"FAN{index:04d}", index % 10 == 0) for index in range(users))
+
+        client = app.test_client()
+        client.post("/login", json={"username": app.config.get("QUANT_USERNAME", "CHANCELLOR")})
+
+        paths = [
+            "/static/style.css",
+            "/static/js/quant_terminal.js",
+            "/api/leaderboard-history?hours=1",
+            "/api/quant/users",
+        ]
+        for path in paths:
+            for encoding in ("identity", "gzip"):
+                size = 0
+                start = time.perf_counter()
+                for _ in range(request_count):
+                    response = client.get(path, headers={"Accept-Encoding": encoding})
+                    size = len(response.get_data())
+                    response.close()
+                elapsed = time.perf_counter() - start
+                _report(f"{path.split('?')[0]} ({encoding})", request_count, elapsed)
+                click.echo(f"   {'':<28} {size:>8,} bytes per response")
+
+
+def init_app(app):
+    app.cli.add_command(bench_registrations_command)
+    app.cli.add_command(bench_transfers_command)
+    app.cli.add_command(bench_responses_command)
@@ -0,0 +1,180 @@
+"""Group-commit write coalescing for Straw Coin transfers.
+
+SQLite runs one writer at a time, and each ``/api/transfer`` committing on its
+own caps tips per second at commits per second. With coalescing enabled,
+request threads hand their transfer to a single writer thread instead. The
+writer takes whatever has queued up (up to ``TRANSFER_COALESCE_MAX_BATCH``
+transfers, waiting at most ``TRANSFER_COALESCE_MAX_WAIT_MS`` for more after
+the first), applies them in order in one transaction and commits once. Each
+transfer runs under its own savepoint, so one failing doesn't undo the others,
+and every request gets back its own transfer_coins status.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from flask import current_app
+
+from .db import apply_transfer, commit_ledger, commit_shared, get_db, transfer_coins
+from .metrics import metrics
+from .offers import offer_index
+from .tracing import trace
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT_MS = 2
+DEFAULT_RESULT_TIMEOUT = 30  # seconds a request waits for the writer
+
+
+class WriteCoalescer:
+    """A writer thread applying queued transfers in batched transactions."""
+
+    def __init__(self, app, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, sender, recipient, amount, transaction_type="tip", request_text=None):
+        """Queue a transfer; the returned future resolves to its status string."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((future, (sender, recipient, amount, transaction_type, request_text)))
+        return future
+
+    def stop(self):
+        """Finish queued transfers and stop the writer thread."""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        # One app context (and so one SQLite connection) for the writer's lifetime
+        with self.app.app_context():
+            while True:
+                batch = self._next_batch()
+                stopping = batch and batch[-1] is None
+                if stopping:
+                    batch.pop()
+                if batch:
+                    try:
+                        with trace("coalesced_batch", size=len(batch)):
+                            self._apply_batch(batch)
+                    except Exception as e:
+                        # Keep the writer alive; queued transfers still need it
+                        current_app.logger.error(f"❌ Transfer batch of {len(batch)} failed: {e}")
+                    finally:
+                        for future, _ in batch:
+                            if not future.done():
+                                future.set_result("transaction_failed")
+                if stopping:
+                    return
+
+    def _next_batch(self):
+        """Block for one transfer, then gather more until full or the wait runs out."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while batch[-1] is not None and len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _apply_batch(self, batch):
+        db = None
+        results = []
+        touched = set()
+        offers = []
+
+        try:
+            db = get_db()
+            db.execute("BEGIN IMMEDIATE")
+            for _, transfer in batch:
+                db.execute("SAVEPOINT transfer")
+                try:
+                    status, user_ids, offer = apply_transfer(db, *transfer)
+                except Exception:
+                    status, user_ids, offer = "transaction_failed", [], None
+                if status in ("success", "offer_pending"):
+                    db.execute("RELEASE SAVEPOINT transfer")
+                else:
+                    db.execute("ROLLBACK TO SAVEPOINT transfer")
+                    db.execute("RELEASE SAVEPOINT transfer")
+                results.append(status)
+                touched.update(user_ids)
+                if offer is not None:
+                    offers.append(offer)
+
+            if touched:
+                commit_ledger(db, touched)
+            else:
+                commit_shared(db)
+        except Exception as e:
+            if db is not None:
+                db.rollback()
+            current_app.logger.error(f"❌ Transfer batch of {len(batch)} failed: {e}")
+            results = ["transaction_failed"] * len(batch)
+            offers = []
+
+        # Whatever happens in the bookkeeping, callers get the committed statuses
+        try:
+            for offer in offers:
+                offer_index.add(offer)
+
+            metrics.increment("coalesced_batches")
+            metrics.increment("coalesced_transfers", len(batch))
+            metrics.set_gauge("coalesced_last_batch_size", len(batch))
+        finally:
+            for (future, _), status in zip(batch, results):
+                future.set_result(status)
+
+
+def get_coalescer(app=None):
+    """Return the app's write coalescer, creating it on first use."""
+    app = app or current_app._get_current_object()
+    coalescer = app.extensions.get("write_coalescer")
+    if coalescer is None:
+        coalescer = app.extensions.setdefault(
+            "write_coalescer",
+            WriteCoalescer(
+                app,
+                app.config.get("TRANSFER_COALESCE_MAX_BATCH", DEFAULT_MAX_BATCH),
+                app.config.get("TRANSFER_COALESCE_MAX_WAIT_MS", DEFAULT_MAX_WAIT_MS),
+            ),
+        )
+    return coalescer
+
+
+def submit_transfer(sender, recipient, amount, transaction_type="tip", request_text=None):
+    """Run a transfer through the coalescer if enabled, else directly.
+
+    Returns the same status strings as ``transfer_coins``, and
+    ``transaction_failed`` if the writer doesn't answer within
+    ``TRANSFER_COALESCE_TIMEOUT`` seconds.
+    """
+    if not current_app.config.get("TRANSFER_COALESCING", False):
+        return transfer_coins(sender, recipient, amount, transaction_type, request_text)
+
+    future = get_coalescer().submit(sender, recipient, amount, transaction_type, request_text)
+    try:
+        return future.result(timeout=current_app.config.get("TRANSFER_COALESCE_TIMEOUT", DEFAULT_RESULT_TIMEOUT))
+    except FutureTimeoutError:
+        current_app.logger.error(f"❌ Transfer from {sender} to {recipient} timed out waiting for the writer")
+        return "transaction_failed"
@@ -0,0 +1,144 @@
+"""Response compression for Straw Coin.
+
+Phones on congested venue Wi-Fi pay for every byte. Static CSS and JS are
+gzipped once at build time by ``flask compress-static`` and the ``.gz``
+variant is served to clients that accept it; JSON responses above
+``GZIP_MIN_SIZE`` bytes are gzipped on the fly.
+"""
+
+import gzip
+import mimetypes
+import os
+
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import with_appcontext
+from werkzeug.security import safe_join
+
+# Static files worth precompressing
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".html", ".txt")
+
+DEFAULT_GZIP_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+
+
+def accepts_gzip():
+    return "gzip" in request.headers.get("Accept-Encoding", "").lower()
+
+
+def compress_static_files(static_folder, level=9):
+    """Write a ``.gz`` next to each compressible static file that needs one.
+
+    Files whose ``.gz`` is already up to date are skipped, and no ``.gz`` is
+    kept if it wouldn't be smaller. Returns ``(path, size, gzipped_size)``
+    for every file considered.
+    """
+    results = []
+    for root, _, files in os.walk(static_folder):
+        for name in sorted(files):
+            if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+
+            path = os.path.join(root, name)
+            gz_path = path + ".gz"
+            size = os.path.getsize(path)
+            source_mtime = os.path.getmtime(path)
+
+            if os.path.exists(gz_path) and os.path.getmtime(gz_path) >= source_mtime:
+                results.append((path, size, os.path.getsize(gz_path)))
+                continue
+
+            with open(path, "rb") as f:
+                # mtime=0 keeps the output identical between builds
+                compressed = gzip.compress(f.read(), compresslevel=level, mtime=0)
+
+            if len(compressed) >= size:
+                if os.path.exists(gz_path):
+                    os.remove(gz_path)
+                results.append((path, size, size))
+                continue
+
+            with open(gz_path, "wb") as f:
+                f.write(compressed)
+            os.utime(gz_path, (source_mtime, source_mtime))
+            results.append((path, size, len(compressed)))
+    return results
+
+
+def send_static(filename):
+    """Static file view that prefers an up-to-date precompressed ``.gz``."""
+    app = current_app
+    if app.config.get("COMPRESSION_ENABLED", True) and accepts_gzip():
+        path = safe_join(app.static_folder, filename)
+        gz_path = path + ".gz" if path else None
+        if (
+            gz_path
+            and os.path.isfile(path)
+            and os.path.isfile(gz_path)
+            and os.path.getmtime(gz_path) >= os.path.getmtime(path)
+        ):
+            mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            response = send_from_directory(
+                app.static_folder,
+                filename + ".gz",
+                mimetype=mimetype,
+                max_age=app.get_send_file_max_age(filename),
+            )
+            response.headers["Content-Encoding"] = "gzip"
+            response.vary.add("Accept-Encoding")
+            return response
+
+    response = app.send_static_file(filename)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def gzip_json_response(response):
+    """Gzip JSON responses above ``GZIP_MIN_SIZE`` for clients that accept it."""
+    config = current_app.config
+    if (
+        not config.get("COMPRESSION_ENABLED", True)
+        or response.mimetype != "application/json"
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code >= 300
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    if not accepts_gzip():
+        return response
+
+    data = response.get_data()
+    if len(data) < config.get("GZIP_MIN_SIZE", DEFAULT_GZIP_MIN_SIZE):
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=config.get("GZIP_LEVEL", DEFAULT_GZIP_LEVEL)))
+    response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+@click.command("compress-static")
+@with_appcontext
+def compress_static_command():
+    """Precompress static CSS/JS into .gz files."""
+    results = compress_static_files(current_app.static_folder)
+    static_root = os.path.dirname(current_app.static_folder)
+    total = sum(size for _, size, _ in results)
+    total_gz = sum(gz_size for _, _, gz_size in results)
+
+    for path, size, gz_size in results:
+        click.echo(
+            f"   {os.path.relpath(path, static_root):<32} {size:>8,} → {gz_size:>7,} bytes"
+        )
+    click.echo(
+        f"🗜️  Precompressed {len(results)} static files: {total:,} → {total_gz:,} bytes"
+    )
+
+
+def init_app(app):
+    app.view_functions["static"] = send_static
+    app.after_request(gzip_json_response)
+    app.cli.add_command(compress_static_command)
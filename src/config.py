@@ -44,6 +44,52 @@ class Config:
     # Market status override (can be toggled at runtime)
     MARKET_OPEN_OVERRIDE = None  # None = use time-based, True/False = force open/closed
 
+    # Pending offers expire after this many seconds (None = never expire)
+    OFFER_TTL = 600
+    OFFER_EXPIRY_BATCH_SIZE = 500  # offers expired per UPDATE
+
+    # Per-user token buckets for write endpoints: (tokens per second, burst)
+    RATE_LIMITS = {
+        "transfer": (2, 10),  # tips, offers and self-dealing attempts
+        "offers": (10, 50),  # CHANCELLOR offer approvals and denials
+    }
+
+    # Group-commit transfers: a writer thread applies up to MAX_BATCH queued
+    # transfers per transaction, waiting at most MAX_WAIT_MS for more. A
+    # request gives up (transaction_failed) after TIMEOUT seconds
+    TRANSFER_COALESCING = True
+    TRANSFER_COALESCE_MAX_BATCH = 64
+    TRANSFER_COALESCE_MAX_WAIT_MS = 2
+    TRANSFER_COALESCE_TIMEOUT = 30
+
+    # Serve precompressed static .gz files (see `flask compress-static`) and
+    # gzip JSON responses of at least GZIP_MIN_SIZE bytes
+    COMPRESSION_ENABLED = True
+    GZIP_MIN_SIZE = 1024
+    GZIP_LEVEL = 6
+
+    # Cache compiled templates under instance/jinja_cache; WARMUP_ON_STARTUP
+    # compiles them and warms the database in create_app (see `flask warmup`)
+    TEMPLATE_BYTECODE_CACHE = True
+    WARMUP_ON_STARTUP = False
+
+    # Stored responses for Idempotency-Key retries expire after this many seconds
+    IDEMPOTENCY_TTL = 6 * 60 * 60
+
+    # Heavy analytical reads (quant dashboards, leaderboard history) use a
+    # read-only copy of the database that the scheduler refreshes every
+    # READ_REPLICA_INTERVAL seconds
+    READ_REPLICA_ENABLED = False
+    READ_REPLICA_INTERVAL = 5
+
+    # Write TRACE_SAMPLE_RATE of hot-path traces (transfers, offer approvals,
+    # redistribution, quant endpoints) to instance/traces.jsonl, rotated at
+    # TRACE_MAX_BYTES; see `flask trace-summary`
+    TRACING_ENABLED = False
+    TRACE_SAMPLE_RATE = 0.1
+    TRACE_MAX_BYTES = 10 * 1024 * 1024
+    TRACE_BACKUP_COUNT = 3
+
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -64,6 +110,12 @@ class ProductionConfig(Config):
     # Enable redistribution in production
     ENABLE_PERFORMER_REDISTRIBUTION = True
 
+    # Compile templates and warm caches before the first request
+    WARMUP_ON_STARTUP = True
+
+    # Keep heavy reporting queries off the database file tips write to
+    READ_REPLICA_ENABLED = True
+
 
 config = {
     "development": DevelopmentConfig,
@@ -1,9 +1,21 @@
+import os
 import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.request import pathname2url
 
 import click
-from flask import current_app, g
+from flask import current_app, g, request
 from flask.cli import with_appcontext
 
+from .ledger import journal
+from .metrics import metrics
+from .offers import offer_index
+from .ranking import leaderboard
+from .replica import get_replica_path, replica_as_of
+from .tracing import span, traced
+
 
 def get_db():
     if "db" not in g:
@@ -11,16 +23,456 @@ def get_db():
             current_app.config["DATABASE"], detect_types=sqlite3.PARSE_DECLTYPES
         )
         g.db.row_factory = sqlite3.Row
+        # WAL is persistent (set by init-db); NORMAL sync is safe under WAL and
+        # avoids an fsync per commit during registration and tipping bursts
+        g.db.execute("PRAGMA synchronous = NORMAL")
     return g.db
 
 
+def get_read_db():
+    """Connection for heavy analytical reads that may lag a few seconds.
+
+    Opens the read-only replica while it is fresh (see replica.py), otherwise
+    returns the primary connection. Never write through it.
+    """
+    if "read_db" not in g:
+        as_of = replica_as_of(current_app)
+        if as_of is None:
+            return get_db()
+        g.read_db = sqlite3.connect(
+            f"file:{pathname2url(get_replica_path(current_app))}?mode=ro",
+            uri=True,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
+        g.read_db.row_factory = sqlite3.Row
+        g.read_db_as_of = as_of
+    return g.read_db
+
+
+def get_read_db_as_of():
+    """UTC time the data behind ``get_read_db`` is current as of."""
+    get_read_db()
+    return g.get("read_db_as_of") or datetime.utcnow()
+
+
 def close_db(e=None):
     db = g.pop("db", None)
     if db is not None:
         db.close()
 
+    read_db = g.pop("read_db", None)
+    if read_db is not None:
+        read_db.close()
+    g.pop("read_db_as_of", None)
+
+
+# Cross-process cache coherence. In-process caches (the ranked leaderboard,
+# the pending-offer index, the ledger journal) only see writes made by this
+# process. Every write those caches depend on bumps the single ledger_state
+# row in the same transaction; at request start a long-lived connection checks
+# PRAGMA data_version (which changes only when another connection has
+# committed) and, if it moved, whether ledger_state advanced by versions this
+# process didn't write. If so, every registered cache is invalidated.
+
+_cache_invalidators = {}
+
+
+def register_cache(name, invalidate):
+    """Register a callable that drops an in-process cache of database state."""
+    _cache_invalidators[name] = invalidate
+
+
+def invalidate_caches():
+    """Drop every registered cache; each reloads from SQLite on next use."""
+    for invalidate in _cache_invalidators.values():
+        invalidate()
+    metrics.increment("cache_invalidations")
+
+
+class CoherenceMonitor:
+    """Detects writes to one database file made by other processes.
+
+    One connection per process does the checking (data_version is per
+    connection); PRAGMA data_version doesn't touch the database file, so
+    holding the lock around it is cheap.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._data_version = None
+        self._synced_version = None
+        self._local_versions = set()
+
+    def record_local(self, version):
+        """Note a ledger_state version written by this process."""
+        with self._lock:
+            self._local_versions.add(version)
+
+    def discard_local(self, version):
+        """Forget a version whose commit failed."""
+        with self._lock:
+            self._local_versions.discard(version)
+
+    def foreign_write_seen(self):
+        """Return True if another process has written since the last check."""
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._data_version = None
+
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return False
+            self._data_version = data_version
+
+            row = self._conn.execute("SELECT version FROM ledger_state WHERE id = 1").fetchone()
+            version = row[0] if row else 0
+
+            # Reads through one connection only go backwards after a reset
+            if self._synced_version is None or version < self._synced_version:
+                reset = self._synced_version is not None
+                self._synced_version = version
+                self._local_versions.clear()
+                return reset
+
+            local = {v for v in self._local_versions if self._synced_version < v <= version}
+            foreign = version - self._synced_version > len(local)
+            self._local_versions = {v for v in self._local_versions if v > version}
+            self._synced_version = version
+            return foreign
+
+
+_coherence_monitors = {}
+_coherence_monitors_lock = threading.Lock()
+
+
+def get_coherence_monitor():
+    path = current_app.config["DATABASE"]
+    monitor = _coherence_monitors.get(path)
+    if monitor is None:
+        with _coherence_monitors_lock:
+            monitor = _coherence_monitors.setdefault(path, CoherenceMonitor(path))
+    return monitor
+
+
+def check_coherence():
+    """Invalidate registered caches if another process wrote since the last check."""
+    # Pulse answers from the in-memory journal without touching SQLite
+    if request.endpoint == "api.pulse" or (request.endpoint and request.endpoint.startswith("static")):
+        return
+    try:
+        if get_coherence_monitor().foreign_write_seen():
+            invalidate_caches()
+    except sqlite3.Error as e:
+        current_app.logger.warning(f"⚠️ Cache coherence check failed: {e}")
+
+
+def commit_shared(db):
+    """Commit a write that in-process caches depend on.
+
+    Bumps ledger_state in the same transaction so other processes notice.
+    """
+    row = db.execute(
+        "UPDATE ledger_state SET version = version + 1 WHERE id = 1 RETURNING version"
+    ).fetchone()
+    if row is None:
+        with span("commit"):
+            db.commit()
+        return
+
+    # Record the version while this connection still holds the write lock, so
+    # no other thread can see it committed before it's known to be ours
+    monitor = get_coherence_monitor()
+    monitor.record_local(row["version"])
+    try:
+        with span("commit"):
+            db.commit()
+    except BaseException:
+        monitor.discard_local(row["version"])
+        raise
+
+
+def commit_ledger(db, user_ids=(), offer_ids=(), full=False):
+    """Commit a balance-changing write and publish it to the ledger journal.
+
+    ``user_ids`` are the users whose balances changed and ``offer_ids`` any
+    offers approved by the write; see ``LedgerJournal.publish``. The ranked
+    leaderboard repositions those users, or reloads after a ``full`` write.
+    """
+    commit_shared(db)
+    with span("leaderboard_refresh"):
+        if full:
+            leaderboard.invalidate()
+        else:
+            leaderboard.refresh(db, user_ids)
+    return journal.publish(user_ids, offer_ids, full)
+
+
+register_cache("leaderboard", leaderboard.invalidate)
+register_cache("pending_offers", offer_index.invalidate)
+# Clients syncing across another process's writes need a full reset
+register_cache("ledger_journal", lambda: journal.publish(full=True))
+
+# Pseudo-account on the other side of mint (sender) and burn (recipient)
+# ledger entries. It has no users row.
+SYSTEM_ACCOUNT_ID = 0
+
+# Idempotent schema objects added after the original schema. Applied on every
+# init-db so existing databases pick them up without a reset.
+SCHEMA_UPGRADES = [
+    # Initial balance snapshot is written by the same statement that creates the user
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_users_initial_snapshot
+    AFTER INSERT ON users
+    BEGIN
+        INSERT INTO balance_snapshots (user_id, balance) VALUES (NEW.id, NEW.coin_balance);
+    END
+    """,
+    # Starting balances are minted into the ledger so balances can be replayed
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_users_genesis_mint
+    AFTER INSERT ON users
+    WHEN NEW.coin_balance > 0
+    BEGIN
+        INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, status)
+        VALUES (0, NEW.id, NEW.coin_balance, 'mint', 'approved');
+    END
+    """,
+    # Replay checkpoints: balances as of a ledger position
+    """
+    CREATE TABLE IF NOT EXISTS ledger_checkpoints (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        last_transaction_id INTEGER NOT NULL,
+        balances TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_ledger_checkpoints_last_tx ON ledger_checkpoints(last_transaction_id)",
+    # Top-N leaderboard and chart queries walk users by balance
+    "CREATE INDEX IF NOT EXISTS idx_users_coin_balance ON users(coin_balance)",
+    "CREATE INDEX IF NOT EXISTS idx_users_performer_balance ON users(is_performer, coin_balance)",
+    # Offer expiry scans pending offers by age
+    "CREATE INDEX IF NOT EXISTS idx_transactions_status_type_time ON transactions(status, transaction_type, timestamp)",
+    # Per-user activity stats, maintained by the triggers below instead of
+    # aggregating transactions on every read (replaces the old user_stats view)
+    """
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER PRIMARY KEY,
+        total_sent INTEGER NOT NULL DEFAULT 0,
+        total_received INTEGER NOT NULL DEFAULT 0,
+        sent_count INTEGER NOT NULL DEFAULT 0,
+        received_count INTEGER NOT NULL DEFAULT 0,
+        transaction_count INTEGER NOT NULL DEFAULT 0,
+        last_activity TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS user_type_stats (
+        user_id INTEGER NOT NULL,
+        transaction_type TEXT NOT NULL,
+        transaction_count INTEGER NOT NULL DEFAULT 0,
+        total_amount INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, transaction_type),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_stats_insert
+    AFTER INSERT ON transactions
+    WHEN NEW.status = 'approved' AND NEW.transaction_type NOT IN ('mint', 'burn')
+    BEGIN
+        INSERT INTO user_stats (user_id, total_sent, sent_count, transaction_count, last_activity)
+        SELECT NEW.sender_id, NEW.amount, 1, 1, NEW.timestamp WHERE NEW.sender_id != 0
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_sent = total_sent + excluded.total_sent,
+            sent_count = sent_count + 1,
+            transaction_count = transaction_count + 1,
+            last_activity = excluded.last_activity;
+        INSERT INTO user_stats (user_id, total_received, received_count, transaction_count, last_activity)
+        SELECT NEW.recipient_id, NEW.amount, 1, 1, NEW.timestamp WHERE NEW.recipient_id != 0
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_received = total_received + excluded.total_received,
+            received_count = received_count + 1,
+            transaction_count = transaction_count + 1,
+            last_activity = excluded.last_activity;
+        INSERT INTO user_type_stats (user_id, transaction_type, transaction_count, total_amount)
+        SELECT user_id, NEW.transaction_type, 1, NEW.amount
+        FROM (SELECT NEW.sender_id AS user_id UNION ALL SELECT NEW.recipient_id)
+        WHERE user_id != 0
+        ON CONFLICT(user_id, transaction_type) DO UPDATE SET
+            transaction_count = transaction_count + 1,
+            total_amount = total_amount + excluded.total_amount;
+    END
+    """,
+    # Offers count once they are approved
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_stats_approve
+    AFTER UPDATE OF status ON transactions
+    WHEN OLD.status != 'approved' AND NEW.status = 'approved'
+         AND NEW.transaction_type NOT IN ('mint', 'burn')
+    BEGIN
+        INSERT INTO user_stats (user_id, total_sent, sent_count, transaction_count, last_activity)
+        SELECT NEW.sender_id, NEW.amount, 1, 1, CURRENT_TIMESTAMP WHERE NEW.sender_id != 0
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_sent = total_sent + excluded.total_sent,
+            sent_count = sent_count + 1,
+            transaction_count = transaction_count + 1,
+            last_activity = excluded.last_activity;
+        INSERT INTO user_stats (user_id, total_received, received_count, transaction_count, last_activity)
+        SELECT NEW.recipient_id, NEW.amount, 1, 1, CURRENT_TIMESTAMP WHERE NEW.recipient_id != 0
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_received = total_received + excluded.total_received,
+            received_count = received_count + 1,
+            transaction_count = transaction_count + 1,
+            last_activity = excluded.last_activity;
+        INSERT INTO user_type_stats (user_id, transaction_type, transaction_count, total_amount)
+        SELECT user_id, NEW.transaction_type, 1, NEW.amount
+        FROM (SELECT NEW.sender_id AS user_id UNION ALL SELECT NEW.recipient_id)
+        WHERE user_id != 0
+        ON CONFLICT(user_id, transaction_type) DO UPDATE SET
+            transaction_count = transaction_count + 1,
+            total_amount = total_amount + excluded.total_amount;
+    END
+    """,
+    # Stored responses for retried requests carrying an Idempotency-Key
+    """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        username TEXT NOT NULL,
+        idempotency_key TEXT NOT NULL,
+        endpoint TEXT NOT NULL,
+        status_code INTEGER NOT NULL,
+        response_body TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (username, idempotency_key)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created ON idempotency_keys(created_at)",
+    # Bumped by every write in-process caches depend on; see commit_shared
+    """
+    CREATE TABLE IF NOT EXISTS ledger_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "INSERT OR IGNORE INTO ledger_state (id, version) VALUES (1, 0)",
+]
+
 
+def _apply_schema_upgrades(db):
+    """Apply idempotent schema upgrades and enable WAL journaling."""
+    user_stats_type = db.execute(
+        "SELECT type FROM sqlite_master WHERE name = 'user_stats'"
+    ).fetchone()
+    if user_stats_type and user_stats_type["type"] == "view":
+        db.execute("DROP VIEW user_stats")
+
+    db.execute("PRAGMA journal_mode = WAL")
+    for statement in SCHEMA_UPGRADES:
+        db.execute(statement)
+
+    # When a pending offer was approved or denied; its coins move at that time
+    transaction_columns = {column["name"] for column in db.execute("PRAGMA table_info(transactions)")}
+    if "decided_at" not in transaction_columns:
+        db.execute("ALTER TABLE transactions ADD COLUMN decided_at TIMESTAMP")
+    db.commit()
 
+    _backfill_genesis_entries(db)
+
+    # The stats table replaced a view; fill it from the existing ledger once
+    if not user_stats_type or user_stats_type["type"] == "view":
+        rebuild_user_stats(db)
+
+
+def _backfill_genesis_entries(db):
+    """Record genesis entries for databases created before mints were logged.
+
+    Runs once: only when the ledger has no mint entries yet. Each user gets a
+    mint (or burn) for the gap between their balance and their ledger net.
+    """
+    has_mints = db.execute(
+        "SELECT 1 FROM transactions WHERE transaction_type = 'mint' LIMIT 1"
+    ).fetchone()
+    if has_mints:
+        return
+
+    gaps = db.execute(
+        """
+        SELECT u.id, u.created_at,
+               u.coin_balance - COALESCE(received.total, 0) + COALESCE(sent.total, 0) AS gap
+        FROM users u
+        LEFT JOIN (
+            SELECT recipient_id, SUM(amount) AS total FROM transactions
+            WHERE status = 'approved' GROUP BY recipient_id
+        ) received ON received.recipient_id = u.id
+        LEFT JOIN (
+            SELECT sender_id, SUM(amount) AS total FROM transactions
+            WHERE status = 'approved' GROUP BY sender_id
+        ) sent ON sent.sender_id = u.id
+        """
+    ).fetchall()
+
+    entries = []
+    for user in gaps:
+        if user["gap"] > 0:
+            entries.append((SYSTEM_ACCOUNT_ID, user["id"], user["gap"], "mint", user["created_at"]))
+        elif user["gap"] < 0:
+            entries.append((user["id"], SYSTEM_ACCOUNT_ID, -user["gap"], "burn", user["created_at"]))
+
+    if entries:
+        db.executemany(
+            """
+            INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, status, timestamp)
+            VALUES (?, ?, ?, ?, 'approved', COALESCE(?, CURRENT_TIMESTAMP))
+            """,
+            entries,
+        )
+        db.commit()
+        click.echo(f"🪙 Backfilled genesis ledger entries for {len(entries)} users")
+
+
+def rebuild_user_stats(db):
+    """Recompute user_stats and user_type_stats from the approved ledger.
+
+    Returns the number of users with stats.
+    """
+    ledger_sides = """
+        SELECT sender_id AS user_id, amount AS sent, 0 AS received, 1 AS sent_count,
+               0 AS received_count, transaction_type, timestamp
+        FROM transactions
+        WHERE status = 'approved' AND transaction_type NOT IN ('mint', 'burn')
+        UNION ALL
+        SELECT recipient_id, 0, amount, 0, 1, transaction_type, timestamp
+        FROM transactions
+        WHERE status = 'approved' AND transaction_type NOT IN ('mint', 'burn')
+    """
+
+    db.execute("DELETE FROM user_stats")
+    db.execute("DELETE FROM user_type_stats")
+    db.execute(
+        f"""
+        INSERT INTO user_stats (user_id, total_sent, total_received, sent_count,
+                                received_count, transaction_count, last_activity)
+        SELECT user_id, SUM(sent), SUM(received), SUM(sent_count), SUM(received_count),
+               COUNT(*), MAX(timestamp)
+        FROM ({ledger_sides})
+        WHERE user_id != {SYSTEM_ACCOUNT_ID}
+        GROUP BY user_id
+        """
+    )
+    db.execute(
+        f"""
+        INSERT INTO user_type_stats (user_id, transaction_type, transaction_count, total_amount)
+        SELECT user_id, transaction_type, COUNT(*), SUM(sent + received)
+        FROM ({ledger_sides})
+        WHERE user_id != {SYSTEM_ACCOUNT_ID}
+        GROUP BY user_id, transaction_type
+        """
+    )
+    db.commit()
+    return db.execute("SELECT COUNT(*) AS count FROM user_stats").fetchone()["count"]
 
 
 def init_db():
@@ -35,6 +487,9 @@ def init_db():
         with current_app.open_resource("schema.sql") as f:
             db.executescript(f.read().decode("utf8"))
 
+        _apply_schema_upgrades(db)
+        leaderboard.invalidate()
+
         # Create initial snapshots for any existing users (shouldn't be any in fresh DB)
         create_balance_snapshots_for_all_users()
         click.echo("Created fresh database with all tables")
@@ -144,6 +599,8 @@ def init_db():
         else:
             click.echo("Database is up to date")
 
+        _apply_schema_upgrades(db)
+
 
 @click.command("init-db")
 @with_appcontext
@@ -183,6 +640,7 @@ def reset_db_command():
     # Recreate database
     with current_app.open_resource("schema.sql") as f:
         db.executescript(f.read().decode("utf8"))
+    _apply_schema_upgrades(db)
 
     click.echo("🗑️  Database reset complete - all data deleted and tables recreated")
     
@@ -204,18 +662,27 @@ def reset_balances_command():
         # Reset all balances
         db.execute("UPDATE users SET coin_balance = 10000")
 
-        # Clear all transactions
+        # Clear all transactions and everything derived from them
         db.execute("DELETE FROM transactions")
+        db.execute("DELETE FROM ledger_checkpoints")
+        db.execute("DELETE FROM user_stats")
+        db.execute("DELETE FROM user_type_stats")
 
         # Clear all balance snapshots
         db.execute("DELETE FROM balance_snapshots")
 
-        # Create fresh snapshots
+        # Mint the fresh balances into the ledger and snapshot them
         users = db.execute("SELECT id FROM users").fetchall()
-        for user in users:
-            create_balance_snapshot(user["id"], 10000)
+        db.executemany(
+            "INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, status) VALUES (?, ?, 10000, 'mint', 'approved')",
+            [(SYSTEM_ACCOUNT_ID, user["id"]) for user in users],
+        )
+        db.executemany(
+            "INSERT INTO balance_snapshots (user_id, balance) VALUES (?, 10000)",
+            [(user["id"],) for user in users],
+        )
 
-        db.commit()
+        commit_ledger(db, full=True)
         click.echo(f"💰 Reset balances for {len(users)} users to 10,000 coins each")
 
     except Exception as e:
@@ -223,6 +690,53 @@ def reset_balances_command():
         click.echo(f"❌ Failed to reset balances: {e}")
 
 
+@click.command("import-users")
+@click.argument("csv_file", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "--performers", is_flag=True, help="Register every row as a performer"
+)
+@with_appcontext
+def import_users_command(csv_file, performers):
+    """Pre-register ticket holders from a CSV file (username[,is_performer])."""
+    import csv
+
+    rows = []
+    for record in csv.reader(csv_file):
+        if not record or not record[0].strip() or record[0].strip().lower() == "username":
+            continue
+        username = record[0].strip().upper()
+        if len(username) < 3:
+            click.echo(f"⚠️  Skipping {username!r} - usernames need at least 3 characters")
+            continue
+        is_performer = performers or (
+            len(record) > 1 and record[1].strip().lower() in ("1", "true", "yes", "performer")
+        )
+        rows.append((username, is_performer))
+
+    created = import_users(rows)
+    click.echo(f"🎟️  Pre-registered {created} users ({len(rows) - created} already existed)")
+
+
+@click.command("rebuild-user-stats")
+@with_appcontext
+def rebuild_user_stats_command():
+    """Recompute per-user stats from the transaction ledger."""
+    start = time.perf_counter()
+    count = rebuild_user_stats(get_db())
+    click.echo(
+        f"📊 Rebuilt stats for {count} users in {time.perf_counter() - start:.3f}s"
+    )
+
+
+@click.command("expire-offers")
+@click.option("--ttl", type=int, default=None, help="Expire offers older than this many seconds")
+@with_appcontext
+def expire_offers_command(ttl):
+    """Expire stale pending offers now."""
+    expired = expire_stale_offers(ttl)
+    click.echo(f"⌛ Expired {expired} stale pending offers")
+
+
 @click.command("create-snapshots")
 @with_appcontext
 def create_snapshots_command():
@@ -288,10 +802,14 @@ def drop_sessions_table_command():
 
 
 def init_app(app):
+    app.before_request(check_coherence)
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
     app.cli.add_command(reset_db_command)
     app.cli.add_command(reset_balances_command)
+    app.cli.add_command(import_users_command)
+    app.cli.add_command(expire_offers_command)
+    app.cli.add_command(rebuild_user_stats_command)
     app.cli.add_command(create_snapshots_command)
     app.cli.add_command(cleanup_snapshots_command)
     app.cli.add_command(redistribute_performer_coins_command)
@@ -307,22 +825,67 @@ def init_app(app):
     app.cli.add_command(reset_market_command)
 
 
-def create_user(username, is_performer=False):
+def upsert_user(username, is_performer=False, starting_balance=10000):
+    """Register a user or fetch the existing one.
+
+    Returning users are found by a plain lookup without opening a write
+    transaction. New users are created by a single INSERT ... RETURNING
+    statement (the initial balance snapshot is written by trigger) and one
+    commit. Returns ``(user, created)`` where ``user`` is a dict of id,
+    username, coin_balance and is_performer.
+    """
+    existing = get_user_identity(username)
+    if existing is not None:
+        return dict(existing), False
+
     db = get_db()
-    try:
-        cursor = db.execute(
-            "INSERT INTO users (username, coin_balance, is_performer) VALUES (?, ?, ?)",
-            (username.upper(), 10000, is_performer),
-        )
-        user_id = cursor.lastrowid
+    username = username.upper()
+    user = db.execute(
+        """
+        INSERT INTO users (username, coin_balance, is_performer) VALUES (?, ?, ?)
+        ON CONFLICT(username) DO NOTHING
+        RETURNING id, username, coin_balance, is_performer
+        """,
+        (username, starting_balance, bool(is_performer)),
+    ).fetchone()
 
-        # Create initial balance snapshot
-        create_balance_snapshot(user_id, 10000)
+    if user is not None:
+        commit_ledger(db, [user["id"]])
+        return dict(user), True
 
-        db.commit()
-        return user_id
-    except sqlite3.IntegrityError:
+    # Registered by a concurrent login since the lookup - close the no-op
+    # write transaction
+    db.commit()
+    existing = get_user_identity(username)
+    return (dict(existing) if existing else None), False
+
+
+def create_user(username, is_performer=False, starting_balance=10000):
+    """Create a new user, returning its id or None if the username is taken."""
+    try:
+        user, created = upsert_user(username, is_performer, starting_balance)
+    except sqlite3.Error:
         return None
+    return user["id"] if created else None
+
+
+def import_users(rows):
+    """Bulk-register users from (username, is_performer) rows with executemany.
+
+    Existing usernames are skipped. Returns the number of users created.
+    """
+    db = get_db()
+    before = db.execute("SELECT COUNT(*) AS count FROM users").fetchone()["count"]
+    db.executemany(
+        """
+        INSERT INTO users (username, coin_balance, is_performer) VALUES (?, 10000, ?)
+        ON CONFLICT(username) DO NOTHING
+        """,
+        ((username.strip().upper(), bool(is_performer)) for username, is_performer in rows),
+    )
+    created = db.execute("SELECT COUNT(*) AS count FROM users").fetchone()["count"] - before
+    commit_ledger(db, full=True)
+    return created
 
 
 def get_user_balance(username):
@@ -333,9 +896,76 @@ def get_user_balance(username):
     return user["coin_balance"] if user else None
 
 
-def transfer_coins(sender_username, recipient_username, amount, transaction_type="tip", request_text=None):
+def get_user_stats(username):
+    """Get a user's activity stats, or None if the user doesn't exist."""
+    db = get_db()
+    stats = db.execute(
+        """
+        SELECT u.id, u.username, u.coin_balance, u.is_performer, u.created_at,
+               COALESCE(s.total_sent, 0) AS total_sent,
+               COALESCE(s.total_received, 0) AS total_received,
+               COALESCE(s.sent_count, 0) AS sent_count,
+               COALESCE(s.received_count, 0) AS received_count,
+               COALESCE(s.transaction_count, 0) AS transaction_count,
+               s.last_activity
+        FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
+        WHERE u.username = ?
+        """,
+        (username.upper(),),
+    ).fetchone()
+    if stats is None:
+        return None
+
+    by_type = db.execute(
+        "SELECT transaction_type, transaction_count, total_amount FROM user_type_stats WHERE user_id = ?",
+        (stats["id"],),
+    ).fetchall()
+
+    result = dict(stats)
+    result["by_type"] = {
+        row["transaction_type"]: {
+            "count": row["transaction_count"],
+            "amount": row["total_amount"],
+        }
+        for row in by_type
+    }
+    return result
+
+
+def get_user_identity(username):
+    """Get the id, balance and performer flag for a user in a single query."""
+    db = get_db()
+    return db.execute(
+        "SELECT id, username, coin_balance, is_performer FROM users WHERE username = ?",
+        (username.upper(),),
+    ).fetchone()
+
+
+def debit_balance(db, user_id, amount):
+    """Debit ``amount`` from a user only if their balance still covers it.
+
+    The balance check and the update are one statement, so two concurrent
+    transfers can't both spend the same coins. Returns the new balance, or
+    None when funds are insufficient.
+    """
+    rows = db.execute(
+        "UPDATE users SET coin_balance = coin_balance - ? WHERE id = ? AND coin_balance >= ? RETURNING coin_balance",
+        (amount, user_id, amount),
+    ).fetchall()
+    return rows[0]["coin_balance"] if rows else None
+
+
+@traced()
+def apply_transfer(db, sender_username, recipient_username, amount, transaction_type="tip", request_text=None):
+    """Write one transfer into the open transaction on ``db`` without committing.
+
+    Returns ``(status, user_ids, offer)``: the transfer_coins status string,
+    the users whose balances changed, and the new pending offer (offers only).
+    Nothing is written unless the status is "success" or "offer_pending".
+    """
     if amount <= 0:
-        return "invalid_amount"
+        return "invalid_amount", [], None
 
     # Convert usernames to uppercase for consistency
     sender_username = sender_username.upper()
@@ -344,163 +974,304 @@ def transfer_coins(sender_username, recipient_username, amount, transaction_type
     # Prevent The Chancellor from sending coins to themselves
     quant_username = current_app.config.get("QUANT_USERNAME", "CHANCELLOR")
     if sender_username == quant_username and recipient_username == quant_username:
-        return "chancellor_self_transfer_forbidden"
-
-    db = get_db()
+        return "chancellor_self_transfer_forbidden", [], None
 
-    sender = db.execute(
-        "SELECT id, coin_balance FROM users WHERE username = ?", (sender_username,)
-    ).fetchone()
-    recipient = db.execute(
-        "SELECT id, coin_balance FROM users WHERE username = ?", (recipient_username,)
-    ).fetchone()
+    with span("lookup_users"):
+        sender = db.execute(
+            "SELECT id, coin_balance FROM users WHERE username = ?", (sender_username,)
+        ).fetchone()
+        recipient = db.execute(
+            "SELECT id, coin_balance FROM users WHERE username = ?", (recipient_username,)
+        ).fetchone()
 
     if not sender or not recipient:
-        return "user_not_found"
+        return "user_not_found", [], None
 
     if sender["coin_balance"] < amount:
-        return "insufficient_funds"
+        return "insufficient_funds", [], None
+
+    # Offers are recorded as pending; coins move only when approved
+    if transaction_type == "offer":
+        inserted = db.execute(
+            "INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, request_text, status) VALUES (?, ?, ?, ?, ?, 'pending') RETURNING id, timestamp",
+            (sender["id"], recipient["id"], amount, transaction_type, request_text),
+        ).fetchall()[0]
+        return "offer_pending", [], {
+            "id": inserted["id"],
+            "amount": amount,
+            "timestamp": inserted["timestamp"],
+            "request_text": request_text,
+            "sender": sender_username,
+            "recipient": recipient_username,
+        }
 
-    # Determine status based on transaction type
-    status = "pending" if transaction_type == "offer" else "approved"
+    with span("update_balances"):
+        sender_new_balance = debit_balance(db, sender["id"], amount)
+        if sender_new_balance is None:
+            return "insufficient_funds", [], None
+        recipient_new_balance = db.execute(
+            "UPDATE users SET coin_balance = coin_balance + ? WHERE id = ? RETURNING coin_balance",
+            (amount, recipient["id"]),
+        ).fetchall()[0]["coin_balance"]
 
-    try:
-        # For offers, we don't transfer coins immediately
-        if transaction_type != "offer":
-            db.execute(
-                "UPDATE users SET coin_balance = coin_balance - ? WHERE username = ?",
-                (amount, sender_username),
-            )
-            db.execute(
-                "UPDATE users SET coin_balance = coin_balance + ? WHERE username = ?",
-                (amount, recipient_username),
-            )
-
-        # Insert transaction with new fields
+    with span("insert_ledger_entry"):
         db.execute(
-            "INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, request_text, status) VALUES (?, ?, ?, ?, ?, ?)",
-            (sender["id"], recipient["id"], amount, transaction_type, request_text, status),
+            "INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, request_text, status) VALUES (?, ?, ?, ?, ?, 'approved')",
+            (sender["id"], recipient["id"], amount, transaction_type, request_text),
         )
-        db.commit()
 
-        # Create balance snapshots only for completed transactions
-        if transaction_type != "offer":
-            sender_new_balance = sender["coin_balance"] - amount
-            recipient_new_balance = db.execute(
-                "SELECT coin_balance FROM users WHERE username = ?", (recipient_username,)
-            ).fetchone()["coin_balance"]
+    # Balance snapshots for completed transfers commit with the transfer itself
+    with span("insert_snapshots"):
+        db.executemany(
+            "INSERT INTO balance_snapshots (user_id, balance) VALUES (?, ?)",
+            [(sender["id"], sender_new_balance), (recipient["id"], recipient_new_balance)],
+        )
+    return "success", [sender["id"], recipient["id"]], None
 
-            create_balance_snapshot(sender["id"], sender_new_balance)
-            create_balance_snapshot(recipient["id"], recipient_new_balance)
 
-        return "offer_pending" if transaction_type == "offer" else "success"
+@traced()
+def transfer_coins(sender_username, recipient_username, amount, transaction_type="tip", request_text=None):
+    db = get_db()
+
+    try:
+        status, user_ids, offer = apply_transfer(
+            db, sender_username, recipient_username, amount, transaction_type, request_text
+        )
+        if status == "success":
+            commit_ledger(db, user_ids)
+        elif status == "offer_pending":
+            commit_shared(db)
+            offer_index.add(offer)
+        else:
+            db.rollback()
+        return status
     except sqlite3.Error:
         db.rollback()
         return "transaction_failed"
 
 
+@traced()
 def approve_or_deny_offer(transaction_id, approved, approver_username=None):
     """Approve or deny a pending offer. If approved, execute the coin transfer."""
     db = get_db()
     
     # Get the pending transaction
-    transaction = db.execute(
-        """
-        SELECT t.*, s.username as sender_username, r.username as recipient_username,
-               s.coin_balance as sender_balance
-        FROM transactions t
-        JOIN users s ON t.sender_id = s.id
-        JOIN users r ON t.recipient_id = r.id
-        WHERE t.id = ? AND t.status = 'pending' AND t.transaction_type = 'offer'
-        """,
-        (transaction_id,)
-    ).fetchone()
+    with span("lookup_offer"):
+        transaction = db.execute(
+            """
+            SELECT t.*, s.username as sender_username, r.username as recipient_username,
+                   s.coin_balance as sender_balance
+            FROM transactions t
+            JOIN users s ON t.sender_id = s.id
+            JOIN users r ON t.recipient_id = r.id
+            WHERE t.id = ? AND t.status = 'pending' AND t.transaction_type = 'offer'
+            """,
+            (transaction_id,)
+        ).fetchone()
     
     if not transaction:
         return "offer_not_found"
     
     try:
         if approved:
-            # Check if sender still has sufficient funds
-            if transaction["sender_balance"] < transaction["amount"]:
-                # Auto-deny if insufficient funds
-                db.execute(
-                    "UPDATE transactions SET status = 'denied' WHERE id = ?",
+            # Check and debit in one step before marking the offer approved,
+            # which the stats trigger counts; auto-deny if funds ran out meanwhile
+            sender_new_balance = debit_balance(db, transaction["sender_id"], transaction["amount"])
+            if sender_new_balance is None:
+                denied = db.execute(
+                    "UPDATE transactions SET status = 'denied', decided_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'pending'",
                     (transaction_id,)
-                )
-                db.commit()
+                ).rowcount
+                if not denied:
+                    db.rollback()
+                    offer_index.remove([transaction_id])
+                    return "offer_not_found"
+                commit_shared(db)
+                offer_index.remove([transaction_id])
                 return "insufficient_funds"
-            
+
+        # Claim the offer so two approvers can't both execute it; losing the
+        # claim rolls back the debit above
+        claimed = db.execute(
+            "UPDATE transactions SET status = ?, decided_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'pending'",
+            ("approved" if approved else "denied", transaction_id),
+        ).rowcount
+        if not claimed:
+            db.rollback()
+            offer_index.remove([transaction_id])
+            return "offer_not_found"
+
+        if approved:
             # Execute the transfer
-            db.execute(
-                "UPDATE users SET coin_balance = coin_balance - ? WHERE id = ?",
-                (transaction["amount"], transaction["sender_id"])
-            )
-            db.execute(
-                "UPDATE users SET coin_balance = coin_balance + ? WHERE id = ?",
-                (transaction["amount"], transaction["recipient_id"])
-            )
-            db.execute(
-                "UPDATE transactions SET status = 'approved' WHERE id = ?",
-                (transaction_id,)
+            with span("update_balances"):
+                recipient_new_balance = db.execute(
+                    "UPDATE users SET coin_balance = coin_balance + ? WHERE id = ? RETURNING coin_balance",
+                    (transaction["amount"], transaction["recipient_id"])
+                ).fetchall()[0]["coin_balance"]
+
+            # Balance snapshots commit with the approval itself
+            with span("snapshots"):
+                db.executemany(
+                    "INSERT INTO balance_snapshots (user_id, balance) VALUES (?, ?)",
+                    [
+                        (transaction["sender_id"], sender_new_balance),
+                        (transaction["recipient_id"], recipient_new_balance),
+                    ],
+                )
+
+        if approved:
+            commit_ledger(
+                db,
+                [transaction["sender_id"], transaction["recipient_id"]],
+                [transaction_id],
             )
-            
-            # Create balance snapshots
-            sender_new_balance = transaction["sender_balance"] - transaction["amount"]
-            recipient_new_balance = db.execute(
-                "SELECT coin_balance FROM users WHERE id = ?", 
-                (transaction["recipient_id"],)
-            ).fetchone()["coin_balance"]
-            
-            create_balance_snapshot(transaction["sender_id"], sender_new_balance)
-            create_balance_snapshot(transaction["recipient_id"], recipient_new_balance)
         else:
-            # Deny the offer
-            db.execute(
-                "UPDATE transactions SET status = 'denied' WHERE id = ?",
-                (transaction_id,)
-            )
-        
-        db.commit()
+            commit_shared(db)
+        offer_index.remove([transaction_id])
         return "success"
     except sqlite3.Error:
         db.rollback()
         return "approval_failed"
 
 
-def get_pending_offers(performer_username=None):
-    """Get all pending offers, optionally filtered by performer."""
+def process_offers_bulk(decisions):
+    """Approve or deny many pending offers in one transaction.
+
+    ``decisions`` maps offer id -> True (approve) or False (deny). Offers are
+    processed in timestamp order against a running balance per user, so an
+    approval that the sender can no longer cover is auto-denied. Returns a
+    list of ``{"offer_id", "result"}`` dicts in processing order, where result
+    is ``approved``, ``denied``, ``insufficient_funds`` or ``offer_not_found``.
+    Returns None if the transaction was rolled back.
+    """
+    if not decisions:
+        return []
+
     db = get_db()
-    
-    if performer_username:
-        performer_username = performer_username.upper()
+    # Take the write lock up front so the balances read below stay current
+    if not db.in_transaction:
+        db.execute("BEGIN IMMEDIATE")
+
+    try:
+        placeholders = ",".join("?" * len(decisions))
         offers = db.execute(
-            """
-            SELECT t.id, t.amount, t.timestamp, t.request_text,
-                   s.username as sender, r.username as recipient
-            FROM transactions t
-            JOIN users s ON t.sender_id = s.id
-            JOIN users r ON t.recipient_id = r.id
-            WHERE t.status = 'pending' AND t.transaction_type = 'offer' 
-                  AND r.username = ?
-            ORDER BY t.timestamp DESC
+            f"""
+            SELECT id, sender_id, recipient_id, amount FROM transactions
+            WHERE id IN ({placeholders}) AND status = 'pending' AND transaction_type = 'offer'
+            ORDER BY timestamp, id
             """,
-            (performer_username,)
+            list(decisions),
         ).fetchall()
-    else:
-        offers = db.execute(
-            """
-            SELECT t.id, t.amount, t.timestamp, t.request_text,
-                   s.username as sender, r.username as recipient
-            FROM transactions t
-            JOIN users s ON t.sender_id = s.id
-            JOIN users r ON t.recipient_id = r.id
-            WHERE t.status = 'pending' AND t.transaction_type = 'offer'
-            ORDER BY t.timestamp DESC
+
+        user_ids = list(
+            {offer["sender_id"] for offer in offers} | {offer["recipient_id"] for offer in offers}
+        )
+        balances = {}
+        if user_ids:
+            users = db.execute(
+                f"SELECT id, coin_balance FROM users WHERE id IN ({','.join('?' * len(user_ids))})",
+                user_ids,
+            ).fetchall()
+            balances = {user["id"]: user["coin_balance"] for user in users}
+
+        results = []
+        statuses = []
+        touched = set()
+        approved_ids = []
+        for offer in offers:
+            sender_id, recipient_id, amount = offer["sender_id"], offer["recipient_id"], offer["amount"]
+
+            if not decisions[offer["id"]]:
+                result = "denied"
+            elif balances.get(sender_id, 0) < amount:
+                result = "insufficient_funds"
+            else:
+                balances[sender_id] -= amount
+                balances[recipient_id] += amount
+                touched.update((sender_id, recipient_id))
+                approved_ids.append(offer["id"])
+                result = "approved"
+
+            statuses.append(("approved" if result == "approved" else "denied", offer["id"]))
+            results.append({"offer_id": offer["id"], "result": result})
+
+        found = {offer["id"] for offer in offers}
+        results.extend(
+            {"offer_id": offer_id, "result": "offer_not_found"}
+            for offer_id in decisions
+            if offer_id not in found
+        )
+
+        db.executemany(
+            "UPDATE transactions SET status = ?, decided_at = CURRENT_TIMESTAMP WHERE id = ?", statuses
+        )
+        db.executemany(
+            "UPDATE users SET coin_balance = ? WHERE id = ?",
+            [(balances[user_id], user_id) for user_id in touched],
+        )
+        db.executemany(
+            "INSERT INTO balance_snapshots (user_id, balance) VALUES (?, ?)",
+            [(user_id, balances[user_id]) for user_id in touched],
+        )
+        commit_ledger(db, touched, approved_ids)
+        offer_index.remove(decisions)
+        return results
+    except sqlite3.Error:
+        db.rollback()
+        return None
+
+
+def expire_stale_offers(ttl_seconds=None, batch_size=None):
+    """Expire pending offers older than the TTL in batched updates.
+
+    Defaults come from ``OFFER_TTL`` and ``OFFER_EXPIRY_BATCH_SIZE``. Expired
+    offers never moved coins, so balances are untouched. Returns the number
+    of offers expired.
+    """
+    if ttl_seconds is None:
+        ttl_seconds = current_app.config.get("OFFER_TTL")
+    if batch_size is None:
+        batch_size = current_app.config.get("OFFER_EXPIRY_BATCH_SIZE", 500)
+    if not ttl_seconds:
+        return 0
+
+    db = get_db()
+    expired = 0
+    while True:
+        rows = db.execute(
             """
+            UPDATE transactions SET status = 'expired'
+            WHERE id IN (
+                SELECT id FROM transactions
+                WHERE status = 'pending' AND transaction_type = 'offer'
+                      AND timestamp < datetime('now', ?)
+                LIMIT ?
+            )
+            RETURNING id
+            """,
+            (f"-{int(ttl_seconds)} seconds", batch_size),
         ).fetchall()
-    
-    return [dict(offer) for offer in offers]
+        # Other processes only need to drop their offer index if offers expired
+        if rows:
+            commit_shared(db)
+        else:
+            db.commit()
+
+        offer_index.remove([row["id"] for row in rows])
+        expired += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    offer_index.ensure_loaded(db)
+    metrics.increment("offers_expired", expired)
+    metrics.set_gauge("offers_pending", len(offer_index))
+    return expired
+
+
+def get_pending_offers(performer_username=None):
+    """Get all pending offers, newest first, optionally filtered by performer."""
+    offer_index.ensure_loaded(get_db())
+    return offer_index.pending(performer_username.upper() if performer_username else None)
 
 
 def get_recent_approved_offers(limit=5):
@@ -509,7 +1280,7 @@ def get_recent_approved_offers(limit=5):
     
     offers = db.execute(
         """
-        SELECT t.amount, t.timestamp, t.request_text,
+        SELECT t.id, t.amount, t.timestamp, t.request_text,
                s.username as sender, r.username as recipient
         FROM transactions t
         JOIN users s ON t.sender_id = s.id
@@ -525,14 +1296,110 @@ def get_recent_approved_offers(limit=5):
     return [dict(offer) for offer in offers]
 
 
+def get_approved_offers_by_ids(offer_ids):
+    """Get approved offers with requests by transaction id, newest first."""
+    if not offer_ids:
+        return []
+
+    db = get_db()
+    placeholders = ",".join("?" for _ in offer_ids)
+    offers = db.execute(
+        f"""
+        SELECT t.id, t.amount, t.timestamp, t.request_text,
+               s.username as sender, r.username as recipient
+        FROM transactions t
+        JOIN users s ON t.sender_id = s.id
+        JOIN users r ON t.recipient_id = r.id
+        WHERE t.id IN ({placeholders}) AND t.status = 'approved'
+              AND t.transaction_type = 'offer' AND t.request_text IS NOT NULL
+        ORDER BY t.timestamp DESC, t.id DESC
+        """,
+        list(offer_ids),
+    ).fetchall()
+
+    return [dict(offer) for offer in offers]
+
+
+def get_ranked_users(limit=None, performers_only=False):
+    """Get users richest first from the ranked leaderboard, with their rank.
+
+    Returns the top ``limit`` users, or everyone if no limit is given.
+    """
+    leaderboard.ensure_loaded(get_db())
+    return leaderboard.top(len(leaderboard) if limit is None else limit, performers_only)
+
+
+def get_user_rank(username, neighbours=0):
+    """Get a user's rank, or None if the user doesn't exist.
+
+    Also returns up to ``neighbours`` users ranked either side of them.
+    """
+    user = get_user_identity(username)
+    if user is None:
+        return None
+
+    leaderboard.ensure_loaded(get_db())
+    return {
+        "username": user["username"],
+        "balance": user["coin_balance"],
+        "rank": leaderboard.rank(user["id"]),
+        "total_users": len(leaderboard),
+        "performer_rank": leaderboard.rank(user["id"], performers_only=True),
+        "around": [
+            {"username": entry["username"], "balance": entry["coin_balance"], "rank": entry["rank"]}
+            for entry in leaderboard.around(user["id"], neighbours)
+        ]
+        if neighbours
+        else [],
+    }
+
+
 def get_all_users():
+    return [
+        {"username": user["username"], "coin_balance": user["coin_balance"]}
+        for user in get_ranked_users()
+    ]
+
+
+def get_users_by_ids(user_ids):
+    """Get usernames and balances for the given user ids."""
+    if not user_ids:
+        return []
+
     db = get_db()
+    placeholders = ",".join("?" for _ in user_ids)
     users = db.execute(
-        "SELECT username, coin_balance FROM users ORDER BY coin_balance DESC"
+        f"SELECT username, coin_balance FROM users WHERE id IN ({placeholders})",
+        list(user_ids),
     ).fetchall()
     return [dict(user) for user in users]
 
 
+def get_market_stats():
+    """Get market cap, user count, transaction volume and the top holder."""
+    db = get_db()
+
+    total_coins = db.execute("SELECT SUM(coin_balance) as total FROM users").fetchone()
+    user_count = db.execute("SELECT COUNT(*) as count FROM users").fetchone()
+    transaction_volume = db.execute(
+        "SELECT COUNT(*) as count, SUM(amount) as volume FROM transactions WHERE transaction_type NOT IN ('mint', 'burn')"
+    ).fetchone()
+    top_performer = next(iter(get_ranked_users(1)), None)
+
+    return {
+        "market_cap": total_coins["total"] or 0,
+        "total_users": user_count["count"],
+        "transaction_count": transaction_volume["count"] or 0,
+        "total_volume": transaction_volume["volume"] or 0,
+        "top_performer": {
+            "username": top_performer["username"],
+            "balance": top_performer["coin_balance"],
+        }
+        if top_performer
+        else None,
+    }
+
+
 def get_transaction_history(username=None, limit=50):
     db = get_db()
 
@@ -598,56 +1465,148 @@ def create_balance_snapshots_for_all_users():
         return False
 
 
-def get_balance_history(hours_back=0.5):
-    """Get balance history for all users over the specified time period."""
+def get_history_user_ids(top=None, usernames=None, performers_only=False):
+    """Pick the users a balance history chart should show, richest first.
+
+    Filters combine: ``usernames`` restricts to those users,
+    ``performers_only`` to performers, and ``top`` keeps the N highest
+    balances. Top-N picks come from the ranked leaderboard; username filters
+    walk the coin_balance indexes, so the cost depends on N rather than on the
+    number of users.
+    """
+    if top and not usernames:
+        return [user["id"] for user in get_ranked_users(top, performers_only)]
+
     db = get_db()
+    conditions = []
+    params = []
+
+    if usernames:
+        conditions.append(f"username IN ({','.join('?' * len(usernames))})")
+        params.extend(username.upper() for username in usernames)
+    if performers_only:
+        conditions.append("is_performer = 1")
+
+    query = "SELECT id FROM users"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY coin_balance DESC"
+    if top:
+        query += " LIMIT ?"
+        params.append(top)
+
+    return [row["id"] for row in db.execute(query, params).fetchall()]
+
+
+def get_balance_history(hours_back=0.5, user_ids=None, since=None):
+    """Get balance history over the specified time period.
+
+    Covers all users unless ``user_ids`` is given. When ``since`` (a naive UTC
+    datetime) is given, only snapshots taken after it are returned instead.
+    """
+    db = get_read_db()
+
+    if since is not None:
+        time_filter = "bs.timestamp > ?"
+        params = [since.strftime("%Y-%m-%d %H:%M:%S")]
+    else:
+        time_filter = "bs.timestamp >= datetime('now', '-' || ? || ' hours')"
+        params = [hours_back]
+
+    if user_ids is not None:
+        if not user_ids:
+            return []
+        user_filter = f"AND bs.user_id IN ({','.join('?' * len(user_ids))})"
+        params.extend(user_ids)
+    else:
+        user_filter = ""
 
     # Get snapshots from the last X hours
     snapshots = db.execute(
-        """
+        f"""
         SELECT bs.timestamp, u.username, bs.balance
         FROM balance_snapshots bs
         JOIN users u ON bs.user_id = u.id
-        WHERE bs.timestamp >= datetime('now', '-' || ? || ' hours')
+        WHERE {time_filter} {user_filter}
         ORDER BY bs.timestamp ASC
         """,
-        (hours_back,),
+        params,
     ).fetchall()
 
     return [dict(snapshot) for snapshot in snapshots]
 
 
-def get_current_leaderboard_with_snapshots():
-    """Get current leaderboard with latest balance snapshots."""
+def get_snapshot_balances_at(moment, user_ids=None):
+    """Get each user's latest snapshot balance at or before ``moment``.
+
+    Returns ``{username: balance}``; users with no snapshot yet are left out.
+    Covers all users unless ``user_ids`` is given.
+    """
+    db = get_read_db()
+
+    params = [moment.strftime("%Y-%m-%d %H:%M:%S")]
+    if user_ids is not None:
+        if not user_ids:
+            return {}
+        user_filter = f"WHERE u.id IN ({','.join('?' * len(user_ids))})"
+        params.extend(user_ids)
+    else:
+        user_filter = ""
+
+    # One (user_id, timestamp) index probe per user
+    rows = db.execute(
+        f"""
+        SELECT u.username,
+               (SELECT bs.balance FROM balance_snapshots bs
+                WHERE bs.user_id = u.id AND bs.timestamp <= ?
+                ORDER BY bs.timestamp DESC, bs.id DESC LIMIT 1) as balance
+        FROM users u
+        {user_filter}
+        """,
+        params,
+    ).fetchall()
+
+    return {row["username"]: row["balance"] for row in rows if row["balance"] is not None}
+
+
+def get_current_leaderboard_with_snapshots(user_ids=None):
+    """Get current leaderboard with latest balance snapshots.
+
+    Covers all users unless ``user_ids`` is given.
+    """
     db = get_db()
 
-    # Get current balances and create snapshots if none exist recently
+    if user_ids is not None:
+        if not user_ids:
+            return []
+        user_filter = f"WHERE u.id IN ({','.join('?' * len(user_ids))})"
+        params = list(user_ids)
+    else:
+        user_filter = ""
+        params = []
+
+    # Latest snapshot per user comes from the (user_id, timestamp) index
     users = db.execute(
-        """
+        f"""
         SELECT u.id, u.username, u.coin_balance, u.created_at,
-               bs.timestamp as last_snapshot
+               (SELECT MAX(timestamp) FROM balance_snapshots WHERE user_id = u.id) as last_snapshot
         FROM users u
-        LEFT JOIN (
-            SELECT user_id, MAX(timestamp) as timestamp
-            FROM balance_snapshots
-            GROUP BY user_id
-        ) bs ON u.id = bs.user_id
+        {user_filter}
         ORDER BY u.coin_balance DESC
-        """
+        """,
+        params,
     ).fetchall()
 
     # Create snapshots for users who don't have recent ones (within last 5 minutes)
-    current_time = db.execute("SELECT datetime('now') as now").fetchone()["now"]
+    stale_before = db.execute(
+        "SELECT datetime('now', '-5 minutes') as cutoff"
+    ).fetchone()["cutoff"]
 
     for user in users:
-        if (
-            not user["last_snapshot"]
-            or db.execute(
-                "SELECT (julianday(?) - julianday(?)) * 24 * 60 as minutes_diff",
-                (current_time, user["last_snapshot"]),
-            ).fetchone()["minutes_diff"]
-            > 5
-        ):
+        last_snapshot = user["last_snapshot"]
+        if last_snapshot is not None and not isinstance(last_snapshot, str):
+            last_snapshot = last_snapshot.strftime("%Y-%m-%d %H:%M:%S")
+        if not last_snapshot or last_snapshot < stale_before:
             create_balance_snapshot(user["id"], user["coin_balance"])
 
     return [dict(user) for user in users]
@@ -675,11 +1634,12 @@ def set_user_performer_status(username, is_performer):
     db = get_db()
     try:
         # Update the user's performer status
-        db.execute(
-            "UPDATE users SET is_performer = ? WHERE username = ?",
+        users = db.execute(
+            "UPDATE users SET is_performer = ? WHERE username = ? RETURNING id",
             (is_performer, username.upper()),
-        )
-        db.commit()
+        ).fetchall()
+        commit_shared(db)
+        leaderboard.refresh(db, [user["id"] for user in users])
         return True
     except sqlite3.Error:
         return False
@@ -712,21 +1672,23 @@ def get_audience_members():
     return [dict(member) for member in audience]
 
 
+@traced()
 def performer_redistribution():
     """Redistribute 5 coins from each performer to every audience member."""
     db = get_db()
 
     # Get all performers and audience members
-    performers = db.execute(
-        "SELECT id, username, coin_balance FROM users WHERE is_performer = 1"
-    ).fetchall()
+    with span("lookup_users"):
+        performers = db.execute(
+            "SELECT id, username, coin_balance FROM users WHERE is_performer = 1"
+        ).fetchall()
 
-    # Get audience members but exclude The CHANCELLOR
-    quant_username = current_app.config.get("QUANT_USERNAME", "CHANCELLOR")
-    audience = db.execute(
-        "SELECT id, username, coin_balance FROM users WHERE is_performer = 0 AND username != ?",
-        (quant_username,),
-    ).fetchall()
+        # Get audience members but exclude The CHANCELLOR
+        quant_username = current_app.config.get("QUANT_USERNAME", "CHANCELLOR")
+        audience = db.execute(
+            "SELECT id, username, coin_balance FROM users WHERE is_performer = 0 AND username != ?",
+            (quant_username,),
+        ).fetchall()
 
     if not performers or not audience:
         return {"success": False, "message": "No performers or audience members found"}
@@ -735,19 +1697,7 @@ def performer_redistribution():
     performer_count = len(performers)
     
     # Get redistribution amount from config or file
-    coins_per_performer_to_each_audience = 5  # Default
-    try:
-        import os
-        instance_path = current_app.instance_path
-        redistribution_file = os.path.join(instance_path, "redistribution_amount.txt")
-        
-        if os.path.exists(redistribution_file):
-            with open(redistribution_file, "r") as f:
-                coins_per_performer_to_each_audience = int(f.read().strip())
-        else:
-            coins_per_performer_to_each_audience = current_app.config.get("CURRENT_REDISTRIBUTION_AMOUNT", 5)
-    except Exception:
-        coins_per_performer_to_each_audience = current_app.config.get("PERFORMER_COIN_LOSS_PER_INTERVAL", 5)
+    coins_per_performer_to_each_audience = get_redistribution_amount()
     
     total_coins_needed_per_performer = (
         coins_per_performer_to_each_audience * audience_count
@@ -756,43 +1706,43 @@ def performer_redistribution():
 
     try:
         # Start transaction
-        for performer in performers:
-            # Check if performer has enough coins
-            if performer["coin_balance"] < total_coins_needed_per_performer:
-                continue  # Skip performers who don't have enough coins
-
-            # Deduct total coins from performer
-            db.execute(
-                "UPDATE users SET coin_balance = coin_balance - ? WHERE id = ?",
-                (total_coins_needed_per_performer, performer["id"]),
-            )
-
-            # Give 5 coins to each audience member
-            for audience_member in audience:
-                # Add coins to audience member
-                db.execute(
-                    "UPDATE users SET coin_balance = coin_balance + ? WHERE id = ?",
-                    (coins_per_performer_to_each_audience, audience_member["id"]),
-                )
+        with span("move_coins", performers=performer_count, audience=audience_count):
+            for performer in performers:
+                # Deduct total coins from performer, skipping those who can't cover it
+                if debit_balance(db, performer["id"], total_coins_needed_per_performer) is None:
+                    continue
+
+                # Give 5 coins to each audience member
+                for audience_member in audience:
+                    # Add coins to audience member
+                    db.execute(
+                        "UPDATE users SET coin_balance = coin_balance + ? WHERE id = ?",
+                        (coins_per_performer_to_each_audience, audience_member["id"]),
+                    )
 
-                # Create transaction record
-                db.execute(
-                    "INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, status) VALUES (?, ?, ?, ?, ?)",
-                    (
-                        performer["id"],
-                        audience_member["id"],
-                        coins_per_performer_to_each_audience,
-                        "redistribution",
-                        "approved",
-                    ),
-                )
+                    # Create transaction record
+                    db.execute(
+                        "INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, status) VALUES (?, ?, ?, ?, ?)",
+                        (
+                            performer["id"],
+                            audience_member["id"],
+                            coins_per_performer_to_each_audience,
+                            "redistribution",
+                            "approved",
+                        ),
+                    )
 
-            total_coins_redistributed += total_coins_needed_per_performer
+                total_coins_redistributed += total_coins_needed_per_performer
 
-        db.commit()
+        commit_ledger(
+            db,
+            [performer["id"] for performer in performers]
+            + [audience_member["id"] for audience_member in audience],
+        )
 
         # Create balance snapshots for all users after redistribution
-        create_balance_snapshots_for_all_users()
+        with span("snapshots"):
+            create_balance_snapshots_for_all_users()
 
         return {
             "success": True,
@@ -885,14 +1835,9 @@ def create_quant_command():
         click.echo(f"❌ {quant_username} already exists")
         return
 
-    # Create The Quant user
-    user_id = create_user(quant_username, is_performer=False)
+    # Create The Quant user (they start with no coins)
+    user_id = create_user(quant_username, is_performer=False, starting_balance=0)
     if user_id:
-        # Set balance to 0 (they should start with no coins)
-        db.execute(
-            "UPDATE users SET coin_balance = 0 WHERE username = ?", (quant_username,)
-        )
-        db.commit()
         click.echo(f"✅ Created {quant_username} with 0 coins (audience member)")
     else:
         click.echo(f"❌ Failed to create {quant_username}")
@@ -932,37 +1877,64 @@ def run_production_command(host, port):
     app.run(host=host, port=port, debug=False)
 
 
+# Runtime settings are mirrored in memory so heartbeat endpoints never read
+# files on every poll. Backing files are re-checked at most every couple of
+# seconds so changes made from the CLI in another process still propagate.
+SETTINGS_RECHECK_SECONDS = 2.0
+_settings_cache = {}
+
+
+def _read_cached_setting(path, parse):
+    """Read a small settings file through the in-memory cache."""
+    now = time.monotonic()
+    cached = _settings_cache.get(path)
+    if cached and now - cached["checked"] < SETTINGS_RECHECK_SECONDS:
+        return cached["value"]
+
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+
+    if cached and cached["mtime"] == mtime:
+        cached["checked"] = now
+        return cached["value"]
+
+    value = None
+    if mtime is not None:
+        try:
+            with open(path, "r") as f:
+                value = parse(f.read().strip())
+        except (OSError, ValueError):
+            value = None
+
+    _settings_cache[path] = {"value": value, "mtime": mtime, "checked": now}
+    return value
+
+
 def _get_market_override_file():
     """Get the path to the market override file."""
-    import os
-    from flask import current_app
+    return os.path.join(current_app.instance_path, "market_override.txt")
 
-    instance_path = current_app.instance_path
-    return os.path.join(instance_path, "market_override.txt")
 
+def _parse_market_override(content):
+    if content == "OPEN":
+        return True
+    elif content == "CLOSED":
+        return False
+    return None
 
-def _read_market_override():
-    """Read market override from file."""
-    import os
 
+def _read_market_override():
+    """Read market override from file (cached in memory)."""
     try:
-        override_file = _get_market_override_file()
-        if os.path.exists(override_file):
-            with open(override_file, "r") as f:
-                content = f.read().strip()
-                if content == "OPEN":
-                    return True
-                elif content == "CLOSED":
-                    return False
-        return None
+        return _read_cached_setting(_get_market_override_file(), _parse_market_override)
     except Exception:
         return None
 
 
 def _write_market_override(status):
     """Write market override to file."""
-    import os
-
     try:
         override_file = _get_market_override_file()
         os.makedirs(os.path.dirname(override_file), exist_ok=True)
@@ -977,6 +1949,45 @@ def _write_market_override(status):
                 f.write("OPEN" if status else "CLOSED")
     except Exception:
         pass
+    finally:
+        _settings_cache.pop(_get_market_override_file(), None)
+
+
+def _get_redistribution_file():
+    """Get the path to the persisted redistribution amount."""
+    return os.path.join(current_app.instance_path, "redistribution_amount.txt")
+
+
+def get_redistribution_amount():
+    """Get the current performer redistribution amount (cached in memory)."""
+    try:
+        amount = _read_cached_setting(_get_redistribution_file(), int)
+    except Exception:
+        amount = None
+
+    if amount is None:
+        amount = current_app.config.get(
+            "CURRENT_REDISTRIBUTION_AMOUNT",
+            current_app.config.get("PERFORMER_COIN_LOSS_PER_INTERVAL", 5),
+        )
+    return amount
+
+
+def set_redistribution_amount(amount):
+    """Update the redistribution amount in config and persist it to file."""
+    current_app.config["CURRENT_REDISTRIBUTION_AMOUNT"] = amount
+
+    redistribution_file = _get_redistribution_file()
+    try:
+        os.makedirs(os.path.dirname(redistribution_file), exist_ok=True)
+        with open(redistribution_file, "w") as f:
+            f.write(str(amount))
+        return True
+    except Exception as e:
+        current_app.logger.error(f"Failed to save redistribution amount: {e}")
+        return False
+    finally:
+        _settings_cache.pop(redistribution_file, None)
 
 
 def is_market_open():
@@ -1119,13 +2130,8 @@ def _create_initial_users():
     
     # Create CHANCELLOR (audience member with 0 coins)
     if 'CHANCELLOR' not in existing_usernames:
-        user_id = create_user('CHANCELLOR', is_performer=False)
+        user_id = create_user('CHANCELLOR', is_performer=False, starting_balance=0)
         if user_id:
-            # Set CHANCELLOR balance to 0
-            db.execute(
-                "UPDATE users SET coin_balance = 0 WHERE username = 'CHANCELLOR'"
-            )
-            db.commit()
             created_users.append("✅ Created CHANCELLOR (Audience, 0 coins)")
         else:
             click.echo("❌ Failed to create CHANCELLOR")
@@ -1141,6 +2147,63 @@ def _create_initial_users():
         click.echo("ℹ️  All initial users already exist")
 
 
+def remove_users(user_ids):
+    """Delete users and every ledger row that involves them.
+
+    Coins the remaining users gained from (or lost to) the removed ones are
+    re-booked as mints (or burns), so every remaining balance still equals its
+    ledger net. Replay checkpoints covered the deleted rows and are dropped.
+    """
+    if not user_ids:
+        return
+
+    db = get_db()
+    removed = f"({','.join('?' * len(user_ids))})"
+    nets = db.execute(
+        f"""
+        SELECT user_id, SUM(amount) AS net
+        FROM (
+            SELECT recipient_id AS user_id, amount FROM transactions
+            WHERE status = 'approved' AND sender_id IN {removed} AND recipient_id NOT IN {removed}
+            UNION ALL
+            SELECT sender_id, -amount FROM transactions
+            WHERE status = 'approved' AND recipient_id IN {removed} AND sender_id NOT IN {removed}
+        )
+        WHERE user_id != {SYSTEM_ACCOUNT_ID}
+        GROUP BY user_id
+        HAVING net != 0
+        """,
+        user_ids * 4,
+    ).fetchall()
+
+    db.execute(
+        f"DELETE FROM transactions WHERE sender_id IN {removed} OR recipient_id IN {removed}",
+        user_ids * 2,
+    )
+    db.executemany(
+        "INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, request_text, status) VALUES (?, ?, ?, ?, 'Re-booked from removed users', 'approved')",
+        [
+            (SYSTEM_ACCOUNT_ID, row["user_id"], row["net"], "mint")
+            if row["net"] > 0
+            else (row["user_id"], SYSTEM_ACCOUNT_ID, -row["net"], "burn")
+            for row in nets
+        ],
+    )
+    for table, column in (
+        ("balance_snapshots", "user_id"),
+        ("user_stats", "user_id"),
+        ("user_type_stats", "user_id"),
+        ("users", "id"),
+    ):
+        db.execute(f"DELETE FROM {table} WHERE {column} IN {removed}", user_ids)
+    db.execute("DELETE FROM ledger_checkpoints")
+    commit_ledger(db, full=True)
+
+    offer_index.invalidate()
+    # Remaining users' stats counted transfers with the removed users
+    rebuild_user_stats(db)
+
+
 @click.command("create-fake-users")
 @click.option("--performers", default=3, help="Number of performers to create")
 @click.option("--audience", default=8, help="Number of audience members to create")
@@ -1192,14 +2255,17 @@ def create_fake_users_command(performers, audience, clear):
         db = get_db()
         # Remove fake users (keep essential ones like CHANCELLOR)
         essential_users = ["CHANCELLOR", "Alex"]  # Keep core users
-        db.execute(
-            "DELETE FROM users WHERE username NOT IN ({})".format(
-                ",".join(["?" for _ in essential_users])
-            ),
-            essential_users,
-        )
-        db.commit()
-        click.echo("✅ Existing fake users cleared")
+        user_ids = [
+            row["id"]
+            for row in db.execute(
+                "SELECT id FROM users WHERE username NOT IN ({})".format(
+                    ",".join(["?" for _ in essential_users])
+                ),
+                essential_users,
+            ).fetchall()
+        ]
+        remove_users(user_ids)
+        click.echo(f"✅ Cleared {len(user_ids)} existing fake users")
 
     created_users = []
 
@@ -1210,15 +2276,10 @@ def create_fake_users_command(performers, audience, clear):
     )
 
     for name in selected_performers:
-        user_id = create_user(name, is_performer=True)
+        # Give performers varied starting balances (8000-15000)
+        balance = random.randint(8000, 15000)
+        user_id = create_user(name, is_performer=True, starting_balance=balance)
         if user_id:
-            # Give performers varied starting balances (8000-15000)
-            balance = random.randint(8000, 15000)
-            db = get_db()
-            db.execute(
-                "UPDATE users SET coin_balance = ? WHERE id = ?", (balance, user_id)
-            )
-            db.commit()
             created_users.append(f"🎭 {name} (Performer): {balance:,} coins")
             click.echo(f"   ✅ Created performer: {name} with {balance:,} coins")
         else:
@@ -1231,15 +2292,10 @@ def create_fake_users_command(performers, audience, clear):
     )
 
     for name in selected_audience:
-        user_id = create_user(name, is_performer=False)
+        # Give audience varied starting balances (7000-12000)
+        balance = random.randint(7000, 12000)
+        user_id = create_user(name, is_performer=False, starting_balance=balance)
         if user_id:
-            # Give audience varied starting balances (7000-12000)
-            balance = random.randint(7000, 12000)
-            db = get_db()
-            db.execute(
-                "UPDATE users SET coin_balance = ? WHERE id = ?", (balance, user_id)
-            )
-            db.commit()
             created_users.append(f"👤 {name} (Audience): {balance:,} coins")
             click.echo(f"   ✅ Created audience member: {name} with {balance:,} coins")
         else:
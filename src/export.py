@@ -0,0 +1,123 @@
+"""Streaming exports of the Straw Coin ledger and balance snapshots.
+
+Rows are read from SQLite in chunks and formatted as NDJSON or CSV one chunk
+at a time, so exporting millions of rows after a show uses constant memory in
+both the web worker and the CLI.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+
+from .db import get_db
+
+# Rows fetched (and formatted) per chunk
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# Columns and query for each export. Timestamps are CAST to text so rows stay
+# plain strings instead of datetimes; the system account (id 0) has no user row.
+EXPORTS = {
+    "transactions": (
+        ["id", "timestamp", "sender", "recipient", "amount", "transaction_type", "status", "request_text"],
+        """
+        SELECT t.id, CAST(t.timestamp AS TEXT), COALESCE(s.username, 'SYSTEM'),
+               COALESCE(r.username, 'SYSTEM'), t.amount, t.transaction_type, t.status, t.request_text
+        FROM transactions t
+        LEFT JOIN users s ON s.id = t.sender_id
+        LEFT JOIN users r ON r.id = t.recipient_id
+        WHERE t.timestamp >= ? AND t.timestamp < ?
+        ORDER BY t.id
+        """,
+    ),
+    "snapshots": (
+        ["id", "timestamp", "username", "balance"],
+        """
+        SELECT b.id, CAST(b.timestamp AS TEXT), u.username, b.balance
+        FROM balance_snapshots b
+        JOIN users u ON u.id = b.user_id
+        WHERE b.timestamp >= ? AND b.timestamp < ?
+        ORDER BY b.id
+        """,
+    ),
+}
+
+
+def parse_time_bound(value):
+    """Normalize an ISO date/time to SQLite's timestamp text, or None if empty.
+
+    Raises ValueError for anything that isn't an ISO date or date-time.
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def iter_export_chunks(kind, start=None, end=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield lists of row tuples for an export, oldest first."""
+    _, query = EXPORTS[kind]
+    cursor = get_db().cursor()
+    cursor.row_factory = None
+    cursor.execute(query, (start or "", end or "9999-12-31 23:59:59"))
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def stream_export(kind, fmt="ndjson", start=None, end=None):
+    """Yield an export as text, one formatted chunk at a time."""
+    columns, _ = EXPORTS[kind]
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+
+        for rows in iter_export_chunks(kind, start, end):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue()
+    else:
+        for rows in iter_export_chunks(kind, start, end):
+            yield "".join(
+                json.dumps(dict(zip(columns, row)), separators=(",", ":")) + "\n"
+                for row in rows
+            )
+
+
+def _export_command(kind):
+    @click.option("--format", "fmt", type=click.Choice(EXPORT_FORMATS), default="ndjson", help="Output format")
+    @click.option("--start", default=None, help="Only rows at or after this ISO date/time (UTC)")
+    @click.option("--end", default=None, help="Only rows before this ISO date/time (UTC)")
+    @click.option("--output", type=click.File("w", encoding="utf-8"), default="-", help="Output file (default: stdout)")
+    @with_appcontext
+    def command(fmt, start, end, output):
+        try:
+            start, end = parse_time_bound(start), parse_time_bound(end)
+        except ValueError as e:
+            raise click.BadParameter(str(e))
+
+        for chunk in stream_export(kind, fmt, start, end):
+            output.write(chunk)
+
+    command.__doc__ = f"Stream {kind} as NDJSON or CSV."
+    return click.command(f"export-{kind}")(command)
+
+
+export_transactions_command = _export_command("transactions")
+export_snapshots_command = _export_command("snapshots")
+
+
+def init_app(app):
+    app.cli.add_command(export_transactions_command)
+    app.cli.add_command(export_snapshots_command)
@@ -0,0 +1,218 @@
+"""Idempotency keys for Straw Coin's transfer endpoints.
+
+Phones on venue Wi-Fi retry requests whose responses got lost, and a retried
+transfer would otherwise move the coins twice. Clients send an
+``Idempotency-Key`` header (any unique string, e.g. a UUID per tap); the
+first response for a key is stored and later requests with the same key get
+that response back without touching ``users`` or ``transactions``.
+
+A key is claimed by inserting a pending ``idempotency_keys`` row before the
+request runs, so a retry reaching another worker (or arriving after a crash)
+finds the claim instead of running the transfer again. The row is filled in
+with the response afterwards. Completed responses are also kept in a bounded
+in-memory LRU for fast replays. Both expire after ``IDEMPOTENCY_TTL`` seconds.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, g, jsonify, request
+
+from .db import get_db
+from .metrics import metrics
+
+# Stored responses kept in memory; older ones are still found in SQLite
+IDEMPOTENCY_CACHE_MAX_ENTRIES = 5000
+
+# Default lifetime of a stored response, in seconds
+DEFAULT_IDEMPOTENCY_TTL = 6 * 60 * 60
+
+# Expired rows are deleted at most this often, in seconds
+PURGE_INTERVAL = 60
+
+# status_code of a claimed key whose request hasn't finished
+PENDING_STATUS = 0
+
+MAX_KEY_LENGTH = 128
+
+
+class IdempotencyCache:
+    """LRU of stored responses with per-entry expiry."""
+
+    def __init__(self, max_entries=IDEMPOTENCY_CACHE_MAX_ENTRIES):
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self._entries = OrderedDict()  # (username, key) -> (expires_at, endpoint, status, body)
+        self.last_purge = 0
+
+    def get(self, cache_key, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return entry[1:]
+
+    def put(self, cache_key, expires_at, endpoint, status, body):
+        with self._lock:
+            self._entries[cache_key] = (expires_at, endpoint, status, body)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global cache shared by every request thread in this process
+idempotency_cache = IdempotencyCache()
+
+
+def _claim_key(cache_key, ttl, endpoint):
+    """Claim a key with a pending row.
+
+    Returns None if this request now holds the key, else the existing row's
+    ``(endpoint, status_code, response_body)``; a status of PENDING_STATUS
+    means its request is still running (or its worker died mid-request).
+    """
+    db = get_db()
+    # An expired row for this key no longer counts
+    db.execute(
+        """
+        DELETE FROM idempotency_keys
+        WHERE username = ? AND idempotency_key = ?
+              AND created_at < datetime('now', '-' || ? || ' seconds')
+        """,
+        (*cache_key, ttl),
+    )
+    claimed = db.execute(
+        """
+        INSERT INTO idempotency_keys
+            (username, idempotency_key, endpoint, status_code, response_body)
+        VALUES (?, ?, ?, ?, '')
+        ON CONFLICT (username, idempotency_key) DO NOTHING
+        """,
+        (*cache_key, endpoint, PENDING_STATUS),
+    ).rowcount
+
+    now = time.time()
+    if claimed and now - idempotency_cache.last_purge > PURGE_INTERVAL:
+        idempotency_cache.last_purge = now
+        db.execute(
+            "DELETE FROM idempotency_keys WHERE created_at < datetime('now', '-' || ? || ' seconds')",
+            (ttl,),
+        )
+    db.commit()
+    if claimed:
+        return None
+
+    row = db.execute(
+        """
+        SELECT endpoint, status_code, response_body,
+               CAST(strftime('%s', created_at) AS INTEGER) AS created_epoch
+        FROM idempotency_keys
+        WHERE username = ? AND idempotency_key = ?
+        """,
+        cache_key,
+    ).fetchone()
+    stored = (row["endpoint"], row["status_code"], row["response_body"])
+    if row["status_code"] != PENDING_STATUS:
+        idempotency_cache.put(cache_key, row["created_epoch"] + ttl, *stored)
+    return stored
+
+
+def _store_response(cache_key, ttl, endpoint, status, body):
+    db = get_db()
+    db.execute(
+        """
+        UPDATE idempotency_keys SET status_code = ?, response_body = ?
+        WHERE username = ? AND idempotency_key = ?
+        """,
+        (status, body, *cache_key),
+    )
+    db.commit()
+    idempotency_cache.put(cache_key, time.time() + ttl, endpoint, status, body)
+
+
+def _release_key(cache_key):
+    """Drop a claim whose request failed, so the client can retry."""
+    db = get_db()
+    db.rollback()
+    db.execute(
+        "DELETE FROM idempotency_keys WHERE username = ? AND idempotency_key = ? AND status_code = ?",
+        (*cache_key, PENDING_STATUS),
+    )
+    db.commit()
+
+
+def idempotent(f):
+    """Replay the stored response for a repeated ``Idempotency-Key``.
+
+    Apply below ``require_auth``/``require_quant`` (keys are scoped to the
+    session user) and above ``rate_limited``, so replays don't spend tokens.
+    Requests without the header run normally. Only responses below 500
+    (other than 429) are stored; otherwise the claim is dropped so the
+    request can be retried. A key whose worker died mid-request stays
+    claimed until it expires, since its transfer may already have committed.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get("Idempotency-Key", "").strip()
+        identity = g.get("identity")
+        if not key or identity is None:
+            return f(*args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify(
+                {"error": "Idempotency-Key is too long", "status": "invalid_idempotency_key"}
+            ), 400
+
+        ttl = current_app.config.get("IDEMPOTENCY_TTL", DEFAULT_IDEMPOTENCY_TTL)
+        cache_key = (identity["username"].upper(), key)
+
+        stored = idempotency_cache.get(cache_key) or _claim_key(cache_key, ttl, request.endpoint)
+        if stored is None:
+            try:
+                response = current_app.make_response(f(*args, **kwargs))
+            except BaseException:
+                _release_key(cache_key)
+                raise
+            if response.status_code < 500 and response.status_code != 429:
+                _store_response(
+                    cache_key, ttl, request.endpoint,
+                    response.status_code, response.get_data(as_text=True),
+                )
+            else:
+                _release_key(cache_key)
+            return response
+
+        endpoint, status, body = stored
+        if endpoint != request.endpoint:
+            return jsonify(
+                {
+                    "error": "Idempotency-Key was already used for a different request",
+                    "status": "idempotency_key_reused",
+                }
+            ), 422
+        if status == PENDING_STATUS:
+            return jsonify(
+                {
+                    "error": "A request with this Idempotency-Key is still being processed",
+                    "status": "request_in_progress",
+                }
+            ), 409
+
+        metrics.increment("idempotent_replays")
+        response = current_app.response_class(body, status=status, mimetype="application/json")
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    return decorated_function
@@ -0,0 +1,72 @@
+"""In-process ledger bookkeeping for Straw Coin.
+
+Every committed write that changes balances is published to the journal,
+which bumps a monotonically increasing ledger version and remembers which
+users (and approved offers) were touched. Cheap endpoints such as
+``/api/pulse`` and ``/api/leaderboard/sync`` answer from this state instead
+of rescanning SQLite.
+"""
+
+import threading
+import uuid
+from collections import deque
+
+# How many committed writes the journal remembers for delta syncs. Clients
+# further behind than this get a full reset instead of a delta.
+JOURNAL_MAX_ENTRIES = 1000
+
+
+class LedgerJournal:
+    """Bounded in-memory change log keyed by a monotonic ledger version."""
+
+    def __init__(self, max_entries=JOURNAL_MAX_ENTRIES):
+        self._lock = threading.Lock()
+        # Versions restart with the process; the epoch tells clients when that happened
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._entries = deque(maxlen=max_entries)
+
+    def publish(self, user_ids=(), offer_ids=(), full=False):
+        """Record a committed balance change and return the new version.
+
+        ``full`` marks writes too broad to track per user (bulk imports,
+        resets); clients syncing across one of them get a full reset.
+        """
+        with self._lock:
+            self.version += 1
+            self._entries.append(
+                (self.version, frozenset(user_ids), tuple(offer_ids), full)
+            )
+            return self.version
+
+    def changes_since(self, since):
+        """Return ``(user_ids, offer_ids)`` changed after ``since``.
+
+        Returns None when the caller is too far behind (or ahead, after a
+        restart) and must fetch a full reset instead.
+        """
+        with self._lock:
+            if since > self.version:
+                return None
+            if since == self.version:
+                return set(), []
+
+            oldest_version = self._entries[0][0] if self._entries else self.version + 1
+            if since < oldest_version - 1:
+                return None
+
+            user_ids = set()
+            offer_ids = []
+            for version, entry_users, entry_offers, full in reversed(self._entries):
+                if version <= since:
+                    break
+                if full:
+                    return None
+                user_ids.update(entry_users)
+                offer_ids.extend(entry_offers)
+
+            return user_ids, offer_ids
+
+
+# Global journal instance shared by every request thread in this process
+journal = LedgerJournal()
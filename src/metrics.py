@@ -0,0 +1,41 @@
+"""In-process operational metrics for Straw Coin.
+
+Background jobs and hot paths record counters (monotonic totals) and gauges
+(latest values) here; the CHANCELLOR reads them from ``/api/quant/metrics``.
+"""
+
+import threading
+import time
+
+
+class Metrics:
+    """Thread-safe counters and gauges."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._counters = {}
+        self._gauges = {}
+
+    def increment(self, name, value=1):
+        """Add ``value`` to a counter."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        """Record the latest value of a gauge."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def snapshot(self):
+        """Return a copy of every counter and gauge."""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "uptime_seconds": round(time.time() - self.started_at, 1),
+            }
+
+
+# Global metrics registry shared by every thread in this process
+metrics = Metrics()
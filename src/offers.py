@@ -0,0 +1,149 @@
+"""In-process index of pending offers for Straw Coin.
+
+The CHANCELLOR's terminal polls the pending-offer queue constantly during a
+show. Instead of rescanning ``transactions`` joined twice against ``users``
+on every poll, pending offers live in memory, keyed by recipient and ordered
+by time. The index is loaded from SQLite on first use, kept current as offers
+are created and resolved, and versioned so clients can fetch only what
+changed since their last poll.
+"""
+
+import bisect
+import threading
+import uuid
+from collections import deque
+
+# How many offer changes are remembered for incremental fetches. Clients
+# further behind than this get a full reset instead.
+OFFER_CHANGES_MAX_ENTRIES = 1000
+
+
+class PendingOfferIndex:
+    """Pending offers by id and by recipient, with a bounded change log."""
+
+    def __init__(self, max_entries=OFFER_CHANGES_MAX_ENTRIES):
+        self._lock = threading.Lock()
+        # Versions restart with the process; the epoch tells clients when that happened
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._loaded = False
+        self._offers = {}
+        self._by_recipient = {}  # recipient username -> offer ids, oldest first
+        self._changes = deque(maxlen=max_entries)
+
+    def ensure_loaded(self, db):
+        """Load pending offers from SQLite unless already loaded."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+
+            offers = db.execute(
+                """
+                SELECT t.id, t.amount, t.timestamp, t.request_text,
+                       s.username as sender, r.username as recipient
+                FROM transactions t
+                JOIN users s ON t.sender_id = s.id
+                JOIN users r ON t.recipient_id = r.id
+                WHERE t.status = 'pending' AND t.transaction_type = 'offer'
+                ORDER BY t.id
+                """
+            ).fetchall()
+
+            self._offers = {}
+            self._by_recipient = {}
+            for offer in offers:
+                self._insert(dict(offer))
+
+            # Anything clients saw before this load is stale
+            self.version += 1
+            self._changes.clear()
+            self._loaded = True
+
+    def invalidate(self):
+        """Drop the index after bulk writes; the next read reloads it."""
+        with self._lock:
+            self._loaded = False
+            self.version += 1
+            self._changes.clear()
+
+    def add(self, offer):
+        """Record a newly created pending offer."""
+        with self._lock:
+            # Not loaded yet: the next load reads it from SQLite
+            if not self._loaded or offer["id"] in self._offers:
+                return
+            self._insert(dict(offer))
+            self.version += 1
+            self._changes.append((self.version, offer["id"], True))
+
+    def remove(self, offer_ids):
+        """Drop offers that were approved, denied or expired."""
+        with self._lock:
+            if not self._loaded:
+                return
+            for offer_id in offer_ids:
+                offer = self._offers.pop(offer_id, None)
+                if offer is None:
+                    continue
+                recipient_ids = self._by_recipient[offer["recipient"]]
+                del recipient_ids[bisect.bisect_left(recipient_ids, offer_id)]
+                if not recipient_ids:
+                    del self._by_recipient[offer["recipient"]]
+                self.version += 1
+                self._changes.append((self.version, offer_id, False))
+
+    def __len__(self):
+        return len(self._offers)
+
+    def pending(self, recipient=None):
+        """Return pending offers, newest first, optionally for one recipient."""
+        with self._lock:
+            if recipient is None:
+                offer_ids = sorted(self._offers, reverse=True)
+            else:
+                offer_ids = reversed(self._by_recipient.get(recipient, ()))
+            return [dict(self._offers[offer_id]) for offer_id in offer_ids]
+
+    def changes_since(self, since, recipient=None):
+        """Return ``(added_offers, removed_ids)`` changed after ``since``.
+
+        Returns None when the caller is too far behind (or ahead, after a
+        restart or reload) and must fetch the full queue instead.
+        """
+        with self._lock:
+            if since > self.version:
+                return None
+            if since == self.version:
+                return [], []
+
+            oldest_version = self._changes[0][0] if self._changes else self.version + 1
+            if since < oldest_version - 1:
+                return None
+
+            changed = {}
+            for version, offer_id, added in self._changes:
+                if version > since:
+                    changed[offer_id] = added
+
+            added_offers = []
+            removed_ids = []
+            for offer_id, added in changed.items():
+                offer = self._offers.get(offer_id)
+                if added and offer is not None:
+                    if recipient is None or offer["recipient"] == recipient:
+                        added_offers.append(dict(offer))
+                elif not added:
+                    removed_ids.append(offer_id)
+
+            added_offers.sort(key=lambda offer: offer["id"], reverse=True)
+            return added_offers, removed_ids
+
+    def _insert(self, offer):
+        self._offers[offer["id"]] = offer
+        bisect.insort(self._by_recipient.setdefault(offer["recipient"], []), offer["id"])
+
+
+# Global index shared by every request thread in this process
+offer_index = PendingOfferIndex()
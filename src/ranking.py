@@ -0,0 +1,131 @@
+"""In-process ranked leaderboard for Straw Coin.
+
+Leaderboard views and phones asking "what's my rank?" would otherwise sort
+the whole ``users`` table on every request. Instead every user is kept in a
+list sorted by ``(-coin_balance, id)`` (plus a second list for performers),
+so rank lookups are a binary search and top-N reads are a slice. The lists
+are loaded from SQLite on first use and repositioned by ``commit_ledger``
+whenever a write changes balances.
+"""
+
+import bisect
+import threading
+
+
+class RankedLeaderboard:
+    """Users ordered by balance, richest first, with O(log n) rank lookups."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._users = {}  # user id -> user dict
+        self._all = []  # (-coin_balance, id), ascending
+        self._performers = []
+
+    def ensure_loaded(self, db):
+        """Load every user from SQLite unless already loaded."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+
+            users = db.execute(
+                "SELECT id, username, coin_balance, is_performer FROM users"
+            ).fetchall()
+
+            self._users = {}
+            self._all = []
+            self._performers = []
+            for user in users:
+                user = dict(user)
+                self._users[user["id"]] = user
+                self._all.append(self._key(user))
+                if user["is_performer"]:
+                    self._performers.append(self._key(user))
+            self._all.sort()
+            self._performers.sort()
+            self._loaded = True
+
+    def invalidate(self):
+        """Drop the rankings after bulk writes; the next read reloads them."""
+        with self._lock:
+            self._loaded = False
+
+    def refresh(self, db, user_ids):
+        """Re-read the given users after a committed write and reposition them."""
+        if not self._loaded or not user_ids:
+            return
+
+        user_ids = list(set(user_ids))
+        # Read under the lock so a concurrent refresh of the same user can't
+        # apply an older balance after a newer one
+        with self._lock:
+            if not self._loaded:
+                return
+            users = db.execute(
+                f"SELECT id, username, coin_balance, is_performer FROM users WHERE id IN ({','.join('?' * len(user_ids))})",
+                user_ids,
+            ).fetchall()
+            for user_id in user_ids:
+                self._discard(user_id)
+            for user in users:
+                user = dict(user)
+                self._users[user["id"]] = user
+                bisect.insort(self._all, self._key(user))
+                if user["is_performer"]:
+                    bisect.insort(self._performers, self._key(user))
+
+    def __len__(self):
+        return len(self._all)
+
+    def top(self, k, performers_only=False):
+        """Return the ``k`` richest users (optionally performers only)."""
+        with self._lock:
+            keys = self._performers if performers_only else self._all
+            return [dict(self._users[user_id], rank=index + 1) for index, (_, user_id) in enumerate(keys[:k])]
+
+    def rank(self, user_id, performers_only=False):
+        """Return a user's 1-based rank, or None if they aren't ranked."""
+        with self._lock:
+            return self._rank(user_id, performers_only)
+
+    def around(self, user_id, k, performers_only=False):
+        """Return up to ``k`` users either side of a user, plus the user.
+
+        Returns an empty list if the user isn't ranked.
+        """
+        with self._lock:
+            rank = self._rank(user_id, performers_only)
+            if rank is None:
+                return []
+            keys = self._performers if performers_only else self._all
+            first = max(rank - 1 - k, 0)
+            return [
+                dict(self._users[neighbour_id], rank=first + offset + 1)
+                for offset, (_, neighbour_id) in enumerate(keys[first:rank + k])
+            ]
+
+    def _rank(self, user_id, performers_only):
+        user = self._users.get(user_id)
+        if user is None or (performers_only and not user["is_performer"]):
+            return None
+        keys = self._performers if performers_only else self._all
+        return bisect.bisect_left(keys, self._key(user)) + 1
+
+    def _discard(self, user_id):
+        user = self._users.pop(user_id, None)
+        if user is None:
+            return
+        key = self._key(user)
+        del self._all[bisect.bisect_left(self._all, key)]
+        if user["is_performer"]:
+            del self._performers[bisect.bisect_left(self._performers, key)]
+
+    @staticmethod
+    def _key(user):
+        return (-user["coin_balance"], user["id"])
+
+
+# Global leaderboard shared by every request thread in this process
+leaderboard = RankedLeaderboard()
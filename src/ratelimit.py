@@ -0,0 +1,114 @@
+"""Per-user rate limiting for Straw Coin's write endpoints.
+
+Every transfer takes the SQLite write lock, so one user (or script) hammering
+``/api/transfer`` slows everyone else down. Each user gets a token bucket per
+endpoint group: tokens refill at a steady rate up to a burst size, each
+request spends one, and requests that find the bucket empty are refused with
+``429`` and a ``Retry-After`` header instead of reaching the database.
+
+Limits come from ``RATE_LIMITS`` in the config, as ``{group: (tokens per
+second, burst)}``; groups without an entry are not limited. ``init_app``
+rejects a rate that isn't positive or a burst below one at startup.
+"""
+
+import math
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, jsonify
+
+from .metrics import metrics
+
+# Buckets idle this long are full again and can be forgotten
+IDLE_BUCKET_SECONDS = 300
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by user, refilled lazily on each request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}  # (group, key) -> (tokens, last refill time)
+        self._last_prune = time.monotonic()
+
+    def acquire(self, group, key, rate, burst, now=None):
+        """Spend one token; return 0 if allowed, else seconds until one refills."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.get((group, key), (burst, now))
+            tokens = min(burst, tokens + (now - last) * rate)
+
+            if tokens >= 1:
+                self._buckets[(group, key)] = (tokens - 1, now)
+                retry_after = 0
+            else:
+                self._buckets[(group, key)] = (tokens, now)
+                retry_after = (1 - tokens) / rate
+
+            if now - self._last_prune > IDLE_BUCKET_SECONDS:
+                self._prune(now)
+            return retry_after
+
+    def reset(self):
+        """Forget every bucket."""
+        with self._lock:
+            self._buckets.clear()
+
+    def _prune(self, now):
+        self._buckets = {
+            bucket: state
+            for bucket, state in self._buckets.items()
+            if now - state[1] < IDLE_BUCKET_SECONDS
+        }
+        self._last_prune = now
+
+
+# Global limiter shared by every request thread in this process
+limiter = TokenBucketLimiter()
+
+
+def rate_limited(group):
+    """Limit a view per session user with the ``group`` bucket from ``RATE_LIMITS``.
+
+    Apply below ``require_auth``/``require_quant`` so the user is known.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            limit = (current_app.config.get("RATE_LIMITS") or {}).get(group)
+            identity = g.get("identity")
+            if not limit or identity is None:
+                return f(*args, **kwargs)
+
+            rate, burst = limit
+            retry_after = limiter.acquire(group, identity["username"].upper(), rate, burst)
+            if retry_after:
+                metrics.increment(f"rate_limited_{group}")
+                retry_seconds = math.ceil(retry_after)
+                response = jsonify(
+                    {
+                        "error": f"Too many requests - try again in {retry_seconds}s",
+                        "retry_after": retry_seconds,
+                        "status": "rate_limited",
+                    }
+                )
+                response.status_code = 429
+                response.headers["Retry-After"] = str(retry_seconds)
+                return response
+
+            metrics.increment(f"rate_allowed_{group}")
+            return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
+
+
+def init_app(app):
+    for group, (rate, burst) in (app.config.get("RATE_LIMITS") or {}).items():
+        if rate <= 0 or burst < 1:
+            raise ValueError(
+                f"RATE_LIMITS[{group!r}] needs a rate above 0 and a burst of at least 1, got ({rate}, {burst})"
+            )
@@ -0,0 +1,389 @@
+"""Ledger replay engine for Straw Coin.
+
+Every balance is a fold over the approved rows of ``transactions`` in id
+order: genesis mints credit users from the system account, transfers move
+coins between users. This module streams the ledger in chunks with constant
+memory, resumes from the newest usable checkpoint and records new checkpoints
+as it goes, so rebuilding balances or snapshots costs only the tail of the log.
+"""
+
+import json
+import time
+from collections import deque
+
+import click
+from flask.cli import with_appcontext
+
+from .db import SYSTEM_ACCOUNT_ID, commit_ledger, get_db
+
+# Rows fetched per round trip while streaming the ledger
+REPLAY_CHUNK_SIZE = 5000
+
+# Ledger rows between checkpoints written during a replay
+CHECKPOINT_INTERVAL = 50000
+
+# Checkpoints kept after pruning
+CHECKPOINTS_TO_KEEP = 5
+
+# Recent ledger ids reported per drifting account
+DRIFT_REPORT_IDS = 10
+
+
+def iter_ledger(db, after_id=0, until_id=None, with_timestamps=False, chunk_size=REPLAY_CHUNK_SIZE):
+    """Yield approved ledger rows in id order as plain tuples.
+
+    Rows are ``(id, sender_id, recipient_id, amount)``. With
+    ``with_timestamps`` each row also carries, as text, the time its coins
+    moved (an approved offer's decision time rather than when it was offered)
+    and rows come in that order instead.
+    """
+    columns = "id, sender_id, recipient_id, amount"
+    order = "id"
+    if with_timestamps:
+        # CAST drops the declared type so PARSE_DECLTYPES doesn't build datetimes
+        columns += ", CAST(COALESCE(decided_at, timestamp) AS TEXT) AS moved_at"
+        order = "moved_at, id"
+
+    query = f"SELECT {columns} FROM transactions WHERE status = 'approved' AND id > ?"
+    params = [after_id]
+    if until_id is not None:
+        query += " AND id <= ?"
+        params.append(until_id)
+
+    cursor = db.cursor()
+    cursor.row_factory = None  # plain tuples are much cheaper than sqlite3.Row
+    cursor.execute(query + f" ORDER BY {order}", params)
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def checkpoint_horizon(db):
+    """Highest transaction id that can be checkpointed.
+
+    Pending offers can still flip to approved, so a checkpoint must never cover
+    a row that is not final yet.
+    """
+    pending = db.execute(
+        "SELECT MIN(id) AS id FROM transactions WHERE status = 'pending'"
+    ).fetchone()["id"]
+    if pending is not None:
+        return pending - 1
+    return db.execute("SELECT MAX(id) AS id FROM transactions").fetchone()["id"] or 0
+
+
+def load_checkpoint(db, until_id=None):
+    """Load the newest checkpoint at or before ``until_id``.
+
+    Returns ``(last_transaction_id, balances)``; ``(0, {})`` when none exists.
+    """
+    if until_id is None:
+        row = db.execute(
+            "SELECT last_transaction_id, balances FROM ledger_checkpoints ORDER BY last_transaction_id DESC LIMIT 1"
+        ).fetchone()
+    else:
+        row = db.execute(
+            "SELECT last_transaction_id, balances FROM ledger_checkpoints WHERE last_transaction_id <= ? ORDER BY last_transaction_id DESC LIMIT 1",
+            (until_id,),
+        ).fetchone()
+
+    if row is None:
+        return 0, {}
+    balances = {int(user_id): balance for user_id, balance in json.loads(row["balances"]).items()}
+    return row["last_transaction_id"], balances
+
+
+def save_checkpoint(db, last_transaction_id, balances):
+    """Persist balances as of ``last_transaction_id`` and prune old checkpoints."""
+    db.execute(
+        "INSERT INTO ledger_checkpoints (last_transaction_id, balances) VALUES (?, ?)",
+        (last_transaction_id, json.dumps(balances, separators=(",", ":"))),
+    )
+    db.execute(
+        """
+        DELETE FROM ledger_checkpoints WHERE id NOT IN (
+            SELECT id FROM ledger_checkpoints ORDER BY last_transaction_id DESC LIMIT ?
+        )
+        """,
+        (CHECKPOINTS_TO_KEEP,),
+    )
+    db.commit()
+
+
+def replay_balances(db, until_id=None, use_checkpoints=True, checkpoint_interval=CHECKPOINT_INTERVAL):
+    """Rebuild every balance from the ledger.
+
+    Returns a dict with ``balances`` (user id -> balance, including the system
+    account, which holds minus the circulating supply), ``last_transaction_id``,
+    ``replayed`` row count and the checkpoint position the replay resumed from.
+    """
+    start_id, balances = load_checkpoint(db, until_id) if use_checkpoints else (0, {})
+    horizon = checkpoint_horizon(db) if use_checkpoints else 0
+
+    last_id = start_id
+    replayed = 0
+    checkpointed_id = start_id
+    for tx_id, sender_id, recipient_id, amount in iter_ledger(db, start_id, until_id):
+        balances[sender_id] = balances.get(sender_id, 0) - amount
+        balances[recipient_id] = balances.get(recipient_id, 0) + amount
+        last_id = tx_id
+        replayed += 1
+
+        if use_checkpoints and replayed % checkpoint_interval == 0 and tx_id <= horizon:
+            save_checkpoint(db, tx_id, balances)
+            checkpointed_id = tx_id
+
+    if use_checkpoints and last_id != checkpointed_id and last_id <= horizon:
+        save_checkpoint(db, last_id, balances)
+
+    return {
+        "balances": balances,
+        "last_transaction_id": last_id,
+        "replayed": replayed,
+        "resumed_from": start_id,
+    }
+
+
+def rebuild_balances(apply=False, until_id=None, use_checkpoints=True):
+    """Replay the ledger and compare (or overwrite) ``users.coin_balance``.
+
+    Returns the replay summary plus ``drift``: users whose stored balance
+    differs from their ledger balance.
+    """
+    db = get_db()
+    result = replay_balances(db, until_id, use_checkpoints)
+    replayed = result["balances"]
+
+    users = db.execute("SELECT id, username, coin_balance FROM users").fetchall()
+    drift = [
+        {
+            "user_id": user["id"],
+            "username": user["username"],
+            "stored": user["coin_balance"],
+            "replayed": replayed.get(user["id"], 0),
+        }
+        for user in users
+        if user["coin_balance"] != replayed.get(user["id"], 0)
+    ]
+
+    if apply and drift:
+        db.executemany(
+            "UPDATE users SET coin_balance = ? WHERE id = ?",
+            [(entry["replayed"], entry["user_id"]) for entry in drift],
+        )
+        commit_ledger(db, [entry["user_id"] for entry in drift])
+
+    result["drift"] = drift
+    result["circulating_supply"] = -replayed.get(SYSTEM_ACCOUNT_ID, 0)
+    return result
+
+
+def rebuild_snapshots(chunk_size=REPLAY_CHUNK_SIZE):
+    """Regenerate ``balance_snapshots`` from the ledger.
+
+    Writes one snapshot per user touched by each ledger entry, at the time its
+    coins moved. Returns the number of snapshots written.
+    """
+    db = get_db()
+    db.execute("DELETE FROM balance_snapshots")
+
+    balances = {}
+    batch = []
+    written = 0
+    insert = "INSERT INTO balance_snapshots (user_id, balance, timestamp) VALUES (?, ?, ?)"
+
+    for _, sender_id, recipient_id, amount, timestamp in iter_ledger(db, with_timestamps=True):
+        balances[sender_id] = balances.get(sender_id, 0) - amount
+        balances[recipient_id] = balances.get(recipient_id, 0) + amount
+
+        for user_id in (sender_id, recipient_id):
+            if user_id != SYSTEM_ACCOUNT_ID:
+                batch.append((user_id, balances[user_id], timestamp))
+
+        if len(batch) >= chunk_size:
+            db.executemany(insert, batch)
+            written += len(batch)
+            batch.clear()
+
+    if batch:
+        db.executemany(insert, batch)
+        written += len(batch)
+
+    db.commit()
+    return written
+
+
+def verify_ledger(full=False):
+    """Check ledger invariants, replaying only rows after the newest checkpoint.
+
+    Checks that circulating supply equals minted minus burned coins, that
+    every balance equals its ledger net, that no balance is negative and that
+    every ledger entry references a known account. A checkpoint is recorded at
+    the last final row, so the next check starts from there.
+    """
+    start = time.perf_counter()
+    db = get_db()
+
+    # Read the ledger and balances from one snapshot so in-flight transfers can't look like drift
+    if not db.in_transaction:
+        db.execute("BEGIN")
+    try:
+        start_id, balances = (0, {}) if full else load_checkpoint(db)
+        horizon = checkpoint_horizon(db)
+
+        touched = {}
+        final_state = None
+        last_id = start_id
+        replayed = 0
+        for tx_id, sender_id, recipient_id, amount in iter_ledger(db, start_id):
+            if tx_id > horizon and final_state is None:
+                final_state = (last_id, dict(balances))
+
+            balances[sender_id] = balances.get(sender_id, 0) - amount
+            balances[recipient_id] = balances.get(recipient_id, 0) + amount
+            for account_id in (sender_id, recipient_id):
+                touched.setdefault(account_id, deque(maxlen=DRIFT_REPORT_IDS)).append(tx_id)
+            last_id = tx_id
+            replayed += 1
+
+        users = db.execute("SELECT id, username, coin_balance FROM users").fetchall()
+    finally:
+        db.commit()
+
+    if final_state is None:
+        final_state = (last_id, balances)
+
+    known_ids = {user["id"] for user in users}
+    balance_drift = [
+        {
+            "user_id": user["id"],
+            "username": user["username"],
+            "stored": user["coin_balance"],
+            "ledger": balances.get(user["id"], 0),
+            "recent_transaction_ids": list(touched.get(user["id"], ())),
+        }
+        for user in users
+        if user["coin_balance"] != balances.get(user["id"], 0)
+    ]
+    negative_balances = [
+        {"user_id": user["id"], "username": user["username"], "balance": user["coin_balance"]}
+        for user in users
+        if user["coin_balance"] < 0
+    ]
+    unknown_accounts = [
+        {"account_id": account_id, "recent_transaction_ids": list(touched.get(account_id, ()))}
+        for account_id, balance in balances.items()
+        if account_id != SYSTEM_ACCOUNT_ID and account_id not in known_ids and balance != 0
+    ]
+
+    minted = -balances.get(SYSTEM_ACCOUNT_ID, 0)
+    circulating = sum(user["coin_balance"] for user in users)
+
+    checkpoint_id, checkpoint_balances = final_state
+    if checkpoint_id > start_id:
+        save_checkpoint(db, checkpoint_id, checkpoint_balances)
+
+    return {
+        "ok": not (balance_drift or negative_balances or unknown_accounts) and minted == circulating,
+        "supply": {"minted": minted, "circulating": circulating, "drift": circulating - minted},
+        "balance_drift": balance_drift,
+        "negative_balances": negative_balances,
+        "unknown_accounts": unknown_accounts,
+        "resumed_from": start_id,
+        "last_transaction_id": last_id,
+        "replayed": replayed,
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+@click.command("replay-ledger")
+@click.option("--apply", is_flag=True, help="Overwrite drifted balances with replayed ones")
+@click.option("--until", "until_id", type=int, default=None, help="Replay up to this transaction id")
+@click.option("--no-checkpoints", is_flag=True, help="Replay from genesis, ignoring checkpoints")
+@with_appcontext
+def replay_ledger_command(apply, until_id, no_checkpoints):
+    """Rebuild all balances by replaying the transaction ledger."""
+    start = time.perf_counter()
+    result = rebuild_balances(apply, until_id, use_checkpoints=not no_checkpoints)
+    elapsed = time.perf_counter() - start
+
+    rate = result["replayed"] / elapsed if elapsed > 0 else 0
+    click.echo(
+        f"🔁 Replayed {result['replayed']:,} ledger entries "
+        f"(from #{result['resumed_from']} to #{result['last_transaction_id']}) "
+        f"in {elapsed:.3f}s ({rate:,.0f}/sec)"
+    )
+    click.echo(f"   Circulating supply: {result['circulating_supply']:,} coins")
+
+    if not result["drift"]:
+        click.echo("✅ Every balance matches the ledger")
+        return
+
+    click.echo(f"⚠️  {len(result['drift'])} balances differ from the ledger:")
+    for entry in result["drift"]:
+        click.echo(
+            f"   #{entry['user_id']} {entry['username']}: stored {entry['stored']:,}, "
+            f"ledger {entry['replayed']:,}"
+        )
+    if apply:
+        click.echo("✅ Drifted balances overwritten with ledger values")
+    else:
+        click.echo("💡 Re-run with --apply to overwrite them")
+
+
+@click.command("verify-ledger")
+@click.option("--full", is_flag=True, help="Check from genesis instead of the last checkpoint")
+@with_appcontext
+def verify_ledger_command(full):
+    """Check ledger invariants incrementally and report drift."""
+    result = verify_ledger(full)
+    supply = result["supply"]
+
+    click.echo(
+        f"🔎 Checked {result['replayed']:,} new ledger entries "
+        f"(#{result['resumed_from']} to #{result['last_transaction_id']}) in {result['elapsed_ms']}ms"
+    )
+    click.echo(f"   Minted: {supply['minted']:,} coins, circulating: {supply['circulating']:,} coins")
+
+    if result["ok"]:
+        click.echo("✅ Ledger is consistent")
+        return
+
+    if supply["drift"]:
+        click.echo(f"❌ Supply drift: {supply['drift']:+,} coins")
+    for entry in result["balance_drift"]:
+        click.echo(
+            f"❌ #{entry['user_id']} {entry['username']}: stored {entry['stored']:,}, "
+            f"ledger {entry['ledger']:,} (recent tx {entry['recent_transaction_ids']})"
+        )
+    for entry in result["negative_balances"]:
+        click.echo(f"❌ #{entry['user_id']} {entry['username']} has a negative balance: {entry['balance']:,}")
+    for entry in result["unknown_accounts"]:
+        click.echo(
+            f"❌ Ledger references unknown account #{entry['account_id']} "
+            f"(recent tx {entry['recent_transaction_ids']})"
+        )
+    click.get_current_context().exit(1)
+
+
+@click.command("rebuild-snapshots")
+@click.confirmation_option(
+    prompt="Replace all balance snapshots with ones rebuilt from the ledger?"
+)
+@with_appcontext
+def rebuild_snapshots_command():
+    """Regenerate balance snapshots by replaying the transaction ledger."""
+    start = time.perf_counter()
+    written = rebuild_snapshots()
+    click.echo(
+        f"📸 Rebuilt {written:,} balance snapshots in {time.perf_counter() - start:.3f}s"
+    )
+
+
+def init_app(app):
+    app.cli.add_command(replay_ledger_command)
+    app.cli.add_command(verify_ledger_command)
+    app.cli.add_command(rebuild_snapshots_command)
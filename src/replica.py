@@ -0,0 +1,143 @@
+"""Read-only analytics replica for Straw Coin.
+
+The leaderboard history chart and the CHANCELLOR's dashboards run scans and
+aggregates over ``transactions`` and ``balance_snapshots`` that would otherwise
+share the live database file with tips. The public market stats stay on the
+primary: they are cheap and the leaderboard shows them next to live balances. With
+``READ_REPLICA_ENABLED`` on, the scheduler copies the database every
+``READ_REPLICA_INTERVAL`` seconds with SQLite's online backup API into a
+temporary file that then atomically replaces the replica. The copy is taken
+in one step: under WAL it only holds a read transaction, and a stepped copy
+restarts every time a tip commits. ``get_read_db()`` opens the replica read-only while it is fresh
+and falls back to the primary otherwise.
+
+Only the process holding ``<replica>.lock`` refreshes. Freshness is the
+replica file's mtime (set to when its refresh started), so every process
+sharing the database can use the replica that one keeps up to date.
+"""
+
+import fcntl
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .metrics import metrics
+
+DEFAULT_REPLICA_INTERVAL = 5  # seconds
+
+# The replica is used while its last refresh started at most this many
+# intervals ago
+MAX_STALE_INTERVALS = 3
+
+
+def get_replica_path(app):
+    return app.config.get("READ_REPLICA_PATH") or (
+        os.path.splitext(app.config["DATABASE"])[0] + "-replica.sqlite"
+    )
+
+
+# Lock files held by this process, by replica path
+_refresh_locks = {}
+_refresh_locks_lock = threading.Lock()
+
+
+def hold_refresh_lock(path):
+    """Make this process the replica's refresher; False if another process is.
+
+    The lock is kept until the process exits, so a crashed refresher's role
+    passes to whichever process tries next.
+    """
+    with _refresh_locks_lock:
+        if path in _refresh_locks:
+            return True
+        lock_file = open(path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        _refresh_locks[path] = lock_file
+        return True
+
+
+def refresh_replica(app):
+    """Copy the database into the replica file.
+
+    Returns the time taken in ms, or None if another process is the refresher.
+    """
+    path = get_replica_path(app)
+    if not hold_refresh_lock(path):
+        return None
+
+    started = time.perf_counter()
+    started_at = time.time()
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        source = sqlite3.connect(app.config["DATABASE"])
+        try:
+            target = sqlite3.connect(tmp_path)
+            try:
+                # The copy is thrown away if the refresh fails, so skip fsyncs
+                target.execute("PRAGMA synchronous = OFF")
+                source.backup(target)
+                # A WAL database can't be opened read-only without its -shm file
+                target.execute("PRAGMA journal_mode = DELETE")
+            finally:
+                target.close()
+        finally:
+            source.close()
+
+        os.utime(tmp_path, (started_at, started_at))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    metrics.increment("replica_refreshes")
+    metrics.set_gauge("replica_refresh_ms", elapsed_ms)
+    return elapsed_ms
+
+
+def replica_as_of(app):
+    """UTC time the replica is current as of, or None if it's missing or stale."""
+    if not app.config.get("READ_REPLICA_ENABLED", False):
+        return None
+
+    try:
+        refreshed = os.path.getmtime(get_replica_path(app))
+    except OSError:
+        return None
+
+    interval = app.config.get("READ_REPLICA_INTERVAL", DEFAULT_REPLICA_INTERVAL)
+    if time.time() - refreshed > interval * MAX_STALE_INTERVALS:
+        return None
+    return datetime.utcfromtimestamp(refreshed)
+
+
+@click.command("refresh-replica")
+@with_appcontext
+def refresh_replica_command():
+    """Refresh the read-only analytics replica once."""
+    app = current_app._get_current_object()
+    elapsed_ms = refresh_replica(app)
+    if elapsed_ms is None:
+        click.echo("🔒 Another process is refreshing the read replica")
+        return
+    size = os.path.getsize(get_replica_path(app))
+    click.echo(f"🪞 Refreshed read replica ({size:,} bytes) in {elapsed_ms}ms")
+
+
+def init_app(app):
+    app.cli.add_command(refresh_replica_command)
@@ -13,12 +13,19 @@ class PerformerRedistributionScheduler:
         self.running = False
         self.redistribution_thread = None
         self.snapshot_thread = None
+        self.verify_thread = None
+        self.expiry_thread = None
+        self.replica_thread = None
         self.redistribution_interval = 60  # 60 seconds = 1 minute
         self.snapshot_interval = 10  # 10 seconds for balance snapshots
+        self.verify_interval = 30  # 30 seconds for ledger consistency checks
+        self.expiry_interval = 30  # 30 seconds for stale offer expiry
+        self.replica_interval = 5  # 5 seconds for read replica refreshes
 
     def init_app(self, app):
         """Initialize the scheduler with a Flask app."""
         self.app = app
+        self.replica_interval = app.config.get("READ_REPLICA_INTERVAL", self.replica_interval)
 
     def start(self):
         """Start the background redistribution and snapshot schedulers."""
@@ -35,6 +42,19 @@ class PerformerRedistributionScheduler:
         self.snapshot_thread = threading.Thread(target=self._run_snapshot_scheduler, daemon=True)
         self.snapshot_thread.start()
 
+        # Start ledger verification thread
+        self.verify_thread = threading.Thread(target=self._run_verify_scheduler, daemon=True)
+        self.verify_thread.start()
+
+        # Start offer expiry thread
+        self.expiry_thread = threading.Thread(target=self._run_expiry_scheduler, daemon=True)
+        self.expiry_thread.start()
+
+        # Start read replica thread
+        if self.app and self.app.config.get("READ_REPLICA_ENABLED", False):
+            self.replica_thread = threading.Thread(target=self._run_replica_scheduler, daemon=True)
+            self.replica_thread.start()
+
         if self.app:
             with self.app.app_context():
                 current_app.logger.info(
@@ -43,6 +63,16 @@ class PerformerRedistributionScheduler:
                 current_app.logger.info(
                     "📸 Started balance snapshot scheduler (10 second intervals)"
                 )
+                current_app.logger.info(
+                    "🔎 Started ledger verification scheduler (30 second intervals)"
+                )
+                current_app.logger.info(
+                    "⌛ Started offer expiry scheduler (30 second intervals)"
+                )
+                if self.replica_thread:
+                    current_app.logger.info(
+                        f"🪞 Started read replica scheduler ({self.replica_interval} second intervals)"
+                    )
 
     def stop(self):
         """Stop the background schedulers."""
@@ -54,10 +84,23 @@ class PerformerRedistributionScheduler:
         if self.snapshot_thread:
             self.snapshot_thread.join(timeout=5)
 
+        if self.verify_thread:
+            self.verify_thread.join(timeout=5)
+
+        if self.expiry_thread:
+            self.expiry_thread.join(timeout=5)
+
+        if self.replica_thread:
+            self.replica_thread.join(timeout=5)
+
         if self.app:
             with self.app.app_context():
                 current_app.logger.info("🛑 Stopped performer redistribution scheduler")
                 current_app.logger.info("🛑 Stopped balance snapshot scheduler")
+                current_app.logger.info("🛑 Stopped ledger verification scheduler")
+                current_app.logger.info("🛑 Stopped offer expiry scheduler")
+                if self.replica_thread:
+                    current_app.logger.info("🛑 Stopped read replica scheduler")
 
     def _run_redistribution_scheduler(self):
         """Redistribution scheduler loop - runs in background thread."""
@@ -103,6 +146,69 @@ class PerformerRedistributionScheduler:
                 else:
                     print(f"Snapshot scheduler error: {e}")
 
+    def _run_verify_scheduler(self):
+        """Ledger verification loop - runs in background thread."""
+        while self.running:
+            try:
+                # Wait for the interval
+                time.sleep(self.verify_interval)
+
+                if not self.running:
+                    break
+
+                if self.app:
+                    with self.app.app_context():
+                        self._verify_ledger()
+
+            except Exception as e:
+                if self.app:
+                    with self.app.app_context():
+                        current_app.logger.error(f"❌ Ledger verification scheduler error: {e}")
+                else:
+                    print(f"Ledger verification scheduler error: {e}")
+
+    def _run_expiry_scheduler(self):
+        """Offer expiry loop - runs in background thread."""
+        while self.running:
+            try:
+                # Wait for the interval
+                time.sleep(self.expiry_interval)
+
+                if not self.running:
+                    break
+
+                if self.app:
+                    with self.app.app_context():
+                        self._expire_offers()
+
+            except Exception as e:
+                if self.app:
+                    with self.app.app_context():
+                        current_app.logger.error(f"❌ Offer expiry scheduler error: {e}")
+                else:
+                    print(f"Offer expiry scheduler error: {e}")
+
+    def _run_replica_scheduler(self):
+        """Read replica refresh loop - runs in background thread."""
+        while self.running:
+            try:
+                if self.app:
+                    with self.app.app_context():
+                        self._refresh_replica()
+
+                # Wait for the interval
+                time.sleep(self.replica_interval)
+
+                if not self.running:
+                    break
+
+            except Exception as e:
+                if self.app:
+                    with self.app.app_context():
+                        current_app.logger.error(f"❌ Read replica scheduler error: {e}")
+                else:
+                    print(f"Read replica scheduler error: {e}")
+
     def _perform_redistribution(self):
         """Perform the actual coin redistribution."""
         try:
@@ -147,6 +253,52 @@ class PerformerRedistributionScheduler:
         except Exception as e:
             current_app.logger.error(f"❌ Balance snapshot error: {e}")
 
+    def _verify_ledger(self):
+        """Check ledger invariants from the last checkpoint and log any drift."""
+        try:
+            from .replay import verify_ledger
+
+            result = verify_ledger()
+            if result["ok"]:
+                current_app.logger.debug(
+                    f"🔎 Ledger consistent ({result['replayed']} new entries, {result['elapsed_ms']}ms)"
+                )
+                return
+
+            current_app.logger.warning(
+                f"⚠️ Ledger drift: supply {result['supply']['drift']:+}, "
+                f"balances {[entry['user_id'] for entry in result['balance_drift']]}, "
+                f"negative {[entry['user_id'] for entry in result['negative_balances']]}, "
+                f"unknown accounts {[entry['account_id'] for entry in result['unknown_accounts']]}"
+            )
+
+        except Exception as e:
+            current_app.logger.error(f"❌ Ledger verification error: {e}")
+
+    def _expire_offers(self):
+        """Expire pending offers older than OFFER_TTL."""
+        try:
+            from .db import expire_stale_offers
+
+            expired = expire_stale_offers()
+            if expired:
+                current_app.logger.info(f"⌛ Expired {expired} stale pending offers")
+
+        except Exception as e:
+            current_app.logger.error(f"❌ Offer expiry error: {e}")
+
+    def _refresh_replica(self):
+        """Copy the database into the read-only analytics replica."""
+        try:
+            from .replica import refresh_replica
+
+            elapsed_ms = refresh_replica(current_app._get_current_object())
+            if elapsed_ms is not None:
+                current_app.logger.debug(f"🪞 Refreshed read replica in {elapsed_ms}ms")
+
+        except Exception as e:
+            current_app.logger.error(f"❌ Read replica refresh error: {e}")
+
 
 # Global scheduler instance
 scheduler = PerformerRedistributionScheduler()
@@ -21,17 +21,21 @@ CREATE TABLE transactions (
     transaction_type TEXT DEFAULT 'tip',
     status TEXT DEFAULT 'approved',
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    decided_at TIMESTAMP, -- when a pending offer was approved or denied
     FOREIGN KEY (sender_id) REFERENCES users (id),
     FOREIGN KEY (recipient_id) REFERENCES users (id)
 );
 
 -- Performance optimization indexes for high-frequency trading operations
 CREATE INDEX idx_users_username ON users(username);
+CREATE INDEX idx_users_coin_balance ON users(coin_balance);
+CREATE INDEX idx_users_performer_balance ON users(is_performer, coin_balance);
 CREATE INDEX idx_transactions_sender ON transactions(sender_id);
 CREATE INDEX idx_transactions_recipient ON transactions(recipient_id);
 CREATE INDEX idx_transactions_timestamp ON transactions(timestamp);
 CREATE INDEX idx_transactions_status ON transactions(status);
 CREATE INDEX idx_transactions_type ON transactions(transaction_type);
+CREATE INDEX idx_transactions_status_type_time ON transactions(status, transaction_type, timestamp);
 
 -- Balance snapshots for real-time leaderboard tracking
 CREATE TABLE balance_snapshots (
@@ -46,6 +50,32 @@ CREATE TABLE balance_snapshots (
 CREATE INDEX idx_balance_snapshots_user_time ON balance_snapshots(user_id, timestamp);
 CREATE INDEX idx_balance_snapshots_timestamp ON balance_snapshots(timestamp);
 
+-- Initial balance snapshot written by the same statement that registers a user
+CREATE TRIGGER trg_users_initial_snapshot
+AFTER INSERT ON users
+BEGIN
+    INSERT INTO balance_snapshots (user_id, balance) VALUES (NEW.id, NEW.coin_balance);
+END;
+
+-- Starting balances minted from the system account (id 0) so the ledger replays to every balance
+CREATE TRIGGER trg_users_genesis_mint
+AFTER INSERT ON users
+WHEN NEW.coin_balance > 0
+BEGIN
+    INSERT INTO transactions (sender_id, recipient_id, amount, transaction_type, status)
+    VALUES (0, NEW.id, NEW.coin_balance, 'mint', 'approved');
+END;
+
+-- Replay checkpoints: every balance as of a ledger position, for fast recovery
+CREATE TABLE ledger_checkpoints (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    last_transaction_id INTEGER NOT NULL,
+    balances TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_ledger_checkpoints_last_tx ON ledger_checkpoints(last_transaction_id);
+
 -- DEPRECATED: Active sessions table - no longer used after auth simplification
 -- Kept for backwards compatibility during migration
 -- This table can be safely dropped after all instances are updated
@@ -58,30 +88,104 @@ CREATE INDEX idx_balance_snapshots_timestamp ON balance_snapshots(timestamp);
 --     FOREIGN KEY (username) REFERENCES users (username)
 -- );
 
--- Market analytics view for real-time portfolio tracking
-DROP VIEW IF EXISTS user_stats;
-CREATE VIEW user_stats AS
-SELECT
-    u.username,
-    u.coin_balance,
-    u.created_at,
-    COALESCE(sent.total_sent, 0) as total_sent,
-    COALESCE(received.total_received, 0) as total_received,
-    COALESCE(sent.transaction_count, 0) + COALESCE(received.transaction_count, 0) as total_transactions
-FROM users u
-LEFT JOIN (
-    SELECT 
-        sender_id,
-        SUM(amount) as total_sent,
-        COUNT(*) as transaction_count
-    FROM transactions 
-    GROUP BY sender_id
-) sent ON u.id = sent.sender_id
-LEFT JOIN (
-    SELECT 
-        recipient_id,
-        SUM(amount) as total_received,
-        COUNT(*) as transaction_count
-    FROM transactions 
-    GROUP BY recipient_id
-) received ON u.id = received.recipient_id;
\ No newline at end of file
+-- Per-user activity stats, maintained by triggers on the ledger so lookups are O(1)
+CREATE TABLE user_stats (
+    user_id INTEGER PRIMARY KEY,
+    total_sent INTEGER NOT NULL DEFAULT 0,
+    total_received INTEGER NOT NULL DEFAULT 0,
+    sent_count INTEGER NOT NULL DEFAULT 0,
+    received_count INTEGER NOT NULL DEFAULT 0,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    last_activity TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Per-user activity broken down by transaction type
+CREATE TABLE user_type_stats (
+    user_id INTEGER NOT NULL,
+    transaction_type TEXT NOT NULL,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    total_amount INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, transaction_type),
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Approved ledger entries (except mints and burns) update both parties' stats
+CREATE TRIGGER trg_transactions_stats_insert
+AFTER INSERT ON transactions
+WHEN NEW.status = 'approved' AND NEW.transaction_type NOT IN ('mint', 'burn')
+BEGIN
+    INSERT INTO user_stats (user_id, total_sent, sent_count, transaction_count, last_activity)
+    SELECT NEW.sender_id, NEW.amount, 1, 1, NEW.timestamp WHERE NEW.sender_id != 0
+    ON CONFLICT(user_id) DO UPDATE SET
+        total_sent = total_sent + excluded.total_sent,
+        sent_count = sent_count + 1,
+        transaction_count = transaction_count + 1,
+        last_activity = excluded.last_activity;
+    INSERT INTO user_stats (user_id, total_received, received_count, transaction_count, last_activity)
+    SELECT NEW.recipient_id, NEW.amount, 1, 1, NEW.timestamp WHERE NEW.recipient_id != 0
+    ON CONFLICT(user_id) DO UPDATE SET
+        total_received = total_received + excluded.total_received,
+        received_count = received_count + 1,
+        transaction_count = transaction_count + 1,
+        last_activity = excluded.last_activity;
+    INSERT INTO user_type_stats (user_id, transaction_type, transaction_count, total_amount)
+    SELECT user_id, NEW.transaction_type, 1, NEW.amount
+    FROM (SELECT NEW.sender_id AS user_id UNION ALL SELECT NEW.recipient_id)
+    WHERE user_id != 0
+    ON CONFLICT(user_id, transaction_type) DO UPDATE SET
+        transaction_count = transaction_count + 1,
+        total_amount = total_amount + excluded.total_amount;
+END;
+
+-- Offers count once they are approved
+CREATE TRIGGER trg_transactions_stats_approve
+AFTER UPDATE OF status ON transactions
+WHEN OLD.status != 'approved' AND NEW.status = 'approved'
+     AND NEW.transaction_type NOT IN ('mint', 'burn')
+BEGIN
+    INSERT INTO user_stats (user_id, total_sent, sent_count, transaction_count, last_activity)
+    SELECT NEW.sender_id, NEW.amount, 1, 1, CURRENT_TIMESTAMP WHERE NEW.sender_id != 0
+    ON CONFLICT(user_id) DO UPDATE SET
+        total_sent = total_sent + excluded.total_sent,
+        sent_count = sent_count + 1,
+        transaction_count = transaction_count + 1,
+        last_activity = excluded.last_activity;
+    INSERT INTO user_stats (user_id, total_received, received_count, transaction_count, last_activity)
+    SELECT NEW.recipient_id, NEW.amount, 1, 1, CURRENT_TIMESTAMP WHERE NEW.recipient_id != 0
+    ON CONFLICT(user_id) DO UPDATE SET
+        total_received = total_received + excluded.total_received,
+        received_count = received_count + 1,
+        transaction_count = transaction_count + 1,
+        last_activity = excluded.last_activity;
+    INSERT INTO user_type_stats (user_id, transaction_type, transaction_count, total_amount)
+    SELECT user_id, NEW.transaction_type, 1, NEW.amount
+    FROM (SELECT NEW.sender_id AS user_id UNION ALL SELECT NEW.recipient_id)
+    WHERE user_id != 0
+    ON CONFLICT(user_id, transaction_type) DO UPDATE SET
+        transaction_count = transaction_count + 1,
+        total_amount = total_amount + excluded.total_amount;
+END;
+
+-- Stored responses for retried requests carrying an Idempotency-Key; a
+-- status_code of 0 marks a key claimed by a request still running
+CREATE TABLE idempotency_keys (
+    username TEXT NOT NULL,
+    idempotency_key TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    response_body TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (username, idempotency_key)
+);
+
+CREATE INDEX idx_idempotency_keys_created ON idempotency_keys(created_at);
+
+-- Bumped by every write in-process caches depend on, so other processes
+-- sharing the database know to drop theirs
+CREATE TABLE ledger_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO ledger_state (id, version) VALUES (1, 0);
@@ -0,0 +1,305 @@
+"""Lightweight tracing spans for Straw Coin's hot paths.
+
+A slow tip could be the user lookups, the balance updates, the commit or the
+leaderboard refresh after it. Entry points start traces and the sections
+inside them are spans::
+
+    @traced()
+    def transfer_coins(...):
+        with span("lookup_users"):
+            ...
+
+``trace(name)`` starts a trace around any block. A ``span`` outside a trace
+records nothing, so shared helpers like the commit can carry spans without
+every caller being traced. With ``TRACING_ENABLED`` on, each new trace is kept
+with probability ``TRACE_SAMPLE_RATE``. Each sampled trace is written as one
+JSON line to a rotating file (``instance/traces.jsonl`` by default) and
+``flask trace-summary`` shows where the time went. Disabled, ``span`` returns
+a shared no-op and ``traced`` calls straight through.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from functools import wraps
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+DEFAULT_SAMPLE_RATE = 0.1
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or the trace isn't sampled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+# Marks a thread whose current trace wasn't sampled
+_UNSAMPLED = object()
+
+
+class _Trace:
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.depth = 0
+        self.spans = []
+
+
+class Span:
+    """A timed section of a trace; ``set`` adds attributes to it."""
+
+    __slots__ = ("tracer", "name", "attrs", "can_start", "trace", "root", "start", "record")
+
+    def __init__(self, tracer, name, attrs, can_start=False):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.can_start = can_start
+        self.trace = None
+        self.root = False
+        self.record = None
+
+    def __enter__(self):
+        local = self.tracer._local
+        trace = getattr(local, "trace", None)
+        if trace is None:
+            if not self.can_start:
+                return self
+            self.root = True
+            if random.random() >= self.tracer.sample_rate:
+                local.trace = _UNSAMPLED
+                return self
+            trace = local.trace = _Trace()
+        elif trace is _UNSAMPLED:
+            return self
+
+        self.trace = trace
+        self.record = {"name": self.name, "depth": trace.depth, **self.attrs}
+        trace.spans.append(self.record)
+        trace.depth += 1
+        self.start = time.perf_counter()
+        self.record["start_ms"] = round((self.start - trace.start) * 1000, 3)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        trace = self.trace
+        if trace is not None:
+            self.record["duration_ms"] = round((time.perf_counter() - self.start) * 1000, 3)
+            if exc_type is not None:
+                self.record["error"] = exc_type.__name__
+            trace.depth -= 1
+        if self.root:
+            self.tracer._local.trace = None
+            if trace is not None:
+                self.tracer.write(trace)
+        return False
+
+    def set(self, key, value):
+        if self.record is not None:
+            self.record[key] = value
+
+
+class Tracer:
+    """Samples traces and writes them to a rotating JSONL file."""
+
+    def __init__(self):
+        self.enabled = False
+        self.sample_rate = DEFAULT_SAMPLE_RATE
+        self.path = None
+        self._local = threading.local()
+        self._logger = logging.getLogger("strawcoin.traces")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+
+    def configure(self, enabled, path, sample_rate=DEFAULT_SAMPLE_RATE,
+                  max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT):
+        for handler in list(self._logger.handlers):
+            self._logger.removeHandler(handler)
+            handler.close()
+
+        self.path = path
+        self.sample_rate = sample_rate
+        if enabled:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger.addHandler(handler)
+        self.enabled = enabled
+
+    def write(self, trace):
+        root = trace.spans[0]
+        self._logger.info(
+            json.dumps(
+                {
+                    "trace_id": trace.id,
+                    "name": root["name"],
+                    "timestamp": datetime.utcfromtimestamp(trace.started_at).isoformat(),
+                    "duration_ms": root["duration_ms"],
+                    "spans": trace.spans,
+                },
+                separators=(",", ":"),
+                default=str,
+            )
+        )
+
+
+# Global tracer shared by every thread in this process
+tracer = Tracer()
+
+
+def span(name, **attrs):
+    """Context manager timing a section of the current trace, if any."""
+    if not tracer.enabled:
+        return _NOOP_SPAN
+    return Span(tracer, name, attrs)
+
+
+def trace(name, **attrs):
+    """Like ``span``, but starts a (possibly sampled) trace if none is active."""
+    if not tracer.enabled:
+        return _NOOP_SPAN
+    return Span(tracer, name, attrs, can_start=True)
+
+
+def traced(name=None):
+    """Decorator running a function under ``trace`` (named after it by default)."""
+
+    def decorator(f):
+        span_name = name or f.__name__
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not tracer.enabled:
+                return f(*args, **kwargs)
+            with Span(tracer, span_name, {}, can_start=True):
+                return f(*args, **kwargs)
+
+        return decorated_function
+
+    return decorator
+
+
+def get_trace_path(app):
+    return app.config.get("TRACE_FILE") or os.path.join(app.instance_path, "traces.jsonl")
+
+
+def read_traces(path):
+    """Yield traces from a trace file and its rotated backups, oldest first."""
+    backups = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+
+    for file_path in backups[::-1] + ([path] if os.path.exists(path) else []):
+        with open(file_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # line cut short by a crash or rotation
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize_traces(traces, root_name=None):
+    """Aggregate span durations per root span and span path.
+
+    Returns ``{root name: {"count", "rows"}}`` where each row is
+    ``(path, depth, count, total_ms, p50_ms, p95_ms, max_ms)`` in first-seen
+    order; ``path`` joins span names from the root down with " › ".
+    """
+    summary = {}
+    for trace in traces:
+        if root_name and trace["name"] != root_name:
+            continue
+        entry = summary.setdefault(trace["name"], {"count": 0, "durations": defaultdict(list), "depths": {}})
+        entry["count"] += 1
+
+        stack = []
+        for record in trace["spans"]:
+            del stack[record["depth"]:]
+            stack.append(record["name"])
+            path = " › ".join(stack)
+            if "duration_ms" in record:
+                entry["durations"][path].append(record["duration_ms"])
+                entry["depths"][path] = record["depth"]
+
+    for entry in summary.values():
+        entry["rows"] = [
+            (
+                path,
+                entry["depths"][path],
+                len(durations),
+                sum(durations),
+                _percentile(durations, 0.5),
+                _percentile(durations, 0.95),
+                max(durations),
+            )
+            for path, durations in entry.pop("durations").items()
+        ]
+        entry.pop("depths")
+    return summary
+
+
+@click.command("trace-summary")
+@click.option("--file", "path", default=None, help="Trace file (defaults to instance/traces.jsonl)")
+@click.option("--root", "root_name", default=None, help="Only traces whose outermost span has this name")
+@with_appcontext
+def trace_summary_command(path, root_name):
+    """Summarize where time goes in sampled traces."""
+    path = path or get_trace_path(current_app)
+    summary = summarize_traces(read_traces(path), root_name)
+    if not summary:
+        click.echo(f"No traces found in {path}")
+        return
+
+    for name, entry in sorted(summary.items(), key=lambda item: -item[1]["rows"][0][3]):
+        root_total = entry["rows"][0][3] or 1
+        click.echo(f"\n🔬 {name} ({entry['count']} traces)")
+        click.echo(f"   {'span':<48} {'count':>7} {'share':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for path, depth, count, total, p50, p95, worst in entry["rows"]:
+            label = "  " * depth + path.rsplit(" › ", 1)[-1]
+            click.echo(
+                f"   {label:<48} {count:>7} {total / root_total:>6.1%} {p50:>9.3f} {p95:>9.3f} {worst:>9.3f}"
+            )
+
+
+def init_app(app):
+    tracer.configure(
+        app.config.get("TRACING_ENABLED", False),
+        get_trace_path(app),
+        app.config.get("TRACE_SAMPLE_RATE", DEFAULT_SAMPLE_RATE),
+        app.config.get("TRACE_MAX_BYTES", DEFAULT_MAX_BYTES),
+        app.config.get("TRACE_BACKUP_COUNT", DEFAULT_BACKUP_COUNT),
+    )
+    app.cli.add_command(trace_summary_command)
@@ -0,0 +1,132 @@
+"""Template bytecode caching and startup warmup for Straw Coin.
+
+Jinja compiles each template to Python on first use, in every worker, so the
+first phones to load a page after a deploy or restart pay for it. Compiled
+bytecode is cached under ``instance/jinja_cache`` and reused across restarts.
+
+With ``WARMUP_ON_STARTUP`` on, ``create_app`` also compiles every template
+and warms the database side up front: the hot leaderboard, offer and stats
+queries run once (pulling their pages into the SQLite and OS caches), and the
+in-memory leaderboard and pending-offer indexes are loaded. The time from
+``create_app`` to the first response is logged and kept as a metric.
+"""
+
+import os
+import threading
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from jinja2 import FileSystemBytecodeCache
+
+from .metrics import metrics
+
+# Queries run once at startup to warm the pages the hot endpoints read
+WARMUP_QUERIES = [
+    "SELECT id, username, coin_balance, is_performer FROM users ORDER BY coin_balance DESC LIMIT 10",
+    "SELECT COUNT(*), SUM(amount) FROM transactions WHERE transaction_type NOT IN ('mint', 'burn')",
+    "SELECT user_id, MAX(timestamp) FROM balance_snapshots GROUP BY user_id",
+    "SELECT COUNT(*) FROM user_stats",
+]
+
+
+def get_template_cache_dir(app):
+    return os.path.join(app.instance_path, "jinja_cache")
+
+
+def configure_template_cache(app):
+    """Cache compiled template bytecode on disk under the instance folder."""
+    if not app.config.get("TEMPLATE_BYTECODE_CACHE", True):
+        return
+    cache_dir = get_template_cache_dir(app)
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+
+def compile_templates(app):
+    """Load every template so it is compiled (and bytecode-cached). Returns the count."""
+    names = app.jinja_env.list_templates(extensions=["jinja2", "html"])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def warm_database():
+    """Run the hot read queries once and load the in-memory indexes."""
+    from .db import get_db
+    from .offers import offer_index
+    from .ranking import leaderboard
+
+    db = get_db()
+    for query in WARMUP_QUERIES:
+        db.execute(query).fetchall()
+    leaderboard.ensure_loaded(db)
+    offer_index.ensure_loaded(db)
+
+
+def warmup(app):
+    """Compile templates and warm the database; returns timings in ms."""
+    timings = {}
+
+    start = time.perf_counter()
+    timings["templates"] = compile_templates(app)
+    timings["templates_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    start = time.perf_counter()
+    if os.path.exists(app.config["DATABASE"]):
+        with app.app_context():
+            warm_database()
+    timings["database_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    return timings
+
+
+def _report_first_response(app, started_at):
+    """Log and record the time from create_app to the first response, once."""
+    reported = threading.Event()
+
+    @app.after_request
+    def report_first_response(response):
+        if not reported.is_set():
+            reported.set()
+            elapsed = time.perf_counter() - started_at
+            metrics.set_gauge("startup_to_first_response_seconds", round(elapsed, 3))
+            current_app.logger.info(f"⚡ First response {elapsed * 1000:.0f}ms after startup")
+        return response
+
+
+def init_app(app, started_at):
+    """Set up the bytecode cache and, if enabled, warm up before serving."""
+    configure_template_cache(app)
+
+    if app.config.get("WARMUP_ON_STARTUP", False):
+        try:
+            timings = warmup(app)
+        except Exception as e:
+            app.logger.warning(f"⚠️ Warmup failed: {e}")
+        else:
+            metrics.set_gauge("warmup_templates_ms", timings["templates_ms"])
+            metrics.set_gauge("warmup_database_ms", timings["database_ms"])
+            app.logger.info(
+                f"🔥 Warmed up {timings['templates']} templates in {timings['templates_ms']}ms, "
+                f"database in {timings['database_ms']}ms"
+            )
+
+    metrics.set_gauge("startup_seconds", round(time.perf_counter() - started_at, 3))
+    _report_first_response(app, started_at)
+
+    app.cli.add_command(warmup_command)
+
+
+@click.command("warmup")
+@with_appcontext
+def warmup_command():
+    """Precompile templates into the bytecode cache and time a warmup."""
+    app = current_app._get_current_object()
+    timings = warmup(app)
+    click.echo(
+        f"🔥 Compiled {timings['templates']} templates in {timings['templates_ms']}ms "
+        f"(cache: {get_template_cache_dir(app) if app.jinja_env.bytecode_cache else 'off'})"
+    )
+    click.echo(f"🗄️  Warmed database in {timings['database_ms']}ms")
@@ -1,5 +1,35 @@
 let chart = null;
 
+// Chart series kept between polls; later polls fetch only points after `latest`
+const seriesState = {
+    latest: null,
+    datasets: new Map()  // label -> dataset (styling and points)
+};
+
+// Fold a leaderboard-history response into seriesState
+function applySeriesUpdate(data) {
+    if (!data.incremental) {
+        seriesState.datasets.clear();
+    }
+
+    data.datasets.forEach(dataset => {
+        const existing = seriesState.datasets.get(dataset.label);
+        if (existing && data.incremental) {
+            existing.data.push(...dataset.data);
+        } else {
+            seriesState.datasets.set(dataset.label, dataset);
+        }
+    });
+
+    // Drop points that have scrolled out of the chart window
+    seriesState.datasets.forEach(dataset => {
+        const firstKept = dataset.data.findIndex(point => point.x >= data.window_start);
+        dataset.data.splice(0, firstKept === -1 ? dataset.data.length : firstKept);
+    });
+
+    seriesState.latest = data.latest;
+}
+
 // Initialize the chart
 function initializeChart() {
     const ctx = document.getElementById('performerChart').getContext('2d');
@@ -123,11 +153,19 @@ function initializeChart() {
 // Fetch and update graph data
 async function fetchGraphData() {
     try {
-        // Fetch data for last 10 minutes (0.167 hours)
-        const response = await fetch('/api/leaderboard-history?hours=0.167');
+        // Fetch data for last 10 minutes (0.167 hours) for the top 5 only,
+        // downsampled to roughly one point per 3 pixels of chart width
+        const maxPoints = Math.max(50, Math.round(((chart && chart.width) || 600) / 3));
+        let url = `/api/leaderboard-history?hours=0.167&top=5&max_points=${maxPoints}`;
+        if (seriesState.latest) {
+            url += `&since=${encodeURIComponent(seriesState.latest)}`;
+        }
+        const response = await fetch(url);
         const data = await response.json();
         
         if (data.status === 'success') {
+            applySeriesUpdate(data);
+
             // Get only top 5 performers based on current balance
             const top5 = data.current_leaders.slice(0, 5).map(user => ({
                 ...user,
@@ -135,10 +173,11 @@ async function fetchGraphData() {
             }));
             const top5Usernames = top5.map(user => user.username);
             
-            // Filter datasets to only include top 5
-            let filteredDatasets = data.datasets.filter(dataset => 
-                top5Usernames.includes(dataset.label)
-            );
+            // Filter datasets to only include top 5, copying points so the
+            // current-balance point added below isn't kept between polls
+            let filteredDatasets = [...seriesState.datasets.values()]
+                .filter(dataset => top5Usernames.includes(dataset.label))
+                .map(dataset => ({ ...dataset, data: [...dataset.data] }));
             
             // If there's no historical data, create single-point datasets with current balances
             if (filteredDatasets.length === 0 || filteredDatasets.every(ds => ds.data.length === 0)) {
@@ -201,6 +201,7 @@ document.addEventListener("DOMContentLoaded", function () {
         const data = await StrawCoinUtils.apiRequest("/api/transfer", {
           method: "POST",
           body: JSON.stringify(requestBody),
+          idempotencyKey: StrawCoinUtils.newIdempotencyKey(),
         });
 
         // If data is null, a redirect happened (e.g., self-dealing warning)
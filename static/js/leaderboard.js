@@ -10,29 +10,39 @@ document.addEventListener("DOMContentLoaded", function () {
   startAutoUpdate();
 });
 
+// Local mirror of the leaderboard, kept current through delta syncs
+const syncState = {
+  version: null,
+  epoch: null,
+  users: new Map(),
+  offers: [],
+};
+
 async function loadAllData() {
   try {
-    // Load all data in parallel
-    const [offersData, usersData, marketData] = await Promise.all([
-      StrawCoinUtils.apiRequest("/api/leaderboard"),
-      StrawCoinUtils.apiRequest("/api/users"),
-      StrawCoinUtils.apiRequest("/api/market-stats")
-    ]);
+    const params = new URLSearchParams();
+    if (syncState.version !== null) {
+      params.set("since", syncState.version);
+      params.set("epoch", syncState.epoch);
+    }
+    const data = await StrawCoinUtils.apiRequest(`/api/leaderboard/sync?${params}`);
+    if (!data || data.status !== "success") return;
+
+    applySync(data);
 
     // Display offers
-    if (offersData && offersData.status === "success") {
-      displayOffers(offersData.offers);
-    }
+    displayOffers(syncState.offers);
 
     // Display rich and poor lists
-    if (usersData && usersData.leaderboard) {
-      displayRichestUsers(usersData.leaderboard);
-      displayPoorestUsers(usersData.leaderboard);
-    }
+    const leaderboard = [...syncState.users.values()].sort(
+      (a, b) => b.coin_balance - a.coin_balance
+    );
+    displayRichestUsers(leaderboard);
+    displayPoorestUsers(leaderboard);
 
     // Update market stats
-    if (marketData) {
-      updateMarketStats(marketData);
+    if (data.stats) {
+      updateMarketStats(data.stats);
     }
 
     // Update last refresh time
@@ -45,6 +55,24 @@ async function loadAllData() {
   }
 }
 
+function applySync(data) {
+  if (data.reset) {
+    syncState.users.clear();
+    syncState.offers = [];
+  }
+
+  data.users.forEach((user) => syncState.users.set(user.username, user));
+
+  if (data.offers.length > 0) {
+    const known = new Set(syncState.offers.map((offer) => offer.id));
+    const fresh = data.offers.filter((offer) => !known.has(offer.id));
+    syncState.offers = [...fresh, ...syncState.offers].slice(0, 5);
+  }
+
+  syncState.version = data.version;
+  syncState.epoch = data.epoch;
+}
+
 function displayOffers(offers) {
   const container = document.getElementById("recentOffers");
   if (!container) return;
@@ -86,6 +86,16 @@ function bindControlButtons() {
   if (refreshOffersBtn) {
     refreshOffersBtn.addEventListener("click", loadPendingOffers);
   }
+
+  const approveAllOffersBtn = document.getElementById("approveAllOffersBtn");
+  if (approveAllOffersBtn) {
+    approveAllOffersBtn.addEventListener("click", () => decideAllOffers("approve"));
+  }
+
+  const denyAllOffersBtn = document.getElementById("denyAllOffersBtn");
+  if (denyAllOffersBtn) {
+    denyAllOffersBtn.addEventListener("click", () => decideAllOffers("deny"));
+  }
 }
 
 async function manipulatePerformerStatus() {
@@ -205,6 +215,7 @@ async function executeUniversalTransfer() {
     const data = await StrawCoinUtils.apiRequest(endpoint, {
       method: "POST",
       body: JSON.stringify(payload),
+      idempotencyKey: StrawCoinUtils.newIdempotencyKey(),
     });
 
     if (data) {
@@ -345,19 +356,19 @@ async function refreshMarketData() {
       );
     }
     
-    // Also refresh market status
-    const marketData = await StrawCoinUtils.apiRequest("/api/market-status");
-    if (marketData && marketData.market_status) {
+    // Also refresh market status from the in-memory heartbeat
+    const pulse = await StrawCoinUtils.fetchPulse();
+    if (pulse) {
       const marketStatusIndicator = document.getElementById("marketStatusIndicator");
       if (marketStatusIndicator) {
-        marketStatusIndicator.textContent = marketData.market_status.status_text;
-        marketStatusIndicator.style.color = marketData.market_status.status_color;
+        marketStatusIndicator.textContent = pulse.market_open ? "🟢 OPEN" : "🔴 CLOSED";
+        marketStatusIndicator.style.color = pulse.market_open ? "#00D084" : "#F23645";
       }
       
       // Update the select dropdown
       const marketStateSelect = document.getElementById("marketStateSelect");
       if (marketStateSelect) {
-        marketStateSelect.value = marketData.market_status.is_open ? "open" : "closed";
+        marketStateSelect.value = pulse.market_open ? "open" : "closed";
       }
     }
   } catch (error) {
@@ -595,10 +606,17 @@ const sessionRefresh = StrawCoinUtils.createAutoRefresh(
 );
 sessionRefresh.start();
 
-// Auto-refresh pending offers every 30 seconds
+// Pending offers shown in the terminal, kept in sync by version
+const offerState = {
+  version: null,
+  epoch: null,
+  offers: new Map()
+};
+
+// Auto-refresh pending offers every 10 seconds (incremental, so polls are cheap)
 const offersRefresh = StrawCoinUtils.createAutoRefresh(
   loadPendingOffers,
-  30000 // 30 seconds
+  10000 // 10 seconds
 );
 offersRefresh.start();
 
@@ -608,16 +626,24 @@ async function loadPendingOffers() {
     const container = document.getElementById("pendingOffersContainer");
     if (!container) return;
     
-    const data = await StrawCoinUtils.apiRequest("/api/quant/pending-offers");
-    
-    if (data && data.offers) {
-      displayPendingOffers(data.offers);
-      
-      // Log if there are new offers
-      if (data.offers.length > 0) {
+    let url = "/api/quant/pending-offers";
+    if (offerState.version !== null) {
+      url += `?since=${offerState.version}&epoch=${offerState.epoch}`;
+    }
+
+    const data = await StrawCoinUtils.apiRequest(url);
+    if (!data) return;
+
+    const changed = applyOfferChanges(data);
+    if (changed) {
+      const offers = Array.from(offerState.offers.values()).sort((a, b) => b.id - a.id);
+      displayPendingOffers(offers);
+
+      // Log when the queue changes
+      if (offers.length > 0) {
         logQuantAction(
           "OFFERS_CHECK",
-          `Found ${data.offers.length} pending offers`,
+          `Found ${offers.length} pending offers`,
           "info"
         );
       }
@@ -631,6 +657,23 @@ async function loadPendingOffers() {
   }
 }
 
+function applyOfferChanges(data) {
+  let changed = false;
+
+  if (data.reset) {
+    offerState.offers = new Map(data.offers.map(offer => [offer.id, offer]));
+    changed = true;
+  } else {
+    data.added.forEach(offer => offerState.offers.set(offer.id, offer));
+    data.removed.forEach(offerId => offerState.offers.delete(offerId));
+    changed = data.added.length > 0 || data.removed.length > 0;
+  }
+
+  offerState.version = data.version;
+  offerState.epoch = data.epoch;
+  return changed;
+}
+
 function displayPendingOffers(offers) {
   const container = document.getElementById("pendingOffersContainer");
   if (!container) return;
@@ -675,10 +718,12 @@ async function approveOffer(offerId) {
     
     const data = await StrawCoinUtils.apiRequest("/api/quant/approve-offer", {
       method: "POST",
-      body: JSON.stringify({ offer_id: offerId })
+      body: JSON.stringify({ offer_id: offerId }),
+      idempotencyKey: StrawCoinUtils.newIdempotencyKey()
     });
     
     if (data) {
+      offerState.offers.delete(offerId);
       logQuantAction(
         "OFFER_APPROVED",
         `Approved offer #${offerId}`,
@@ -718,10 +763,12 @@ async function denyOffer(offerId) {
     
     const data = await StrawCoinUtils.apiRequest("/api/quant/deny-offer", {
       method: "POST",
-      body: JSON.stringify({ offer_id: offerId })
+      body: JSON.stringify({ offer_id: offerId }),
+      idempotencyKey: StrawCoinUtils.newIdempotencyKey()
     });
     
     if (data) {
+      offerState.offers.delete(offerId);
       logQuantAction(
         "OFFER_DENIED",
         `Denied offer #${offerId}`,
@@ -755,6 +802,47 @@ async function denyOffer(offerId) {
   }
 }
 
+async function decideAllOffers(decision) {
+  const offerCards = document.querySelectorAll("#pendingOffersContainer [data-offer-id]");
+  if (offerCards.length === 0) {
+    showQuantStatus("No pending offers to process", "info");
+    return;
+  }
+
+  const offers = Array.from(offerCards).map(card => ({
+    offer_id: parseInt(card.dataset.offerId, 10),
+    decision: decision
+  }));
+
+  try {
+    showQuantStatus(`⚡ Processing ${offers.length} offers...`, "info");
+
+    // One request and one transaction for the whole batch
+    const data = await StrawCoinUtils.apiRequest("/api/quant/offers/bulk", {
+      method: "POST",
+      body: JSON.stringify({ offers }),
+      idempotencyKey: StrawCoinUtils.newIdempotencyKey()
+    });
+
+    if (data) {
+      const summary = Object.entries(data.summary)
+        .map(([result, count]) => `${count} ${result.replace(/_/g, " ")}`)
+        .join(", ");
+      logQuantAction(
+        decision === "approve" ? "OFFERS_APPROVED" : "OFFERS_DENIED",
+        `Bulk ${decision}: ${summary}`,
+        decision === "approve" ? "success" : "warning"
+      );
+      showQuantStatus(`✅ ${data.message}: ${summary}`, "success");
+      loadPendingOffers();
+    }
+  } catch (error) {
+    console.error("Failed to process offers:", error);
+    logQuantAction("ERROR", `Bulk ${decision} failed: ${error.message}`, "error");
+    showQuantStatus(`❌ Failed to process offers: ${error.message}`, "error");
+  }
+}
+
 // Make functions globally available
 window.approveOffer = approveOffer;
 window.denyOffer = denyOffer;
@@ -97,45 +97,69 @@ const StrawCoinUtils = (function() {
         }
     }
 
+    // Network failures on requests with an idempotency key are retried this
+    // many times; the server replays the first response instead of re-running it
+    const IDEMPOTENT_RETRIES = 2;
+
+    /**
+     * Create a fresh Idempotency-Key for one user action (e.g. one tap on Send)
+     * @returns {string} A unique key
+     */
+    function newIdempotencyKey() {
+        if (window.crypto && typeof window.crypto.randomUUID === 'function') {
+            return window.crypto.randomUUID();
+        }
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}${Math.random().toString(36).slice(2)}`;
+    }
+
     /**
      * Make an API request with consistent error handling
      * @param {string} url - The API endpoint URL
-     * @param {object} options - Fetch options
+     * @param {object} options - Fetch options, plus an optional idempotencyKey
+     *   that makes the request safe to retry after network errors
      * @returns {Promise} The fetch promise
      */
     async function apiRequest(url, options = {}) {
+        const { idempotencyKey, ...fetchOptions } = options;
         const defaultOptions = {
             ...API_CONFIG,
-            ...options,
+            ...fetchOptions,
             headers: {
                 ...API_CONFIG.headers,
-                ...(options.headers || {})
+                ...(fetchOptions.headers || {}),
+                ...(idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {})
             }
         };
 
-        try {
-            const response = await fetch(url, defaultOptions);
-            const data = await response.json();
-
-            // Handle redirects (e.g., quant independence, insider trading)
-            // Check for redirect in data first, regardless of status code
-            if (data.redirect) {
-                window.location.href = data.redirect;
-                return null;
-            }
+        for (let attempt = 0; ; attempt++) {
+            try {
+                const response = await fetch(url, defaultOptions);
+                const data = await response.json();
 
-            // Now check if response is not ok (but after handling redirects)
-            if (!response.ok && response.status !== 302) {
-                throw new Error(data.error || data.message || `HTTP ${response.status}`);
-            }
+                // Handle redirects (e.g., quant independence, insider trading)
+                // Check for redirect in data first, regardless of status code
+                if (data.redirect) {
+                    window.location.href = data.redirect;
+                    return null;
+                }
 
-            return data;
-        } catch (error) {
-            // Network or parsing error
-            if (error instanceof TypeError) {
-                throw new Error('Network error - please check your connection');
+                // Now check if response is not ok (but after handling redirects)
+                if (!response.ok && response.status !== 302) {
+                    throw new Error(data.error || data.message || `HTTP ${response.status}`);
+                }
+
+                return data;
+            } catch (error) {
+                // Network or parsing error
+                if (error instanceof TypeError) {
+                    if (idempotencyKey && attempt < IDEMPOTENT_RETRIES) {
+                        await new Promise(resolve => setTimeout(resolve, 500 * (attempt + 1)));
+                        continue;
+                    }
+                    throw new Error('Network error - please check your connection');
+                }
+                throw error;
             }
-            throw error;
         }
     }
 
@@ -214,24 +238,36 @@ const StrawCoinUtils = (function() {
         }
     }
 
+    /**
+     * Fetch the combined session/market heartbeat
+     * Served from server memory, so it is cheap enough to poll every second
+     * @returns {Promise<object|null>} Pulse payload or null on failure
+     */
+    async function fetchPulse() {
+        try {
+            const response = await fetch('/api/pulse', { credentials: 'same-origin' });
+            return await response.json();
+        } catch (error) {
+            console.error('Pulse check failed:', error);
+            return null;
+        }
+    }
+
     /**
      * Check session status and redirect if expired
      * @param {string} redirectUrl - URL to redirect to if session expired
      */
     async function checkSession(redirectUrl = '/register') {
-        try {
-            const response = await fetch('/auth/session-status');
-            const data = await response.json();
-            
-            if (!data.authenticated) {
-                window.location.href = redirectUrl;
-                return false;
-            }
-            return true;
-        } catch (error) {
-            console.error('Session check failed:', error);
+        const data = await fetchPulse();
+        if (!data) {
+            return false;
+        }
+
+        if (!data.authenticated) {
+            window.location.href = redirectUrl;
             return false;
         }
+        return true;
     }
 
     /**
@@ -464,6 +500,7 @@ const StrawCoinUtils = (function() {
         
         // API utilities
         apiRequest,
+        newIdempotencyKey,
         
         // Formatting
         formatNumber,
@@ -473,6 +510,7 @@ const StrawCoinUtils = (function() {
         updateMarketStats,
         
         // Session management
+        fetchPulse,
         checkSession,
         clearSession,
         
@@ -0,0 +1,36 @@
+import pytest
+
+from src import create_app
+from src.db import init_db
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app on a fresh database; keyword arguments override config."""
+
+    def factory(**config):
+        app = create_app(
+            {
+                "TESTING": True,
+                "SECRET_KEY": "test",
+                "DATABASE": str(tmp_path / "strawcoin.sqlite"),
+                "SITE_NAME": "Straw Coin",
+                "TAGLINE": "test",
+                "QUANT_USERNAME": "CHANCELLOR",
+                "QUANT_ENABLED": True,
+                "ENABLE_PERFORMER_REDISTRIBUTION": False,
+                "MARKET_OPEN": True,
+                **config,
+            }
+        )
+        app.instance_path = str(tmp_path)
+        with app.app_context():
+            init_db()
+        return app
+
+    return factory
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
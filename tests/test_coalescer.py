@@ -0,0 +1,52 @@
+import pytest
+
+from src import coalescer
+from src.coalescer import get_coalescer
+from src.metrics import metrics
+
+
+@pytest.fixture
+def writer(make_app):
+    app = make_app(TRANSFER_COALESCING=True)
+    co = get_coalescer(app)
+    with app.app_context():
+        yield co
+    co.stop()
+
+
+def fail_once(monkeypatch, target, name):
+    original = getattr(target, name)
+    calls = []
+
+    def flaky(*args, **kwargs):
+        if not calls:
+            calls.append(name)
+            raise RuntimeError(f"{name} failed")
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(target, name, flaky)
+
+
+def test_bookkeeping_failure_still_resolves_committed_transfer(writer, monkeypatch):
+    fail_once(monkeypatch, metrics, "increment")
+
+    assert writer.submit("SPEED", "ALEX1", 5).result(timeout=5) == "success"
+    assert writer.submit("SPEED", "ALEX1", 5).result(timeout=5) == "success"
+    assert writer._thread.is_alive()
+
+
+def test_connection_failure_fails_batch_and_writer_recovers(writer, monkeypatch):
+    fail_once(monkeypatch, coalescer, "get_db")
+
+    assert writer.submit("SPEED", "ALEX1", 5).result(timeout=5) == "transaction_failed"
+    assert writer.submit("SPEED", "ALEX1", 5).result(timeout=5) == "success"
+
+
+def test_dead_writer_is_restarted(writer):
+    assert writer.submit("SPEED", "ALEX1", 5).result(timeout=5) == "success"
+
+    # Let the writer thread exit without clearing its handle
+    writer._queue.put(None)
+    writer._thread.join()
+
+    assert writer.submit("SPEED", "ALEX1", 5).result(timeout=5) == "success"
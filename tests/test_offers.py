@@ -0,0 +1,39 @@
+from src.db import approve_or_deny_offer, get_db, rebuild_user_stats, transfer_coins
+
+
+def stats_snapshot(db):
+    return (
+        [tuple(row) for row in db.execute("SELECT * FROM user_stats ORDER BY user_id")],
+        [tuple(row) for row in db.execute("SELECT * FROM user_type_stats ORDER BY user_id, transaction_type")],
+    )
+
+
+def test_auto_denied_offer_leaves_stats_matching_ledger(app):
+    with app.app_context():
+        db = get_db()
+        assert transfer_coins("SPEED", "ALEX1", 9_000, "offer", "everything") == "offer_pending"
+        offer_id = db.execute("SELECT MAX(id) AS id FROM transactions").fetchone()["id"]
+        # Spend the coins the offer was counting on
+        assert transfer_coins("SPEED", "ELI", 5_000) == "success"
+
+        assert approve_or_deny_offer(offer_id, True) == "insufficient_funds"
+        status = db.execute("SELECT status FROM transactions WHERE id = ?", (offer_id,)).fetchone()["status"]
+        assert status == "denied"
+
+        live = stats_snapshot(db)
+        rebuild_user_stats(db)
+        assert live == stats_snapshot(db)
+
+
+def test_approved_offer_is_counted_once(app):
+    with app.app_context():
+        db = get_db()
+        assert transfer_coins("SPEED", "ALEX1", 40, "offer", "encore") == "offer_pending"
+        offer_id = db.execute("SELECT MAX(id) AS id FROM transactions").fetchone()["id"]
+
+        assert approve_or_deny_offer(offer_id, True) == "success"
+        assert approve_or_deny_offer(offer_id, True) == "offer_not_found"
+
+        live = stats_snapshot(db)
+        rebuild_user_stats(db)
+        assert live == stats_snapshot(db)
@@ -0,0 +1,16 @@
+import pytest
+
+from src.ratelimit import TokenBucketLimiter
+
+
+def test_empty_bucket_reports_time_until_refill():
+    limiter = TokenBucketLimiter()
+    assert limiter.acquire("transfer", "BOB", 2, 1, now=0) == 0
+    assert limiter.acquire("transfer", "BOB", 2, 1, now=0) == pytest.approx(0.5)
+    assert limiter.acquire("transfer", "BOB", 2, 1, now=0.5) == 0
+
+
+@pytest.mark.parametrize("limit", [(0, 10), (-1, 10), (2, 0)])
+def test_invalid_rate_limits_are_rejected_at_startup(make_app, limit):
+    with pytest.raises(ValueError, match="RATE_LIMITS"):
+        make_app(RATE_LIMITS={"transfer": limit})